@@ -8,6 +8,7 @@ import re
 import json
 from datetime import datetime
 import uuid
+from itertools import islice
 
 from config import settings, VectorDBType
 from autoquest.api.schemas.core import DocumentType, Source, DocumentInfo
@@ -16,6 +17,8 @@ from pathlib import Path
 
 logger = logging.getLogger(__name__)
 
+_WORD_RE = re.compile(r"\b\w+\b")
+
 class AdvancedRAG:
     """Enhanced RAG system with multiple retrieval strategies and response generation models.
 
@@ -85,6 +88,15 @@ class AdvancedRAG:
             logger.warning(f"Could not load text generation model: {e}")
             self.text_gen_pipeline = None
     
+    def warmup(self):
+        """Encode (and search) one dummy query so the first request skips lazy initialization."""
+        try:
+            embedding = self.embedder.encode(["warmup"], convert_to_numpy=True)
+            if self.index is not None:
+                self.index.search(embedding, 1)
+        except Exception as e:
+            logger.warning(f"RAG warmup failed: {e}")
+    
     async def add_document(self, file_path: str, file_type: DocumentType, metadata: Optional[Dict[str, Any]] = None) -> str:
         """Add a single file into the RAG system, process into chunks, and index."""
         metadata = metadata or {}
@@ -175,24 +187,20 @@ class AdvancedRAG:
         """Retrieve relevant chunks as Source models using hybrid (lexical + vector) if enabled.
         Supports simple metadata filters on in-memory metadata (document_id equality and file_type).
         """
-        if not self.documents:
-            return []
+        return (await self.retrieve_batch([query], top_k, similarity_threshold, filters))[0]
+
+    async def retrieve_batch(self, queries: List[str], top_k: int = None, similarity_threshold: float = None, filters: Optional[Dict[str, Any]] = None) -> List[List[Source]]:
+        """Retrieve for several queries at once: one embedding pass and, on FAISS/Chroma, one index query."""
+        if not self.documents or not queries:
+            return [[] for _ in queries]
         top_k = top_k or settings.top_k
         similarity_threshold = similarity_threshold if similarity_threshold is not None else settings.similarity_threshold
-        # Lexical scoring (simple frequency overlap)
-        def lexical_score(text: str, q: str) -> float:
-            q_tokens = set(re.findall(r"\b\w+\b", q.lower()))
-            t_tokens = set(re.findall(r"\b\w+\b", text.lower()))
-            if not q_tokens or not t_tokens:
-                return 0.0
-            overlap = len(q_tokens.intersection(t_tokens))
-            return overlap / max(1, len(q_tokens))
 
-        # Filter indices by metadata
-        candidate_indices = list(range(len(self.documents)))
+        # Filter indices by metadata (None = every chunk is a candidate)
+        candidate_indices = None
         if filters:
-            filtered = []
-            for idx in candidate_indices:
+            candidate_indices = set()
+            for idx in range(len(self.documents)):
                 meta = self.metadata[idx] if idx < len(self.metadata) else {}
                 ok = True
                 if "document_id" in filters and meta.get("document_id") != filters["document_id"]:
@@ -200,112 +208,138 @@ class AdvancedRAG:
                 if "file_type" in filters and meta.get("file_type") != filters["file_type"]:
                     ok = False
                 if ok:
-                    filtered.append(idx)
-            candidate_indices = filtered
+                    candidate_indices.add(idx)
             if not candidate_indices:
-                return []
+                return [[] for _ in queries]
 
-        # Query embedding
-        query_embedding = self.embedder.encode([query], convert_to_numpy=True)
-        sources: List[Source] = []
+        # Query embeddings
+        query_embeddings = self.embedder.encode(list(queries), convert_to_numpy=True, batch_size=len(queries))
         if self.vector_db_type == VectorDBType.FAISS:
             if self.index is None:
                 self._build_index()
             if self.index is None:
-                return []
+                return [[] for _ in queries]
             # Vector search over candidate indices: emulate by searching all and post-filter
-            distances, indices = self.index.search(query_embedding, min(len(self.documents), max(top_k * 5, 50)))
-            ranked = []
-            for distance, idx in zip(distances[0], indices[0]):
-                if int(idx) not in candidate_indices:
-                    continue
-                vec_sim = float(1 / (1 + distance))
-                lex_sim = lexical_score(self.documents[idx], query)
-                if settings.enable_hybrid:
-                    alpha = settings.hybrid_alpha
-                    score = alpha * vec_sim + (1 - alpha) * lex_sim
-                else:
-                    score = vec_sim
-                ranked.append((score, vec_sim, int(idx)))
-            ranked.sort(key=lambda x: x[0], reverse=True)
-            results = []
-            for score, vec_sim, idx in ranked[:top_k]:
-                if vec_sim < similarity_threshold and not settings.enable_hybrid:
-                    continue
-                meta = self.metadata[idx] if idx < len(self.metadata) else {}
-                doc_id = meta.get("document_id", self.doc_index_to_id.get(int(idx), ""))
-                file_name = meta.get("file_path", "")
-                results.append(Source(
-                    document_id=doc_id or str(idx),
-                    file_name=Path(file_name).name if file_name else (self.id_to_info.get(doc_id).file_name if doc_id in self.id_to_info else "unknown"),
-                    chunk_text=self.documents[idx],
-                    similarity_score=float(score),
-                    chunk_index=int(idx)
-                ))
-            return results
+            distances, indices = self.index.search(query_embeddings, min(len(self.documents), max(top_k * 5, 50)))
+            return [
+                self._rank_faiss_hits(query, distances[row], indices[row], candidate_indices, top_k, similarity_threshold)
+                for row, query in enumerate(queries)
+            ]
         elif self.vector_db_type == VectorDBType.CHROMA:
             try:
                 if self._backend_collection is None:
                     self._init_backend()
                 res = self._backend_collection.query(
-                    query_embeddings=query_embedding.tolist(),
+                    query_embeddings=query_embeddings.tolist(),
                     n_results=top_k
                 )
-                ids = res.get("ids", [[]])[0]
-                docs = res.get("documents", [[]])[0]
-                metas = res.get("metadatas", [[]])[0]
-                dists = res.get("distances", [[]])[0]
-                for i, _ in enumerate(ids):
-                    distance = float(dists[i]) if i < len(dists) else 0.0
-                    similarity = float(1 / (1 + distance))
-                    if similarity < similarity_threshold:
-                        continue
-                    meta = metas[i] if i < len(metas) else {}
-                    doc_id = meta.get("document_id", "")
-                    file_name = meta.get("file_path", "")
-                    sources.append(Source(
-                        document_id=doc_id or str(i),
-                        file_name=Path(file_name).name if file_name else (self.id_to_info.get(doc_id).file_name if doc_id in self.id_to_info else "unknown"),
-                        chunk_text=docs[i] if i < len(docs) else "",
-                        similarity_score=similarity,
-                        chunk_index=int(i)
-                    ))
+                return [self._chroma_sources(res, row, similarity_threshold) for row in range(len(queries))]
             except Exception as e:
                 logger.error(f"Chroma query failed: {e}")
                 # Fallback to FAISS search
                 self.vector_db_type = VectorDBType.FAISS
-                return await self.retrieve(query, top_k=top_k, similarity_threshold=similarity_threshold, filters=filters)
-            return sources
+                return await self.retrieve_batch(queries, top_k=top_k, similarity_threshold=similarity_threshold, filters=filters)
         elif self.vector_db_type == VectorDBType.QDRANT:
             try:
-                self._ensure_qdrant_collection(int(query_embedding.shape[1]))
-                res = self._backend_client.search(
-                    collection_name="documents",
-                    query_vector=query_embedding[0].tolist(),
-                    limit=top_k
-                )
-                for hit in res:
-                    similarity = float(hit.score)
-                    if similarity < similarity_threshold:
-                        continue
-                    meta = hit.payload or {}
-                    idx = int(hit.id) if isinstance(hit.id, int) else 0
-                    doc_id = meta.get("document_id", self.doc_index_to_id.get(idx, ""))
-                    file_name = meta.get("file_path", "")
-                    text = self.documents[idx] if idx < len(self.documents) else ""
-                    sources.append(Source(
-                        document_id=doc_id or str(idx),
-                        file_name=Path(file_name).name if file_name else (self.id_to_info.get(doc_id).file_name if doc_id in self.id_to_info else "unknown"),
-                        chunk_text=text,
-                        similarity_score=similarity,
-                        chunk_index=int(idx)
-                    ))
+                self._ensure_qdrant_collection(int(query_embeddings.shape[1]))
+                return [
+                    self._qdrant_sources(
+                        self._backend_client.search(
+                            collection_name="documents",
+                            query_vector=embedding.tolist(),
+                            limit=top_k
+                        ),
+                        similarity_threshold
+                    )
+                    for embedding in query_embeddings
+                ]
             except Exception as e:
                 logger.error(f"Qdrant query failed: {e}")
                 # Fallback to FAISS search
                 self.vector_db_type = VectorDBType.FAISS
-                return await self.retrieve(query, top_k=top_k, similarity_threshold=similarity_threshold, filters=filters)
-            return sources
+                return await self.retrieve_batch(queries, top_k=top_k, similarity_threshold=similarity_threshold, filters=filters)
+        return [[] for _ in queries]
+
+    def _source_file_name(self, meta: Dict[str, Any], doc_id: str) -> str:
+        file_name = meta.get("file_path", "")
+        if file_name:
+            return Path(file_name).name
+        return self.id_to_info[doc_id].file_name if doc_id in self.id_to_info else "unknown"
+
+    def _rank_faiss_hits(self, query: str, distances, indices, candidate_indices, top_k: int, similarity_threshold: float) -> List[Source]:
+        """Hybrid-score one query's FAISS hits and build its top_k Sources."""
+        # Lexical scoring (simple frequency overlap)
+        q_tokens = set(_WORD_RE.findall(query.lower()))
+        ranked = []
+        for distance, idx in zip(distances, indices):
+            idx = int(idx)
+            if idx < 0 or (candidate_indices is not None and idx not in candidate_indices):
+                continue
+            vec_sim = float(1 / (1 + distance))
+            if settings.enable_hybrid:
+                t_tokens = set(_WORD_RE.findall(self.documents[idx].lower()))
+                lex_sim = len(q_tokens & t_tokens) / max(1, len(q_tokens)) if q_tokens and t_tokens else 0.0
+                alpha = settings.hybrid_alpha
+                score = alpha * vec_sim + (1 - alpha) * lex_sim
+            else:
+                score = vec_sim
+            ranked.append((score, vec_sim, idx))
+        ranked.sort(key=lambda x: x[0], reverse=True)
+        results = []
+        for score, vec_sim, idx in ranked[:top_k]:
+            if vec_sim < similarity_threshold and not settings.enable_hybrid:
+                continue
+            meta = self.metadata[idx] if idx < len(self.metadata) else {}
+            doc_id = meta.get("document_id", self.doc_index_to_id.get(idx, ""))
+            results.append(Source(
+                document_id=doc_id or str(idx),
+                file_name=self._source_file_name(meta, doc_id),
+                chunk_text=self.documents[idx],
+                similarity_score=float(score),
+                chunk_index=idx
+            ))
+        return results
+
+    def _chroma_sources(self, res: Dict[str, Any], row: int, similarity_threshold: float) -> List[Source]:
+        """Sources for one query row of a Chroma multi-query result."""
+        ids = res.get("ids", [[]])[row]
+        docs = res.get("documents", [[]])[row]
+        metas = res.get("metadatas", [[]])[row]
+        dists = res.get("distances", [[]])[row]
+        sources: List[Source] = []
+        for i, _ in enumerate(ids):
+            distance = float(dists[i]) if i < len(dists) else 0.0
+            similarity = float(1 / (1 + distance))
+            if similarity < similarity_threshold:
+                continue
+            meta = metas[i] if i < len(metas) else {}
+            doc_id = meta.get("document_id", "")
+            sources.append(Source(
+                document_id=doc_id or str(i),
+                file_name=self._source_file_name(meta, doc_id),
+                chunk_text=docs[i] if i < len(docs) else "",
+                similarity_score=similarity,
+                chunk_index=int(i)
+            ))
+        return sources
+
+    def _qdrant_sources(self, hits, similarity_threshold: float) -> List[Source]:
+        sources: List[Source] = []
+        for hit in hits:
+            similarity = float(hit.score)
+            if similarity < similarity_threshold:
+                continue
+            meta = hit.payload or {}
+            idx = int(hit.id) if isinstance(hit.id, int) else 0
+            doc_id = meta.get("document_id", self.doc_index_to_id.get(idx, ""))
+            text = self.documents[idx] if idx < len(self.documents) else ""
+            sources.append(Source(
+                document_id=doc_id or str(idx),
+                file_name=self._source_file_name(meta, doc_id),
+                chunk_text=text,
+                similarity_score=similarity,
+                chunk_index=int(idx)
+            ))
         return sources
     
     def classify_question_type(self, question: str) -> str:
@@ -568,8 +602,10 @@ Answer: Based on the context provided, """
         } 
 
     # New management APIs expected by FastAPI layer
-    def list_documents(self) -> List[DocumentInfo]:
-        return list(self.id_to_info.values())
+    def list_documents(self, skip: int = 0, limit: Optional[int] = None) -> List[DocumentInfo]:
+        """Documents in upload order, sliced without copying the whole registry."""
+        stop = None if limit is None else skip + limit
+        return list(islice(self.id_to_info.values(), skip, stop))
 
     def get_document_info(self, document_id: str) -> Optional[DocumentInfo]:
         return self.id_to_info.get(document_id)
@@ -595,6 +631,16 @@ Answer: Based on the context provided, """
         self._build_index()
         return True
 
+    def reset(self):
+        """Forget every registered document and drop the in-memory FAISS index (Chroma/Qdrant data is kept)."""
+        self.documents = []
+        self.metadata = []
+        self.doc_ids = []
+        self.doc_index_to_id = {}
+        self.id_to_info = {}
+        self.index = None
+        self.doc_embeddings = None
+
     def get_stats(self) -> Dict[str, Any]:
         return {
             "total_documents": len(self.id_to_info),
@@ -122,6 +122,18 @@ class AIEngine:
             self.tokenizers["chat"] = AutoTokenizer.from_pretrained(model_name)
             logger.info(f"Loaded regular chat model: {model_name}")
     
+    def warmup(self):
+        """Run one tiny forward pass per loaded model so the first request skips lazy initialization"""
+        for name, model in self.models.items():
+            if self.model_status.get(name) != "loaded":
+                continue
+            try:
+                inputs = self.tokenizers[name]("warmup", return_tensors="pt")
+                with torch.no_grad():
+                    model(**inputs)
+            except Exception as e:
+                logger.warning(f"Warmup failed for {name} model: {str(e)}")
+    
     async def generate_answer(self, request: QuestionRequest, sources: List[Source]) -> AnswerResponse:
         """Generate an answer based on the question and retrieved sources"""
         start_time = time.time()
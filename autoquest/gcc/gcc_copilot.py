@@ -1,32 +1,746 @@
+import numpy as np
 import pandas as pd
 import time
 import logging
+from logging.handlers import QueueHandler, QueueListener
 import re
 import os
+import random
 import warnings
 import signal
 import sys
 import uuid
 import json
+import itertools
+import queue
+import statistics
+from collections import deque
 from datetime import datetime
+from contextlib import contextmanager
+from functools import lru_cache
 from selenium import webdriver
-from selenium.webdriver.common.by import By
 from selenium.webdriver.common.keys import Keys
 from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.chrome.options import Options
-from selenium.common.exceptions import TimeoutException, StaleElementReferenceException, ElementClickInterceptedException, NoSuchElementException
-from selenium.webdriver.common.action_chains import ActionChains
-from typing import Dict, List, Optional, Tuple
+from selenium.common.exceptions import TimeoutException, WebDriverException
+from typing import Callable, Dict, List, Optional, Tuple
 import openpyxl
+from openpyxl.cell import WriteOnlyCell
 from openpyxl.styles import Font
 import sqlite3
 from pathlib import Path
 import shutil
-from threading import Lock, Event
+from threading import Lock, RLock, Event, local
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    from .validators_fast import first_number, yes_no_code
+except ImportError:  # Running as a script
+    from validators_fast import first_number, yes_no_code
+
+try:
+    import orjson
+
+    def _json_dumps(obj) -> str:
+        return orjson.dumps(obj).decode()
+except ImportError:  # orjson is optional; stdlib json produces equivalent TEXT
+    def _json_dumps(obj) -> str:
+        return json.dumps(obj)
+
+try:
+    import ahocorasick
+except ImportError:  # pyahocorasick is optional; fall back to per-company compiled alternations
+    ahocorasick = None
 
 warnings.filterwarnings('ignore')
 
+# Shared tail of every SSON query; {item} names one answer, {answer} the expected output shape
+_SSON_ANSWER_FORMAT = (
+    "Also search SSON sources. Return the answer in the following format, with each {item} and its most "
+    "credible source URL separated by a tilde (~), and each pair separated by a question mark (?). "
+    "Do not provide any additional text or explanation. Only provide {answer}"
+)
+_YES_NO_ANSWER = "Yes/No and URLs in the format: Yes~url1?No~url2?Yes~url3"
+
+# field -> (question, answer item, answer shape)
+_SSON_QUESTIONS = {
+    # Basic company information
+    'industries': (
+        'List the primary industries or sectors that the following companies operate in: {companies}.',
+        'industry list', 'the bare industry names and URLs in the format: Technology,Healthcare~url1?Retail~url2?Manufacturing,Automotive~url3'
+    ),
+    'revenue': (
+        'Provide the latest annual revenue (in millions) for the following companies: {companies}.',
+        'revenue figure', 'the bare numbers and URLs in the format: 5000~url1?2300~url2?18000~url3'
+    ),
+    'gbs': (
+        'For each of these companies, indicate whether they have Global Business Services (GBS) or similar shared services operations (Yes/No): {companies}.',
+        'Yes/No answer', _YES_NO_ANSWER
+    ),
+
+    # Global GCC information
+    'global_gcc_units': (
+        'Provide the total number of Global Capability Centers (GCC) or Global Business Services (GBS) centers worldwide for the following companies: {companies}.',
+        'count', 'the bare count numbers and URLs in the format: 3~url1?0~url2?5~url3'
+    ),
+    'global_gcc_locations': (
+        'Provide all countries/regions where the following companies have Global Capability Centers (GCC) or Global Business Services (GBS): {companies}.',
+        'location list', 'the bare location lists and URLs in the format: India,USA,Philippines~url1?None~url2?Poland,India~url3'
+    ),
+    'global_gcc_headcount': (
+        'Provide the total headcount (number of employees) across ALL Global Capability Centers (GCC) or Global Business Services (GBS) worldwide for the following companies: {companies}.',
+        'headcount', 'the bare headcount numbers and URLs in the format: 5000~url1?0~url2?12000~url3'
+    ),
+
+    # India-specific GCC information
+    'india_gcc_units': (
+        'Provide the number of Global Capability Centers (GCC) or Global Business Services (GBS) centers specifically located in India for the following companies: {companies}.',
+        'count', 'the bare count numbers and URLs in the format: 2~url1?0~url2?1~url3'
+    ),
+    'gcc_locations_india': (
+        'List all the specific city locations where the following companies have Global Capability Centers (GCC) or Global Business Services (GBS) in India: {companies}.',
+        'city list', 'the bare city names and URLs in the format: Bangalore,Chennai~url1?Mumbai,Pune~url2?Hyderabad,Delhi~url3'
+    ),
+
+    # City-specific presence
+    'city_bangalore': (
+        'Do the following companies have GCC/GBS operations in Bangalore/Bengaluru: {companies}?',
+        'Yes/No', _YES_NO_ANSWER
+    ),
+    'city_hyderabad': (
+        'Do the following companies have GCC/GBS operations in Hyderabad: {companies}?',
+        'Yes/No', _YES_NO_ANSWER
+    ),
+    'city_pune': (
+        'Do the following companies have GCC/GBS operations in Pune: {companies}?',
+        'Yes/No', _YES_NO_ANSWER
+    ),
+    'city_chennai': (
+        'Do the following companies have GCC/GBS operations in Chennai: {companies}?',
+        'Yes/No', _YES_NO_ANSWER
+    ),
+    'city_mumbai': (
+        'Do the following companies have GCC/GBS operations in Mumbai: {companies}?',
+        'Yes/No', _YES_NO_ANSWER
+    ),
+    'city_delhi_ncr': (
+        'Do the following companies have GCC/GBS operations in Delhi NCR (including Gurgaon/Noida): {companies}?',
+        'Yes/No', _YES_NO_ANSWER
+    ),
+    'city_others': (
+        'Do the following companies have GCC/GBS operations in any other Indian cities besides the major ones (Bangalore, Hyderabad, Pune, Chennai, Mumbai, Delhi NCR): {companies}?',
+        'Yes/No and city names (if Yes)', 'the answer in format: No~url1?Yes,Kolkata~url2?Yes,Coimbatore~url3'
+    ),
+
+    # Function information
+    'total_functions': (
+        'Provide the total number of unique functions (e.g., IT, Finance, HR) performed at the GCC/GBS centers of the following companies: {companies}.',
+        'count', 'the bare numbers and URLs in the format: 5~url1?3~url2?7~url3'
+    ),
+    'gcc_functions': (
+        'List all the functions performed at the GCC/GBS centers of the following companies: {companies}.',
+        'function list', 'the function names in the format: Finance,IT,HR~url1?IT,Operations~url2?Finance,HR,Technology~url3'
+    ),
+
+    # Individual functions
+    'function_finance': (
+        "Do these companies' GCC/GBS centers perform Finance & Accounting functions: {companies}?",
+        'Yes/No', _YES_NO_ANSWER
+    ),
+    'function_hr': (
+        "Do these companies' GCC/GBS centers perform HR functions: {companies}?",
+        'Yes/No', _YES_NO_ANSWER
+    ),
+    'function_it': (
+        "Do these companies' GCC/GBS centers perform IT functions: {companies}?",
+        'Yes/No', _YES_NO_ANSWER
+    ),
+    'function_procurement': (
+        "Do these companies' GCC/GBS centers perform Procurement functions: {companies}?",
+        'Yes/No', _YES_NO_ANSWER
+    ),
+    'function_operations': (
+        "Do these companies' GCC/GBS centers perform Operations functions: {companies}?",
+        'Yes/No', _YES_NO_ANSWER
+    ),
+    'function_rd': (
+        "Do these companies' GCC/GBS centers perform R&D functions: {companies}?",
+        'Yes/No', _YES_NO_ANSWER
+    ),
+    'function_technology': (
+        "Do these companies' GCC/GBS centers perform Technology functions: {companies}?",
+        'Yes/No', _YES_NO_ANSWER
+    ),
+    'function_marketing': (
+        "Do these companies' GCC/GBS centers perform Marketing & Sales functions: {companies}?",
+        'Yes/No', _YES_NO_ANSWER
+    ),
+    'function_others': (
+        "Do these companies' GCC/GBS centers perform any other functions besides the standard ones (Finance, HR, IT, Procurement, Operations, R&D, Technology, Marketing): {companies}?",
+        'Yes/No and function names (if Yes)', 'the answer in format: No~url1?Yes,Analytics~url2?Yes,Legal~url3'
+    ),
+
+    # India headcount
+    'total_india_headcount': (
+        'What is the total employee headcount in Indian GCC/GBS centers for the following companies: {companies}.',
+        'headcount', 'the bare numbers and URLs in the format: 3000~url1?0~url2?8500~url3'
+    ),
+
+    # Combined Yes/No matrices, fanned out to the MATRIX_FIELDS columns
+    'city_matrix': (
+        'For each of the following companies, do they have GCC/GBS operations in each of these Indian cities, in this order: Bangalore/Bengaluru, Hyderabad, Pune, Chennai, Mumbai, Delhi NCR (including Gurgaon/Noida): {companies}?',
+        'comma-separated list of six Yes/No answers (one per city, in the order given)',
+        'the Yes/No lists and URLs in the format: Yes,No,Yes,No,No,Yes~url1?No,No,No,No,No,No~url2?Yes,Yes,No,Yes,Yes,No~url3'
+    ),
+    'function_matrix': (
+        "For each of the following companies, do their GCC/GBS centers perform each of these functions, in this order: Finance & Accounting, HR, IT, Procurement, Operations, R&D, Technology, Marketing & Sales: {companies}?",
+        'comma-separated list of eight Yes/No answers (one per function, in the order given)',
+        'the Yes/No lists and URLs in the format: Yes,Yes,Yes,No,Yes,No,Yes,No~url1?No,No,No,No,No,No,No,No~url2?Yes,No,Yes,Yes,No,Yes,Yes,No~url3'
+    )
+}
+
+# Virtual fields queried as one prompt; answers come back comma-separated in this column order
+MATRIX_FIELDS = {
+    'city_matrix': [
+        'city_bangalore', 'city_hyderabad', 'city_pune',
+        'city_chennai', 'city_mumbai', 'city_delhi_ncr'
+    ],
+    'function_matrix': [
+        'function_finance', 'function_hr', 'function_it', 'function_procurement',
+        'function_operations', 'function_rd', 'function_technology', 'function_marketing'
+    ],
+}
+
+UNIFIED_QUERY_TEMPLATES = {
+    field: f"{question} " + _SSON_ANSWER_FORMAT.format(item=item, answer=answer)
+    for field, (question, item, answer) in _SSON_QUESTIONS.items()
+}
+# Templates without the SSON answer format
+UNIFIED_QUERY_TEMPLATES.update({
+    'city_specific': "Provide the presence of GCCs in the following cities for the companies: {companies}. Return the answer in the format: city~url",
+    'functions': "List the functions (e.g., Finance, HR, IT) for the following companies: {companies}. Return the answer in the format: function~url",
+    'remarks': "Provide any additional remarks for the following companies: {companies}. Return the answer in the format: remark~url"
+})
+
+
+# Each template pre-rendered around a placeholder and split into (prefix, suffix), so a query is two concatenations
+_TEMPLATE_PARTS = {
+    field: tuple(template.format(companies='\0').split('\0', 1))
+    for field, template in UNIFIED_QUERY_TEMPLATES.items()
+}
+
+
+@lru_cache(maxsize=512)
+def build_unified_query(field_name: str, companies: Tuple[str, ...]) -> Optional[str]:
+    """Render the query for a field and company batch, or None if the field has no template"""
+    parts = _TEMPLATE_PARTS.get(field_name)
+    if not parts:
+        return None
+    prefix, suffix = parts
+    return prefix + ", ".join(companies) + suffix
+
+
+# Precompiled patterns for response cleaning and validation
+_URL_RE = re.compile(r'https?://[^\s\],)]+')
+_CITATION_RE = re.compile(r'\[\d+\]')
+_WHITESPACE_RE = re.compile(r'\s+')
+_DIGITS_RE = re.compile(r'\d+', re.ASCII)
+_UNSAFE_CHARS_RE = re.compile(r'[^\w\s,.-]')
+_LOCATION_CHARS_RE = re.compile(r'[^\w\s,]')
+_ANY_DIGIT_RE = re.compile(r'\d')
+
+# Precompiled patterns for line-level extraction in _find_company_data_in_lines
+_WORD_RUNS_RE = re.compile(r'([A-Za-z]+(?:[,\s]+[A-Za-z]+)*)')
+_FUNCTION_RUNS_RE = re.compile(r'([A-Za-z&]+(?:[,\s]+[A-Za-z&]+)*)')
+_DECIMAL_RE = re.compile(r'\b(\d+(?:,\d+)*(?:\.\d+)?)\b')
+_INT_RE = re.compile(r'\b(\d+)\b')
+_INT2_RE = re.compile(r'\b(\d{2,})\b')
+_YES_LIST_RE = re.compile(r'Yes,([^~\?]+)')
+# A comma-separated run of Yes/No answers, as returned by the matrix prompts
+_YES_NO_RUN_RE = re.compile(r'\b(?:yes|no)\b(?:\s*,\s*(?:yes|no)\b)*', re.IGNORECASE)
+# Response lines holding '~', '?' and 'http' - candidates for the data~url?data~url answer line
+_FORMAT_LINE_RE = re.compile(r'^(?=[^\n]*~)(?=[^\n]*\?)(?=[^\n]*http)[^\n]+$', re.IGNORECASE | re.MULTILINE)
+
+
+# Cell values that mark a field as still to be fetched (after stripping)
+_PENDING_MARKERS = ('PARSING_FAILED', 'ALL_FAILED', 'N/A', '', '0', 'NA')
+
+
+def _is_pending(value) -> bool:
+    """True for a cell that is still empty or holds a failure marker"""
+    return pd.isna(value) or str(value).strip() in _PENDING_MARKERS
+
+# Shared by every company in an emergency result; callers only read it (and serialize it, so no mappingproxy)
+_EMERGENCY_RESULT = {'answer': "NA", 'url': '', 'source': 'EMERGENCY_DEFAULT'}
+
+
+# Field type codes indexing _CLEANERS/_VALIDATORS; fields without a type use _UNTYPED
+_TYPE_CODES = {'text_list': 0, 'number': 1, 'yes_no': 2, 'text_or_no': 3}
+_UNTYPED = 4
+_EMPTY_MARKERS = ('none', 'na', 'unknown', '0', 'nil')
+# The only digit-free strings float() accepts (after an optional sign)
+_FLOAT_WORDS = ('inf', 'infinity', 'nan')
+
+
+def _clean_text_list(cleaned: str) -> str:
+    items = [item.strip() for item in cleaned.split(',') if item.strip()]
+    if not items or cleaned.lower() in _EMPTY_MARKERS:
+        return "NA"
+    return ','.join(items)
+
+
+def _clean_number(cleaned: str) -> str:
+    # First number with commas removed
+    number = first_number(cleaned)
+    if number is None:
+        return "NA"
+    return "NA" if float(number) == 0 else number
+
+
+def _clean_yes_no(cleaned: str) -> str:
+    return ("NA", "No", "Yes")[yes_no_code(cleaned) + 1]
+
+
+def _clean_text_or_no(cleaned: str) -> str:
+    lowered = cleaned.lower()
+    if lowered == 'no':
+        return "No"
+    elif cleaned and lowered not in _EMPTY_MARKERS:
+        return cleaned
+    return "NA"
+
+
+def _clean_untyped(cleaned: str) -> str:
+    return cleaned if cleaned else "NA"
+
+
+def _valid_number(data: str) -> bool:
+    data = data.replace(',', '')
+    # Reject text answers without raising - float() needs a digit unless it's inf/nan
+    if not _ANY_DIGIT_RE.search(data) and data.strip().lstrip('+-').lower() not in _FLOAT_WORDS:
+        return False
+    try:
+        float(data)
+        return True
+    except ValueError:
+        return False
+
+
+def _valid_text_list(data: str) -> bool:
+    return any(item.strip() for item in data.split(','))
+
+
+def _valid_yes_no(data: str) -> bool:
+    return data in ('Yes', 'No')
+
+
+def _valid_text_or_no(data: str) -> bool:
+    return data == 'No' or len(data.strip()) > 0
+
+
+def _valid_untyped(data: str) -> bool:
+    return True
+
+
+_CLEANERS = (_clean_text_list, _clean_number, _clean_yes_no, _clean_text_or_no, _clean_untyped)
+_VALIDATORS = (_valid_text_list, _valid_number, _valid_yes_no, _valid_text_or_no, _valid_untyped)
+
+
+# Both are pure in (data, type_id); saves push the same few values ('NA', 'Yes', repeated numbers) through them
+# for every row, so results are memoized
+@lru_cache(maxsize=65536)
+def clean_by_type(data: str, type_id: int) -> str:
+    """Clean a value with the cleaner for a field type code"""
+    if not data or data.strip() == "":
+        return "NA"
+    return _CLEANERS[type_id](_UNSAFE_CHARS_RE.sub('', data).strip())
+
+
+@lru_cache(maxsize=65536)
+def validate_by_type(data: str, type_id: int) -> bool:
+    """Validate a cleaned value with the validator for a field type code"""
+    if data == "NA":
+        return True
+    return _VALIDATORS[type_id](data)
+
+
+# Final per-field cleanup applied by clean_response_by_field after citations and extra whitespace are removed
+def _final_count(response: str) -> str:
+    match = _DIGITS_RE.search(response)
+    if not match or match.group(0) == "0":
+        return "NA"
+    return match.group(0)
+
+
+def _final_locations(response: str) -> str:
+    if response.lower() in ('none', 'unknown', 'na', '0'):
+        return "NA"
+    cleaned = _LOCATION_CHARS_RE.sub('', response)
+    return cleaned.strip() if cleaned else "NA"
+
+
+def _final_default(response: str) -> str:
+    return response if response else "NA"
+
+
+_FINAL_CLEANERS = {
+    'global_gcc_units': _final_count,
+    'global_gcc_headcount': _final_count,
+    'india_gcc_units': _final_count,
+    'global_gcc_locations': _final_locations,
+}
+
+
+def parse_response_pairs(text: str) -> List[Tuple[str, Optional[str]]]:
+    """Split a data~url?data~url line into positional (data, url) pairs; url is None when '~' is missing"""
+    pairs = []
+    for segment in text.split('?'):
+        data, sep, url = segment.strip().partition('~')
+        pairs.append((data.strip(), url.strip() if sep else None))
+    return pairs
+
+
+
+# Line extractors for _find_company_data_in_lines: (line, line_lower) -> answer, or None to keep scanning
+_INDIAN_CITIES = ('bangalore', 'hyderabad', 'pune', 'chennai', 'mumbai', 'delhi', 'gurgaon', 'noida')
+_COMMON_COUNTRIES = ('India', 'USA', 'Philippines', 'Poland', 'China', 'Mexico', 'Canada', 'UK', 'Germany', 'Brazil', 'Argentina')
+# Whole words only, so 'Indianapolis' or 'Ukraine' don't count as India or the UK
+_COUNTRIES_RE = re.compile(r'\b(' + '|'.join(_COMMON_COUNTRIES) + r')\b', re.IGNORECASE)
+_COUNTRY_CANON = {country.lower(): country for country in _COMMON_COUNTRIES}
+
+
+def _line_yes_no(line: str, line_lower: str) -> Optional[str]:
+    if 'yes' in line_lower:
+        return 'Yes'
+    return 'No' if 'no' in line_lower else None
+
+
+def _first_match(pattern, india_only: bool = False):
+    def extract(line: str, line_lower: str) -> Optional[str]:
+        if india_only and 'india' not in line_lower:
+            return None
+        match = pattern.search(line)
+        return match.group(1) if match else None
+    return extract
+
+
+def _joined_matches(line: str, pattern) -> Optional[str]:
+    matches = pattern.findall(line)
+    return ','.join(matches) if matches else None
+
+
+def _line_countries(line: str, line_lower: str) -> Optional[str]:
+    # Canonical spellings in order of first mention, without repeats
+    countries = dict.fromkeys(_COUNTRY_CANON[match.lower()] for match in _COUNTRIES_RE.findall(line))
+    return ','.join(countries) if countries else None
+
+
+def _line_indian_cities(line: str, line_lower: str) -> Optional[str]:
+    cities = [city for city in _INDIAN_CITIES if city in line_lower]
+    return ','.join(cities) if cities else None
+
+
+def _city_extractor(city: str):
+    def extract(line: str, line_lower: str) -> Optional[str]:
+        if city in line_lower:
+            return _line_yes_no(line, line_lower)
+        if city == 'others':
+            cities = _YES_LIST_RE.findall(line)
+            if cities:
+                return cities[0].strip()
+            return 'No' if 'no' in line_lower else None
+        return None
+    return extract
+
+
+def _matrix_extractor(size: int):
+    def extract(line: str, line_lower: str) -> Optional[str]:
+        # The first run with one answer per column; shorter runs are prose, not the list
+        for match in _YES_NO_RUN_RE.finditer(line_lower):
+            values = [value.strip() for value in match.group(0).split(',')]
+            if len(values) == size:
+                return ','.join(value.capitalize() for value in values)
+        return None
+    return extract
+
+
+def _function_extractor(function: str):
+    def extract(line: str, line_lower: str) -> Optional[str]:
+        answer = _line_yes_no(line, line_lower)
+        if answer and function == 'others':
+            functions = _YES_LIST_RE.findall(line)
+            if functions:
+                answer = functions[0].strip()
+        return answer
+    return extract
+
+
+FIELD_HANDLERS: Dict[str, Callable[[str, str], Optional[str]]] = {
+    # Basic company information
+    'industries': lambda line, line_lower: _joined_matches(line, _WORD_RUNS_RE),
+    'revenue': _first_match(_DECIMAL_RE),
+    'gbs': _line_yes_no,
+    # Global GCC information
+    'global_gcc_units': _first_match(_INT_RE),
+    'global_gcc_locations': _line_countries,
+    'global_gcc_headcount': _first_match(_INT2_RE),
+    # India-specific information
+    'india_gcc_units': _first_match(_INT_RE, india_only=True),
+    'total_india_headcount': _first_match(_INT2_RE, india_only=True),
+    'gcc_locations_india': _line_indian_cities,
+    # Function counts
+    'total_functions': _first_match(_INT_RE),
+    'gcc_functions': lambda line, line_lower: _joined_matches(line, _FUNCTION_RUNS_RE),
+    # Combined Yes/No matrices
+    'city_matrix': _matrix_extractor(len(MATRIX_FIELDS['city_matrix'])),
+    'function_matrix': _matrix_extractor(len(MATRIX_FIELDS['function_matrix'])),
+}
+
+
+@lru_cache(maxsize=4096)
+def company_variations(company: str) -> Tuple[str, ...]:
+    """Lowercase spellings of a company that count as a mention (shorter than 3 chars are ignored)"""
+    lowered = company.lower()
+    variations = (
+        lowered,
+        lowered.replace(',', '').replace('inc', '').replace('.', '').strip(),
+        company.split()[0].lower() if company.split() else lowered,
+    )
+    return tuple(var for var in variations if len(var) > 2)
+
+
+@lru_cache(maxsize=4096)
+def _company_pattern(company: str):
+    """Compiled alternation of a company's variations, or None if it has none"""
+    variations = company_variations(company)
+    return re.compile('|'.join(map(re.escape, variations))) if variations else None
+
+
+def company_mentions(lines_lower: List[str], companies: List[str]) -> List[List[int]]:
+    """For each company, the indices of the lowercased lines that mention it, in line order"""
+    mentions = [[] for _ in companies]
+    if ahocorasick is not None:
+        automaton = ahocorasick.Automaton()
+        owners = {}
+        for idx, company in enumerate(companies):
+            for var in company_variations(company):
+                owners.setdefault(var, set()).add(idx)
+        if not owners:
+            return mentions
+        for var, idxs in owners.items():
+            automaton.add_word(var, tuple(idxs))
+        automaton.make_automaton()
+        
+        for line_idx, line_lower in enumerate(lines_lower):
+            hits = set()
+            for _, idxs in automaton.iter(line_lower):
+                hits.update(idxs)
+            for idx in hits:
+                mentions[idx].append(line_idx)
+        return mentions
+    
+    for idx, company in enumerate(companies):
+        pattern = _company_pattern(company)
+        if pattern is None:
+            continue
+        mentions[idx] = [line_idx for line_idx, line_lower in enumerate(lines_lower) if pattern.search(line_lower)]
+    return mentions
+
+
+@lru_cache(maxsize=None)
+def field_handler(field_name: str) -> Optional[Callable[[str, str], Optional[str]]]:
+    """Line extractor for a field; other city_* and function_* fields are matched by prefix"""
+    if field_name in FIELD_HANDLERS:
+        return FIELD_HANDLERS[field_name]
+    if field_name.startswith('city_'):
+        return _city_extractor(field_name.replace('city_', '').replace('_', ' '))
+    if field_name.startswith('function_'):
+        return _function_extractor(field_name.replace('function_', '').replace('_', ' '))
+    return None
+
+# Echoed prompt fragments that mark a response as the instructions rather than an answer
+_INSTRUCTION_PHRASES = ('return the answer', 'provide the', 'do not provide')
+
+
+# CDP events that mark activity on the answer stream
+_STREAM_EVENT_METHODS = (
+    '"Network.dataReceived"',
+    '"Network.eventSourceMessageReceived"',
+    '"Network.loadingFinished"',
+    '"Network.webSocketFrameReceived"',
+)
+
+_ZOOM_JS = "document.body.style.zoom='100%'"
+_STEALTH_JS = "Object.defineProperty(navigator, 'webdriver', {get: () => undefined})"
+
+
+@lru_cache(maxsize=1)
+def _chrome_options(debug_port: int) -> Options:
+    """Chrome options for attaching to the debug session, built once per port"""
+    chrome_options = Options()
+    chrome_options.add_experimental_option("debuggerAddress", f"127.0.0.1:{debug_port}")
+    
+    # FINAL: Only compatible options - no deprecated ones
+    chrome_options.add_argument("--no-sandbox")
+    chrome_options.add_argument("--disable-dev-shm-usage")
+    chrome_options.add_argument("--disable-web-security")
+    chrome_options.add_argument("--disable-blink-features=AutomationControlled")
+    chrome_options.add_argument("--disable-extensions")
+    chrome_options.add_argument("--disable-gpu")
+    chrome_options.add_argument("--disable-logging")
+    chrome_options.add_argument("--no-first-run")
+    chrome_options.add_argument("--no-default-browser-check")
+    chrome_options.add_argument("--disable-background-timer-throttling")
+    chrome_options.add_argument("--disable-backgrounding-occluded-windows")
+    
+    # Expose CDP network events through the performance log
+    chrome_options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
+    return chrome_options
+
+
+# Returns the raw text of the first response container with more than 20 characters, or ''
+_RAW_RESPONSE_JS = """
+const selectors = [
+    '.prose',
+    'article',
+    'main',
+    '[data-testid="response"]',
+    '.answer',
+    "//div[contains(@class, 'prose')]",
+    "//article",
+    "//main",
+    "//div[contains(@data-testid, 'response')]"
+];
+for (const sel of selectors) {
+    let el = null;
+    try {
+        el = sel.startsWith('//')
+            ? document.evaluate(sel, document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue
+            : document.querySelector(sel);
+    } catch (e) {
+        continue;
+    }
+    const text = el ? el.innerText : '';
+    if (text && text.length > 20) {
+        return text;
+    }
+}
+return '';
+"""
+
+# Same container with navigation chrome and echoed instructions stripped; only run on settled responses
+_RESPONSE_TEXT_JS = "const raw = (() => {" + _RAW_RESPONSE_JS + """})();
+return raw
+    .replace(/HomeFinanceTravelAcademic/g, '')
+    .replace(/Provide the[\\s\\S]*?following format:/g, '')
+    .replace(/Return the answer[\\s\\S]*?explanation\\./g, '')
+    .trim();
+"""
+
+# Stamps window.__lastMutate and bumps window.__mutations whenever the response container (or an ancestor
+# being inserted) changes
+_OBSERVER_INSTALL_JS = """
+window.__lastMutate = Date.now();
+window.__mutations = 0;
+window.__respObserver = new MutationObserver((records) => {
+    const el = document.querySelector('.prose') || document.querySelector('article');
+    if (!el) {
+        return;
+    }
+    for (const r of records) {
+        if (el.contains(r.target) || Array.from(r.addedNodes).some(n => n.contains && n.contains(el))) {
+            window.__lastMutate = Date.now();
+            window.__mutations++;
+            return;
+        }
+    }
+});
+window.__respObserver.observe(document.body, {subtree: true, childList: true, characterData: true});
+"""
+
+# Restarts the mutation clock for a new query
+_RESET_OBSERVER_JS = """
+if (window.__respObserver) {
+    window.__respObserver.disconnect();
+}
+""" + _OBSERVER_INSTALL_JS
+
+# Returns [raw response length, ms since the response last mutated, mutation count] without shipping or
+# cleaning the text; reinstalls the observer after navigation
+_RESPONSE_PROBE_JS = (
+    "if (!window.__respObserver) {" + _OBSERVER_INSTALL_JS + "}\n"
+    "const text = (() => {" + _RAW_RESPONSE_JS + "})();\n"
+    "return [text.length, Date.now() - window.__lastMutate, window.__mutations];"
+)
+
+# True once the current (not the navigated-away-from) document has loaded and no resource fetch is pending
+_DOC_READY_JS = """
+return !window.__gccStale && document.readyState === 'complete' &&
+    performance.getEntriesByType('resource').filter(r => !r.responseEnd).length === 0;
+"""
+
+# Flags the current document before a script navigation so readiness isn't read from the old page
+_RESET_LOCATION_JS = "window.__gccStale = true; window.location.href = 'https://www.perplexity.ai';"
+
+# Replaces a textarea/input value through the native setter so React sees the input event; returns the new
+# value, or null for contenteditable editors that need real input events
+_SET_INPUT_JS = """
+const el = arguments[0];
+if (el.isContentEditable || el.value === undefined) {
+    return null;
+}
+const proto = el instanceof HTMLTextAreaElement ? HTMLTextAreaElement.prototype : HTMLInputElement.prototype;
+el.focus();
+Object.getOwnPropertyDescriptor(proto, 'value').set.call(el, arguments[1]);
+el.dispatchEvent(new Event('input', {bubbles: true}));
+return el.value;
+"""
+
+# Scrolls arguments[0] into view only if it is outside the viewport, then clicks it
+_SCROLL_CLICK_JS = """
+const el = arguments[0];
+const rect = el.getBoundingClientRect();
+if (rect.top < 0 || rect.bottom > window.innerHeight) {
+    el.scrollIntoView({block: 'center'});
+}
+el.click();
+return true;
+"""
+
+# Focuses arguments[0] and selects its whole contents so the next text insertion replaces them
+_FOCUS_SELECT_JS = """
+const el = arguments[0];
+el.focus();
+if (el.select) {
+    el.select();
+} else {
+    const range = document.createRange();
+    range.selectNodeContents(el);
+    const selection = window.getSelection();
+    selection.removeAllRanges();
+    selection.addRange(range);
+}
+"""
+
+# Returns the first visible, enabled element matched by arguments[0] (XPath or CSS selectors), or null
+_FIRST_CLICKABLE_JS = """
+for (const sel of arguments[0]) {
+    let el = null;
+    try {
+        el = (sel.startsWith('//') || sel.startsWith('('))
+            ? document.evaluate(sel, document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue
+            : document.querySelector(sel);
+    } catch (e) {
+        continue;
+    }
+    if (el && el.getClientRects().length && !el.disabled) {
+        return el;
+    }
+}
+return null;
+"""
+
+
 class FinalPerfectGCCExtractor:
     """
     Final Perfect GCC Extractor - Ultra-fast input with patient response waiting
@@ -41,11 +755,23 @@ class FinalPerfectGCCExtractor:
         self.backup_dir.mkdir(exist_ok=True)
         
         # Thread safety
-        self.db_lock = Lock()
+        self._write_lock = Lock()
         self.save_lock = Lock()
-        self.counter_lock = Lock()
         self.shutdown_event = Event()
         
+        # Single background thread for workbook saves and progress flushes
+        self._io_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix='gcc-io')
+        self._io_state_lock = Lock()
+        self._pending_save = None
+        self._queued_save = None
+        
+        # Rows written since their output cells were last finalized, and the finalized (value, url) cache
+        self._dirty_rows = set()
+        self._finalized_rows = {}
+        
+        # Stripped company name -> first row position, built when the input frame is loaded
+        self._company_index = None
+        
         # Ensure solutions.xlsx exists
         self.ensure_solutions_file_exists()
         
@@ -60,23 +786,50 @@ class FinalPerfectGCCExtractor:
         
         # Database setup
         self.db_file = f'final_progress_{datetime.now().strftime("%Y%m%d_%H%M%S")}.db'
+        self._pending_rows = []  # Progress rows waiting for the next batched write
+        self.progress_flush_rows = 10
         self.setup_database()
         
         # FINAL OPTIMIZED Configuration
         self.batch_size = 3
+        self.save_interval = 30  # Seconds between full workbook saves
+        self.save_every_batches = 5  # ...or after this many unsaved batches
         self.max_retries = 3
+        self.base_delay = 1.0  # Retry backoff: base_delay * 2**attempt, capped at max_delay, plus up to jitter_frac
+        self.max_delay = 30.0
+        self.jitter_frac = 0.5
         self.response_timeout = 120  # Extended for complete generation
         self.stability_checks = 4
         self.max_stability_checks = 8
         self.check_interval = 2
+        self.network_idle_threshold = 1.5  # Seconds without streaming traffic before a response counts as done
+        self.response_poll_interval = 0.25  # Each poll is a single script call reading observer state
+        self.dom_quiet_ms = 2000  # Milliseconds without DOM mutations before a response counts as settled
+        self._last_network_ts = 0.0
+        self._network_seen = False
         self.element_retry_attempts = 5
         self.conversation_start_timeout = 15  # Ultra-fast
         
         # State management
         self.session_id = self.generate_session_id()
-        self.query_counter = 0
+        self._query_counter = itertools.count(1)  # next() is atomic under the GIL
         self.successful_extractions = 0
         self.failed_extractions = 0
+        self._stats_lock = Lock()
+        
+        # Concurrent batches, one browser tab each; the driver drives one tab at a time, so every
+        # Selenium step runs under _tab_lock after switching to the calling thread's tab
+        self.parallel_tabs = 1
+        # Gap between sends on a tab: a quarter of the median recent response time, clamped to
+        # [min_batch_pause, batch_pause] seconds and counted from the tab's last send
+        self.batch_pause = 8
+        self.min_batch_pause = 1.0
+        self._response_times = deque(maxlen=20)
+        self._tab_lock = RLock()
+        self._tab_local = local()
+        self._active_handle = None
+        self._last_save_ts = 0.0
+        self._unsaved_batches = 0
         
         # Column mapping - Exact Excel layout (C4 to AH4)
         self.column_mapping = {
@@ -144,6 +897,12 @@ class FinalPerfectGCCExtractor:
             'total_india_headcount': 'number'   # Employee count
         }
         
+        # Output columns as parallel tuples (struct-of-arrays) for the save loop
+        output_fields = [field for field in self.column_mapping if field != 'company_name']
+        self._field_names = tuple(output_fields)
+        self._field_cols = tuple(self.column_mapping[field] for field in output_fields)
+        self._field_type_ids = tuple(self._type_id(field) for field in output_fields)
+        
         # FIELDS TO PROCESS in exact Excel column order (C4 to AH4)
         self.fields_to_process = [
             'industries',                  # C4 - Industries
@@ -154,23 +913,11 @@ class FinalPerfectGCCExtractor:
             'global_gcc_headcount',       # H4 - Global GCC Headcount
             'india_gcc_units',            # I4 - Total GCC Units India
             'gcc_locations_india',        # J4 - GCC Locations in India
-            'city_bangalore',             # L4 - Bangalore
-            'city_hyderabad',            # M4 - Hyderabad
-            'city_pune',                  # N4 - Pune
-            'city_chennai',              # O4 - Chennai
-            'city_mumbai',               # P4 - Mumbai
-            'city_delhi_ncr',            # Q4 - Delhi NCR
+            'city_matrix',               # L4-Q4 - Bangalore .. Delhi NCR in one prompt
             'city_others',               # R4 - Others
             'total_functions',           # S4 - Total # of functions
             'gcc_functions',             # T4 - GCC Functions
-            'function_finance',          # V4 - Finance & Accounting
-            'function_hr',               # W4 - HR
-            'function_it',               # X4 - IT
-            'function_procurement',      # Y4 - Procurement
-            'function_operations',       # Z4 - Operations
-            'function_rd',               # AA4 - R&D
-            'function_technology',       # AB4 - Technology
-            'function_marketing',        # AC4 - Marketing & Sales
+            'function_matrix',           # V4-AC4 - Finance .. Marketing in one prompt
             'function_others',           # AD4 - Others
             'total_india_headcount'      # AE4 - Total GCC Headcount India
         ]
@@ -224,76 +971,13 @@ class FinalPerfectGCCExtractor:
             "//*[@contenteditable='true']"
         ]
         
+        # Wait conditions built once and reused by every poll
+        self._ec_doc_ready = lambda driver: self.shutdown_event.is_set() or driver.execute_script(_DOC_READY_JS)
+        self._ec_new_thread = self._first_clickable(self.new_thread_selectors)
+        self._ec_input = self._first_clickable(self.input_selectors)
+        
         # Query templates with SSON searches
-        self.unified_query_templates = {
-            # Basic company information
-            'industries': """List the primary industries or sectors that the following companies operate in: {companies}. Also search SSON sources. Return the answer in the following format, with each industry list and its most credible source URL separated by a tilde (~), and each pair separated by a question mark (?). Do not provide any additional text or explanation. Only provide the bare industry names and URLs in the format: Technology,Healthcare~url1?Retail~url2?Manufacturing,Automotive~url3""",
-
-            'revenue': """Provide the latest annual revenue (in millions) for the following companies: {companies}. Also search SSON sources. Return the answer in the following format, with each revenue figure and its most credible source URL separated by a tilde (~), and each pair separated by a question mark (?). Do not provide any additional text or explanation. Only provide the bare numbers and URLs in the format: 5000~url1?2300~url2?18000~url3""",
-
-            'gbs': """For each of these companies, indicate whether they have Global Business Services (GBS) or similar shared services operations (Yes/No): {companies}. Also search SSON sources. Return the answer in the following format, with each Yes/No answer and its most credible source URL separated by a tilde (~), and each pair separated by a question mark (?). Do not provide any additional text or explanation. Only provide Yes/No and URLs in the format: Yes~url1?No~url2?Yes~url3""",
-
-            # Global GCC information
-            'global_gcc_units': """Provide the total number of Global Capability Centers (GCC) or Global Business Services (GBS) centers worldwide for the following companies: {companies}. Also search SSON sources. Return the answer in the following format, with each count and its most credible source URL separated by a tilde (~), and each pair separated by a question mark (?). Do not provide any additional text or explanation. Only provide the bare count numbers and URLs in the format: 3~url1?0~url2?5~url3""",
-            
-            'global_gcc_locations': """Provide all countries/regions where the following companies have Global Capability Centers (GCC) or Global Business Services (GBS): {companies}. Also search SSON sources. Return the answer in the following format, with each location list and its most credible source URL separated by a tilde (~), and each pair separated by a question mark (?). Do not provide any additional text or explanation. Only provide the bare location lists and URLs in the format: India,USA,Philippines~url1?None~url2?Poland,India~url3""",
-
-            'global_gcc_headcount': """Provide the total headcount (number of employees) across ALL Global Capability Centers (GCC) or Global Business Services (GBS) worldwide for the following companies: {companies}. Also search SSON sources. Return the answer in the following format, with each headcount and its most credible source URL separated by a tilde (~), and each pair separated by a question mark (?). Do not provide any additional text or explanation. Only provide the bare headcount numbers and URLs in the format: 5000~url1?0~url2?12000~url3""",
-
-            # India-specific GCC information
-            'india_gcc_units': """Provide the number of Global Capability Centers (GCC) or Global Business Services (GBS) centers specifically located in India for the following companies: {companies}. Also search SSON sources. Return the answer in the following format, with each count and its most credible source URL separated by a tilde (~), and each pair separated by a question mark (?). Do not provide any additional text or explanation. Only provide the bare count numbers and URLs in the format: 2~url1?0~url2?1~url3""",
-
-            'gcc_locations_india': """List all the specific city locations where the following companies have Global Capability Centers (GCC) or Global Business Services (GBS) in India: {companies}. Also search SSON sources. Return the answer in the following format, with each city list and its most credible source URL separated by a tilde (~), and each pair separated by a question mark (?). Do not provide any additional text or explanation. Only provide the bare city names and URLs in the format: Bangalore,Chennai~url1?Mumbai,Pune~url2?Hyderabad,Delhi~url3""",
-
-            # City-specific presence
-            'city_bangalore': """Do the following companies have GCC/GBS operations in Bangalore/Bengaluru: {companies}? Also search SSON sources. Return the answer in the following format, with each Yes/No and its most credible source URL separated by a tilde (~), and each pair separated by a question mark (?). Do not provide any additional text or explanation. Only provide Yes/No and URLs in the format: Yes~url1?No~url2?Yes~url3""",
-            
-            'city_hyderabad': """Do the following companies have GCC/GBS operations in Hyderabad: {companies}? Also search SSON sources. Return the answer in the following format, with each Yes/No and its most credible source URL separated by a tilde (~), and each pair separated by a question mark (?). Do not provide any additional text or explanation. Only provide Yes/No and URLs in the format: Yes~url1?No~url2?Yes~url3""",
-            
-            'city_pune': """Do the following companies have GCC/GBS operations in Pune: {companies}? Also search SSON sources. Return the answer in the following format, with each Yes/No and its most credible source URL separated by a tilde (~), and each pair separated by a question mark (?). Do not provide any additional text or explanation. Only provide Yes/No and URLs in the format: Yes~url1?No~url2?Yes~url3""",
-            
-            'city_chennai': """Do the following companies have GCC/GBS operations in Chennai: {companies}? Also search SSON sources. Return the answer in the following format, with each Yes/No and its most credible source URL separated by a tilde (~), and each pair separated by a question mark (?). Do not provide any additional text or explanation. Only provide Yes/No and URLs in the format: Yes~url1?No~url2?Yes~url3""",
-            
-            'city_mumbai': """Do the following companies have GCC/GBS operations in Mumbai: {companies}? Also search SSON sources. Return the answer in the following format, with each Yes/No and its most credible source URL separated by a tilde (~), and each pair separated by a question mark (?). Do not provide any additional text or explanation. Only provide Yes/No and URLs in the format: Yes~url1?No~url2?Yes~url3""",
-            
-            'city_delhi_ncr': """Do the following companies have GCC/GBS operations in Delhi NCR (including Gurgaon/Noida): {companies}? Also search SSON sources. Return the answer in the following format, with each Yes/No and its most credible source URL separated by a tilde (~), and each pair separated by a question mark (?). Do not provide any additional text or explanation. Only provide Yes/No and URLs in the format: Yes~url1?No~url2?Yes~url3""",
-            
-            'city_others': """Do the following companies have GCC/GBS operations in any other Indian cities besides the major ones (Bangalore, Hyderabad, Pune, Chennai, Mumbai, Delhi NCR): {companies}? Also search SSON sources. Return the answer in the following format, with each Yes/No and city names (if Yes) and its most credible source URL separated by a tilde (~), and each pair separated by a question mark (?). Do not provide any additional text or explanation. Only provide the answer in format: No~url1?Yes,Kolkata~url2?Yes,Coimbatore~url3""",
-
-            # Function information
-            'total_functions': """Provide the total number of unique functions (e.g., IT, Finance, HR) performed at the GCC/GBS centers of the following companies: {companies}. Also search SSON sources. Return the answer in the following format, with each count and its most credible source URL separated by a tilde (~), and each pair separated by a question mark (?). Do not provide any additional text or explanation. Only provide the bare numbers and URLs in the format: 5~url1?3~url2?7~url3""",
-
-            'gcc_functions': """List all the functions performed at the GCC/GBS centers of the following companies: {companies}. Also search SSON sources. Return the answer in the following format, with each function list and its most credible source URL separated by a tilde (~), and each pair separated by a question mark (?). Do not provide any additional text or explanation. Only provide the function names in the format: Finance,IT,HR~url1?IT,Operations~url2?Finance,HR,Technology~url3""",
-
-            # Individual functions
-            'function_finance': """Do these companies' GCC/GBS centers perform Finance & Accounting functions: {companies}? Also search SSON sources. Return the answer in the following format, with each Yes/No and its most credible source URL separated by a tilde (~), and each pair separated by a question mark (?). Do not provide any additional text or explanation. Only provide Yes/No and URLs in the format: Yes~url1?No~url2?Yes~url3""",
-            
-            'function_hr': """Do these companies' GCC/GBS centers perform HR functions: {companies}? Also search SSON sources. Return the answer in the following format, with each Yes/No and its most credible source URL separated by a tilde (~), and each pair separated by a question mark (?). Do not provide any additional text or explanation. Only provide Yes/No and URLs in the format: Yes~url1?No~url2?Yes~url3""",
-            
-            'function_it': """Do these companies' GCC/GBS centers perform IT functions: {companies}? Also search SSON sources. Return the answer in the following format, with each Yes/No and its most credible source URL separated by a tilde (~), and each pair separated by a question mark (?). Do not provide any additional text or explanation. Only provide Yes/No and URLs in the format: Yes~url1?No~url2?Yes~url3""",
-            
-            'function_procurement': """Do these companies' GCC/GBS centers perform Procurement functions: {companies}? Also search SSON sources. Return the answer in the following format, with each Yes/No and its most credible source URL separated by a tilde (~), and each pair separated by a question mark (?). Do not provide any additional text or explanation. Only provide Yes/No and URLs in the format: Yes~url1?No~url2?Yes~url3""",
-            
-            'function_operations': """Do these companies' GCC/GBS centers perform Operations functions: {companies}? Also search SSON sources. Return the answer in the following format, with each Yes/No and its most credible source URL separated by a tilde (~), and each pair separated by a question mark (?). Do not provide any additional text or explanation. Only provide Yes/No and URLs in the format: Yes~url1?No~url2?Yes~url3""",
-            
-            'function_rd': """Do these companies' GCC/GBS centers perform R&D functions: {companies}? Also search SSON sources. Return the answer in the following format, with each Yes/No and its most credible source URL separated by a tilde (~), and each pair separated by a question mark (?). Do not provide any additional text or explanation. Only provide Yes/No and URLs in the format: Yes~url1?No~url2?Yes~url3""",
-            
-            'function_technology': """Do these companies' GCC/GBS centers perform Technology functions: {companies}? Also search SSON sources. Return the answer in the following format, with each Yes/No and its most credible source URL separated by a tilde (~), and each pair separated by a question mark (?). Do not provide any additional text or explanation. Only provide Yes/No and URLs in the format: Yes~url1?No~url2?Yes~url3""",
-            
-            'function_marketing': """Do these companies' GCC/GBS centers perform Marketing & Sales functions: {companies}? Also search SSON sources. Return the answer in the following format, with each Yes/No and its most credible source URL separated by a tilde (~), and each pair separated by a question mark (?). Do not provide any additional text or explanation. Only provide Yes/No and URLs in the format: Yes~url1?No~url2?Yes~url3""",
-            
-            'function_others': """Do these companies' GCC/GBS centers perform any other functions besides the standard ones (Finance, HR, IT, Procurement, Operations, R&D, Technology, Marketing): {companies}? Also search SSON sources. Return the answer in the following format, with each Yes/No and function names (if Yes) and its most credible source URL separated by a tilde (~), and each pair separated by a question mark (?). Do not provide any additional text or explanation. Only provide the answer in format: No~url1?Yes,Analytics~url2?Yes,Legal~url3""",
-
-            # India headcount
-            'total_india_headcount': """What is the total employee headcount in Indian GCC/GBS centers for the following companies: {companies}. Also search SSON sources. Return the answer in the following format, with each headcount and its most credible source URL separated by a tilde (~), and each pair separated by a question mark (?). Do not provide any additional text or explanation. Only provide the bare numbers and URLs in the format: 3000~url1?0~url2?8500~url3""",
-
-            # Adding missing query templates
-            'revenue': "Provide the revenue in millions for the following companies: {companies}. Return the answer in the format: revenue~url",
-            'gbs': "Indicate whether the following companies have GBS (Global Business Services): {companies}. Return the answer in the format: Yes/No~url",
-            'city_specific': "Provide the presence of GCCs in the following cities for the companies: {companies}. Return the answer in the format: city~url",
-            'functions': "List the functions (e.g., Finance, HR, IT) for the following companies: {companies}. Return the answer in the format: function~url",
-            'remarks': "Provide any additional remarks for the following companies: {companies}. Return the answer in the format: remark~url"
-        }
+        self.unified_query_templates = UNIFIED_QUERY_TEMPLATES
         
         signal.signal(signal.SIGINT, self.signal_handler)
         self.logger.info(f"FINAL PERFECT GCC EXTRACTOR INITIALIZED - Session: {self.session_id}")
@@ -303,13 +987,31 @@ class FinalPerfectGCCExtractor:
         if not os.path.exists(self.input_file):
             if os.path.exists(self.template_file):
                 print(f"Creating {self.input_file} from {self.template_file}")
-                shutil.copy2(self.template_file, self.input_file)
+                self._clone_file(self.template_file, self.input_file)
                 print(f"{self.input_file} created successfully")
             else:
                 raise FileNotFoundError(f"Neither {self.input_file} nor {self.template_file} found!")
         else:
             print(f"Found existing {self.input_file}")
 
+    def _clone_file(self, src, dst):
+        """Copy src to dst in-kernel (reflink where the filesystem supports it), falling back to shutil"""
+        if hasattr(os, 'copy_file_range'):
+            try:
+                with open(src, 'rb') as fsrc, open(dst, 'wb') as fdst:
+                    remaining = os.fstat(fsrc.fileno()).st_size
+                    while remaining > 0:
+                        copied = os.copy_file_range(fsrc.fileno(), fdst.fileno(), remaining)
+                        if copied == 0:
+                            break
+                        remaining -= copied
+                if remaining == 0:
+                    shutil.copystat(src, dst)
+                    return
+            except OSError:
+                pass
+        shutil.copy2(src, dst)
+
     def setup_logging(self):
         """Setup comprehensive logging"""
         logs_dir = Path('storage') / 'logs'
@@ -317,26 +1019,44 @@ class FinalPerfectGCCExtractor:
         
         log_path = logs_dir / self.log_file
         
-        logging.basicConfig(
-            level=logging.INFO,
-            format='%(asctime)s - %(levelname)s - %(message)s',
-            handlers=[
-                logging.FileHandler(log_path, encoding='utf-8'),
-                logging.StreamHandler(sys.stdout)
-            ]
-        )
+        # Callers only enqueue records; file and console writes happen on the listener thread
+        formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
+        file_handler = logging.FileHandler(log_path, encoding='utf-8')
+        file_handler.setFormatter(formatter)
+        stream_handler = logging.StreamHandler(sys.stdout)
+        stream_handler.setFormatter(formatter)
+        
+        log_queue = queue.SimpleQueue()
+        queue_handler = QueueHandler(log_queue)
+        queue_handler.setFormatter(logging.Formatter('%(message)s'))
+        self.log_listener = QueueListener(log_queue, file_handler, stream_handler)
+        self.log_listener.start()
+        
+        logging.basicConfig(level=logging.INFO, handlers=[queue_handler])
         
         self.logger = logging.getLogger('FinalPerfectGCCExtractor')
         self.parse_logger = logging.getLogger('FinalParseLogger')
         self.error_logger = logging.getLogger('FinalErrorLogger')
 
+    def stop_logging(self):
+        """Drain queued log records and stop the listener thread"""
+        listener = getattr(self, 'log_listener', None)
+        if listener is not None:
+            self.log_listener = None
+            listener.stop()
+
     def setup_database(self):
         """Setup progress tracking database"""
         try:
-            self.conn = sqlite3.connect(self.db_file, check_same_thread=False)
-            self.conn.execute("PRAGMA journal_mode=WAL")
-            
-            cursor = self.conn.cursor()
+            self._write_conn = sqlite3.connect(self.db_file, check_same_thread=False, isolation_level=None)
+            self._write_conn.execute("PRAGMA journal_mode=WAL")
+            self._write_conn.execute("PRAGMA synchronous=NORMAL")
+            self._write_conn.execute("PRAGMA temp_store=MEMORY")
+            self._write_conn.execute("PRAGMA mmap_size=268435456")
+            self._write_conn.execute("PRAGMA cache_size=-65536")
+            self._write_conn.execute("PRAGMA wal_autocheckpoint=1000")
+            
+            cursor = self._write_conn.cursor()
             cursor.execute('''
                 CREATE TABLE IF NOT EXISTS final_gcc_progress (
                     id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -354,12 +1074,46 @@ class FinalPerfectGCCExtractor:
                 )
             ''')
             
-            self.conn.commit()
             self.logger.info("Final Perfect GCC database initialized")
             
         except Exception as e:
             self.error_logger.error(f"Database setup failed: {str(e)}")
 
+    def _queue_progress(self, row: Tuple):
+        """Queue a progress row, flushing once enough rows are pending"""
+        with self._write_lock:
+            self._pending_rows.append(row)
+            should_flush = len(self._pending_rows) >= self.progress_flush_rows
+        if should_flush:
+            self._submit_io(self._flush_progress)
+
+    def _flush_progress(self):
+        """Write all pending progress rows in a single transaction"""
+        with self._write_lock:
+            if not self._pending_rows:
+                return
+            try:
+                self._write_conn.execute("BEGIN IMMEDIATE")
+                self._write_conn.executemany('''
+                    INSERT OR REPLACE INTO final_gcc_progress 
+                    (session_id, query_id, timestamp, field_name, companies, query_text,
+                     response_text, response_type, parsed_data, success, conversation_url)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ''', self._pending_rows)
+                self._write_conn.execute("COMMIT")
+                self._pending_rows.clear()
+            except Exception as e:
+                if self._write_conn.in_transaction:
+                    self._write_conn.execute("ROLLBACK")
+                self.error_logger.error(f"Progress flush failed: {str(e)}")
+
+    def close_database(self):
+        """Flush pending progress and close the database connection"""
+        if getattr(self, '_write_conn', None):
+            self._flush_progress()
+            self._write_conn.close()
+            self._write_conn = None
+
     def generate_session_id(self) -> str:
         """Generate unique session ID"""
         timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
@@ -367,19 +1121,19 @@ class FinalPerfectGCCExtractor:
 
     def generate_query_id(self) -> str:
         """Generate unique query ID"""
-        with self.counter_lock:
-            self.query_counter += 1
-            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S_%f')[:-3]
-            return f"FPGCCQ{self.query_counter:04d}_{timestamp}_{str(uuid.uuid4())[:8].upper()}"
+        timestamp = time.time_ns()
+        suffix = uuid.uuid4().hex[:8].upper()
+        return f"FPGCCQ{next(self._query_counter):04d}_{timestamp}_{suffix}"
 
     def signal_handler(self, sig, frame):
         """Handle interrupt signals gracefully"""
         self.logger.info("Interrupt received - saving progress...")
         self.shutdown_event.set()
+        self._drain_io()
         if hasattr(self, 'current_df'):
             self.save_with_hyperlinks(self.current_df, "Emergency save")
-        if self.conn:
-            self.conn.close()
+        self.close_database()
+        self.stop_logging()
         sys.exit(0)
 
     def connect_to_existing_debug_session(self):
@@ -387,28 +1141,19 @@ class FinalPerfectGCCExtractor:
         try:
             self.logger.info("Initializing Chrome debug session connection...")
             
-            chrome_options = Options()
-            chrome_options.add_experimental_option("debuggerAddress", f"127.0.0.1:{self.debug_port}")
-            
-            # FINAL: Only compatible options - no deprecated ones
-            chrome_options.add_argument("--no-sandbox")
-            chrome_options.add_argument("--disable-dev-shm-usage")
-            chrome_options.add_argument("--disable-web-security")
-            chrome_options.add_argument("--disable-blink-features=AutomationControlled")
-            chrome_options.add_argument("--disable-extensions")
-            chrome_options.add_argument("--disable-gpu")
-            chrome_options.add_argument("--disable-logging")
-            chrome_options.add_argument("--no-first-run")
-            chrome_options.add_argument("--no-default-browser-check")
-            chrome_options.add_argument("--disable-background-timer-throttling")
-            chrome_options.add_argument("--disable-backgrounding-occluded-windows")
+            chrome_options = _chrome_options(self.debug_port)
             
             # Use Selenium's automatic ChromeDriver management
             self.driver = webdriver.Chrome(options=chrome_options)
             
+            try:
+                self.driver.execute_cdp_cmd("Network.enable", {})
+            except Exception as e:
+                self.logger.warning(f"CDP network events unavailable, using DOM polling only: {str(e)}")
+            
             # Additional browser setup
-            self.driver.execute_script("document.body.style.zoom='100%'")
-            self.driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
+            self.driver.execute_script(_ZOOM_JS)
+            self.driver.execute_script(_STEALTH_JS)
             
             self.wait = WebDriverWait(self.driver, 30)
             
@@ -422,44 +1167,33 @@ class FinalPerfectGCCExtractor:
     def instant_click(self, element):
         """ULTRA-FAST: Instant click with no delays"""
         try:
-            # Immediate scroll and click
-            self.driver.execute_script("arguments[0].scrollIntoView(true);", element)
-            element.click()
-            return True
+            # Scroll only when off-screen, then click - one round trip
+            return bool(self.driver.execute_script(_SCROLL_CLICK_JS, element))
         except:
-            try:
-                # JavaScript fallback - instant
-                self.driver.execute_script("arguments[0].click();", element)
+            return False
+
+    def _first_clickable(self, selectors):
+        """Build a wait condition resolving the first clickable selector match in one round trip"""
+        def first_match(driver):
+            if self.shutdown_event.is_set():
                 return True
-            except:
-                return False
+            return driver.execute_script(_FIRST_CLICKABLE_JS, selectors)
+        return first_match
 
-    def find_element_ultra_fast(self, selectors, timeout=5):
-        """ULTRA-FAST: Quick element finding"""
-        for selector in selectors:
-            try:
-                if self.shutdown_event.is_set():
-                    return None
-                
-                if selector.startswith('//') or selector.startswith('('):
-                    element = WebDriverWait(self.driver, timeout).until(
-                        EC.element_to_be_clickable((By.XPATH, selector))
-                    )
-                else:
-                    element = WebDriverWait(self.driver, timeout).until(
-                        EC.element_to_be_clickable((By.CSS_SELECTOR, selector))
-                    )
-                
-                if element.is_displayed() and element.is_enabled():
-                    self.logger.info(f"Ultra-fast element found: {selector}")
-                    return element
-                
-            except TimeoutException:
-                continue
-            except Exception as e:
-                continue
+    def find_element_ultra_fast(self, condition, timeout=5):
+        """ULTRA-FAST: Poll a prebuilt selector condition until it yields an element"""
+        try:
+            element = WebDriverWait(self.driver, timeout).until(condition)
+        except TimeoutException:
+            return None
+        except Exception as e:
+            self.logger.warning(f"Element lookup failed: {str(e)}")
+            return None
         
-        return None
+        if element is True:
+            return None
+        self.logger.info("Ultra-fast element found")
+        return element
 
     def ultra_fast_start_fresh_conversation(self):
         """ULTRA-FAST: Lightning-speed fresh conversation"""
@@ -468,12 +1202,7 @@ class FinalPerfectGCCExtractor:
             
             # Optimized navigation
             self.driver.get("https://www.perplexity.ai")
-            time.sleep(1)  # Minimum required delay
-            
-            # Quick load check
-            WebDriverWait(self.driver, 10).until(
-                EC.presence_of_element_located((By.TAG_NAME, "body"))
-            )
+            self._wait_doc_ready(10)
             
             # Check if already fresh
             current_url = self.driver.current_url
@@ -484,15 +1213,15 @@ class FinalPerfectGCCExtractor:
             
             # Optimized thread initialization
             for attempt in range(2):
-                element = self.find_element_ultra_fast(self.new_thread_selectors, 3)
+                element = self.find_element_ultra_fast(self._ec_new_thread, 3)
                 if element:
                     if self.instant_click(element):
                         self.logger.info(f"New conversation thread initialized")
                         break
                 
                 if attempt == 0:
-                    self.driver.execute_script("window.location.href = 'https://www.perplexity.ai'")
-                    time.sleep(1)
+                    self.driver.execute_script(_RESET_LOCATION_JS)
+                    self._wait_doc_ready()
             
             # Verify fresh conversation quickly
             return self._instant_input_ready_check()
@@ -501,17 +1230,53 @@ class FinalPerfectGCCExtractor:
             self.error_logger.error(f"Ultra-fast conversation failed: {str(e)}")
             return False
 
+    def _wait_doc_ready(self, timeout=5) -> bool:
+        """Wait for the page load to settle instead of sleeping a fixed interval"""
+        try:
+            # Script calls can fail while the old document is unloading; keep polling through those
+            WebDriverWait(self.driver, timeout, poll_frequency=0.1,
+                          ignored_exceptions=(WebDriverException,)).until(self._ec_doc_ready)
+            return True
+        except TimeoutException:
+            self.logger.warning("Page load did not settle - continuing with element checks")
+            return False
+
     def _instant_input_ready_check(self):
         """INSTANT: Ultra-quick input verification"""
         try:
-            input_element = self.find_element_ultra_fast(self.input_selectors, 3)
-            if input_element and input_element.is_displayed() and input_element.is_enabled():
+            # _ec_input only resolves elements that are rendered and not disabled
+            if self.find_element_ultra_fast(self._ec_input, 3):
                 self.logger.info("Input ready - INSTANT!")
                 return True
             return False
         except:
             return False
 
+    def _set_input_value(self, element, text: str) -> bool:
+        """Clear and fill a textarea/input in one script call, verifying it landed"""
+        try:
+            entered = self.driver.execute_script(_SET_INPUT_JS, element, text)
+            return entered is not None and entered.strip() == text.strip()
+        except Exception as e:
+            self.logger.warning(f"Scripted input unavailable: {str(e)}")
+            return False
+
+    def _insert_text(self, element, text: str) -> bool:
+        """Insert text into the focused input with a single CDP call, verifying it landed"""
+        try:
+            self.driver.execute_cdp_cmd("Input.insertText", {"text": text})
+            entered = self.driver.execute_script(
+                "const e = arguments[0]; return e.value !== undefined ? e.value : e.innerText;", element
+            )
+            if (entered or "").strip() == text.strip():
+                return True
+            # Input rejected or mangled the text - clear it for the keystroke fallback
+            element.send_keys(Keys.CONTROL + "a")
+            element.send_keys(Keys.DELETE)
+        except Exception as e:
+            self.logger.warning(f"CDP text insertion unavailable: {str(e)}")
+        return False
+
     def ultra_fast_send_query(self, unified_query: str, query_id: str):
         """ULTRA-FAST: Lightning-speed query submission"""
         try:
@@ -519,17 +1284,16 @@ class FinalPerfectGCCExtractor:
             
             for attempt in range(3):
                 try:
-                    input_element = self.find_element_ultra_fast(self.input_selectors, 3)
+                    input_element = self.find_element_ultra_fast(self._ec_input, 3)
                     if not input_element:
                         raise Exception("Input interface not detected")
                     
-                    # INSTANT interaction sequence
-                    input_element.click()
-                    input_element.send_keys(Keys.CONTROL + "a")
-                    input_element.send_keys(Keys.DELETE)
-                    
-                    # IMMEDIATE typing - no delays
-                    input_element.send_keys(unified_query)
+                    # IMMEDIATE typing - one script call; CDP insertion, then keystrokes, as fallbacks
+                    if not self._set_input_value(input_element, unified_query):
+                        # Focus and select existing content in one call; inserted text replaces the selection
+                        self.driver.execute_script(_FOCUS_SELECT_JS, input_element)
+                        if not self._insert_text(input_element, unified_query):
+                            input_element.send_keys(unified_query)
                     
                     # INSTANT submission
                     input_element.send_keys(Keys.RETURN)
@@ -549,78 +1313,130 @@ class FinalPerfectGCCExtractor:
             self.error_logger.error(f"Ultra-fast query sending failed: {str(e)}")
             return False
 
+    def _reset_network_tracking(self):
+        """Discard buffered network events and restart the idle clock"""
+        self._network_seen = False
+        self._last_network_ts = time.time()
+        if self.parallel_tabs > 1:
+            return
+        try:
+            self.driver.get_log('performance')
+        except Exception:
+            pass
+
+    def _network_idle_seconds(self) -> Optional[float]:
+        """Seconds since the last streaming network event, or None when no CDP events are available"""
+        # The performance log is shared by every tab and drained by each read, so with several tabs in
+        # flight it can't be attributed to one response; completion then rests on the DOM observer alone
+        if self.parallel_tabs > 1:
+            return None
+        try:
+            entries = self.driver.get_log('performance')
+        except Exception:
+            return None
+        
+        for entry in entries:
+            message = entry.get('message', '')
+            if any(method in message for method in _STREAM_EVENT_METHODS):
+                self._network_seen = True
+                self._last_network_ts = max(self._last_network_ts, entry.get('timestamp', 0) / 1000.0)
+        
+        if not self._network_seen:
+            return None
+        return time.time() - self._last_network_ts
+
+    def _assess_response(self, text: str, company_tokens: List[Tuple[str, ...]]) -> Dict:
+        """Score a candidate response for format, entity coverage and echoed instructions"""
+        lowered = text.lower()
+        expected = len(company_tokens)
+        company_mentions = sum(1 for tokens in company_tokens if any(token in lowered for token in tokens))
+        return {
+            'perfect_format': (
+                'http' in lowered and
+                text.count('~') >= expected and
+                text.count('?') >= expected - 1
+            ),
+            'company_coverage': company_mentions / expected,
+            'is_not_instructions': not any(phrase in lowered for phrase in _INSTRUCTION_PHRASES)
+        }
+
+    def _install_response_observer(self):
+        """Attach a fresh MutationObserver that timestamps changes to the response container"""
+        try:
+            self.driver.execute_script(_RESET_OBSERVER_JS)
+        except Exception as e:
+            self.logger.warning(f"Response observer install failed: {str(e)}")
+
+    def _probe_response(self) -> Tuple[int, float, int]:
+        """Response length, milliseconds since it last changed and the mutation count, in one round trip"""
+        try:
+            state = self.driver.execute_script(_RESPONSE_PROBE_JS)
+            if state:
+                return int(state[0] or 0), float(state[1]), int(state[2] or 0)
+        except Exception as e:
+            self.logger.error(f"Error probing response state: {str(e)}")
+        return 0, 0.0, -1
+
     def wait_for_complete_response_generation(self, query_id: str, expected_companies: List[str], field_name: str):
         """PATIENT: Complete response generation waiting"""
         try:
             self.logger.info(f"Monitoring response generation - Query ID: {query_id}")
             
             start_time = time.time()
-            last_text = ""
-            stable_count = 0
-            response_growing = True
             max_response_length = 0
-            no_growth_count = 0
+            current_text = ""
+            scored_version = None
+            assessment = None
+            # Lowercased leading words of each company, matched against every settled response
+            company_tokens = [tuple(word.lower() for word in company.split()[:2]) for company in expected_companies]
+            force_accept_ms = self.dom_quiet_ms * (self.max_stability_checks + 2)
+            with self._on_tab():
+                self._reset_network_tracking()
+                self._install_response_observer()
             
             while time.time() - start_time < self.response_timeout:
                 try:
                     if self.shutdown_event.is_set():
                         return None, "SHUTDOWN"
                     
-                    current_text = self._get_final_response_text()
-                    current_length = len(current_text)
+                    with self._on_tab():
+                        current_length, quiet_ms, version = self._probe_response()
                     
                     # Track response growth
                     if current_length > max_response_length:
                         max_response_length = current_length
-                        response_growing = True
-                        no_growth_count = 0
                         self.logger.info(f"Response length: {current_length} characters")
-                    else:
-                        no_growth_count += 1
-                    
-                    # Verify response completion
-                    if no_growth_count >= 5 and current_length >= 20:
-                        response_growing = False
-                        self.logger.info(f"Response generation completed - Length: {current_length} characters")
                     
-                    if current_length >= 20 and not response_growing:
-                        # Analyze response quality
-                        has_tilde_separators = current_text.count('~') >= len(expected_companies)
-                        has_question_separators = current_text.count('?') >= (len(expected_companies) - 1)
-                        has_urls = 'http' in current_text.lower()
-                        
-                        company_mentions = sum(1 for company in expected_companies 
-                                             if any(word.lower() in current_text.lower() 
-                                                   for word in company.split()[:2]))
-                        company_coverage = company_mentions / len(expected_companies)
+                    # Settled once the DOM has stopped mutating and the stream (when visible) is quiet
+                    idle = self._network_idle_seconds()
+                    stream_quiet = idle is None or idle > self.network_idle_threshold
+                    if current_length >= 20 and quiet_ms > self.dom_quiet_ms and stream_quiet:
+                        # Transfer and score the text only once per settled DOM state
+                        if version != scored_version:
+                            with self._on_tab():
+                                current_text = self._get_final_response_text()
+                            if len(current_text) < 20:
+                                time.sleep(self.response_poll_interval)
+                                continue
+                            scored_version = version
+                            current_length = len(current_text)
+                            assessment = self._assess_response(current_text, company_tokens)
+                            self.logger.info(f"Response generation completed - Length: {current_length} characters")
+                            self.logger.info(f"   Format validation: {assessment['perfect_format']}")
+                            self.logger.info(f"   Entity coverage: {assessment['company_coverage']:.1%}")
                         
-                        is_not_instructions = not any(instruction in current_text.lower() 
-                                                    for instruction in ['return the answer', 'provide the', 'do not provide'])
-                        
-                        if current_text == last_text:
-                            stable_count += 1
-                            
-                            self.logger.info(f"Response validation check {stable_count}/{self.stability_checks}")
-                            self.logger.info(f"   Content length: {current_length}")
-                            self.logger.info(f"   Format validation: {has_tilde_separators and has_question_separators and has_urls}")
-                            self.logger.info(f"   Entity coverage: {company_coverage:.1%}")
-                            
-                            if (stable_count >= self.stability_checks and is_not_instructions):
-                                if has_tilde_separators and has_question_separators and has_urls:
-                                    self.logger.info(f"Response validated - Optimal format - ID: {query_id}")
-                                    return current_text, "PERFECT_FORMAT"
-                                elif company_coverage >= 0.3 and current_length > 100:
-                                    self.logger.info(f"Response validated - Sufficient content - ID: {query_id}")
-                                    return current_text, "USEFUL_CONTENT"
-                                elif stable_count >= (self.max_stability_checks + 2):
-                                    self.logger.info(f"Response stability threshold reached - ID: {query_id}")
-                                    return current_text, "FORCE_ACCEPTED"
-                        else:
-                            stable_count = 0
-                            last_text = current_text
+                        if assessment['is_not_instructions']:
+                            if assessment['perfect_format']:
+                                self.logger.info(f"Response validated - Optimal format - ID: {query_id}")
+                                return current_text, "PERFECT_FORMAT"
+                            elif assessment['company_coverage'] >= 0.3 and current_length > 100:
+                                self.logger.info(f"Response validated - Sufficient content - ID: {query_id}")
+                                return current_text, "USEFUL_CONTENT"
+                            elif quiet_ms >= force_accept_ms:
+                                self.logger.info(f"Response stability threshold reached - ID: {query_id}")
+                                return current_text, "FORCE_ACCEPTED"
                     
-                    # Patient waiting with adaptive intervals
-                    time.sleep(3 if response_growing else 2)
+                    time.sleep(self.response_poll_interval)
                     
                 except Exception as e:
                     self.logger.warning(f"Error monitoring complete response: {str(e)}")
@@ -634,43 +1450,11 @@ class FinalPerfectGCCExtractor:
             return None, "ERROR"
 
     def _get_final_response_text(self) -> str:
-        """FINAL: Optimized response text extraction"""
+        """FINAL: Optimized response text extraction in a single browser round trip"""
         try:
-            # Prioritized selectors for fastest detection
-            response_selectors = [
-                '.prose',
-                'article',
-                'main',
-                '[data-testid="response"]',
-                '.answer',
-                "//div[contains(@class, 'prose')]",
-                "//article",
-                "//main",
-                "//div[contains(@data-testid, 'response')]"
-            ]
-            
-            for selector in response_selectors:
-                try:
-                    if self.shutdown_event.is_set():
-                        return ""
-                    
-                    if selector.startswith('//'):
-                        elements = self.driver.find_elements(By.XPATH, selector)
-                    else:
-                        elements = self.driver.find_elements(By.CSS_SELECTOR, selector)
-                    
-                    if elements:
-                        text = elements[0].text
-                        if len(text) > 20:
-                            # Quick cleaning
-                            cleaned = re.sub(r'HomeFinanceTravelAcademic.*?', '', text)
-                            cleaned = re.sub(r'Provide the.*?following format:', '', cleaned, flags=re.DOTALL)
-                            cleaned = re.sub(r'Return the answer.*?explanation\.', '', cleaned, flags=re.DOTALL)
-                            return cleaned.strip()
-                except:
-                    continue
-            
-            return ""
+            if self.shutdown_event.is_set():
+                return ""
+            return self.driver.execute_script(_RESPONSE_TEXT_JS) or ""
                 
         except Exception as e:
             self.logger.error(f"Error getting final response text: {str(e)}")
@@ -708,25 +1492,19 @@ class FinalPerfectGCCExtractor:
         
         if data_line:
             self.parse_logger.info(f"Found perfect format line: {data_line}")
-            segments = data_line.split('?')
+            pairs = parse_response_pairs(data_line)
             
             for i, company in enumerate(companies):
-                if i < len(segments):
-                    segment = segments[i].strip()
-                    if '~' in segment:
-                        parts = segment.split('~', 1)
-                        if len(parts) == 2:
-                            data = parts[0].strip()
-                            url = parts[1].strip()
-                            cleaned_data = self._clean_extracted_data(data, field_name)
-                            
-                            results[company] = {
-                                'answer': cleaned_data,
-                                'url': url if url.startswith('http') else '',
-                                'source': 'PERFECT_FORMAT_ACTUAL_PARSE'
-                            }
-                        else:
-                            results[company] = self._get_intelligent_fallback(company, field_name, 'MALFORMED_SEGMENT')
+                if i < len(pairs):
+                    data, url = pairs[i]
+                    if url is not None:
+                        cleaned_data = self._clean_extracted_data(data, field_name)
+                        
+                        results[company] = {
+                            'answer': cleaned_data,
+                            'url': url if url.startswith('http') else '',
+                            'source': 'PERFECT_FORMAT_ACTUAL_PARSE'
+                        }
                     else:
                         results[company] = self._get_intelligent_fallback(company, field_name, 'NO_SEPARATOR')
                 else:
@@ -739,23 +1517,22 @@ class FinalPerfectGCCExtractor:
 
     def _find_perfect_format_line(self, response: str) -> str:
         """Find the line with perfect format data"""
-        lines = response.split('\n')
-        for line in lines:
-            line = line.strip()
-            if ('~' in line and 'http' in line.lower() and '?' in line and len(line) > 50):
-                tilde_count = line.count('~')
-                question_count = line.count('?')
-                if tilde_count >= 3 and question_count >= 2:
-                    return line
+        for match in _FORMAT_LINE_RE.finditer(response):
+            line = match.group(0).strip()
+            if len(line) > 50 and line.count('~') >= 3 and line.count('?') >= 2:
+                return line
         return ""
 
     def _extract_actual_data_from_content(self, response: str, companies: List[str], field_name: str, query_id: str) -> Dict:
         """Extract actual data from response content"""
         results = {}
-        lines = response.split('\n')
+        # Lines under 3 characters can't hold any company variation, so they are dropped up front
+        lines = [line for line in response.split('\n') if len(line) > 2]
+        lines_lower = [line.lower() for line in lines]
+        handler = field_handler(field_name)
         
-        for company in companies:
-            extracted_data = self._find_company_data_in_lines(lines, company, field_name)
+        for company, line_ids in zip(companies, company_mentions(lines_lower, companies)):
+            extracted_data = self._extract_from_lines(lines, lines_lower, line_ids, handler)
             
             if extracted_data['answer'] != 'NO_DATA_FOUND':
                 results[company] = extracted_data
@@ -766,311 +1543,53 @@ class FinalPerfectGCCExtractor:
 
     def _find_company_data_in_lines(self, lines: List[str], company: str, field_name: str) -> Dict:
         """Find actual data for a company in response lines"""
-        company_variations = [
-            company.lower(),
-            company.lower().replace(',', '').replace('inc', '').replace('.', '').strip(),
-            company.split()[0].lower() if company.split() else company.lower()
-        ]
-        
-        for line in lines:
-            line_lower = line.lower()
-            company_mentioned = any(var in line_lower for var in company_variations if len(var) > 2)
-            
-            if company_mentioned:
-                # Basic company information
-                if field_name == 'industries':
-                    industries = re.findall(r'([A-Za-z]+(?:[,\s]+[A-Za-z]+)*)', line)
-                    if industries:
-                        return {
-                            'answer': ','.join(industries),
-                            'url': self._extract_url_from_line(line),
-                            'source': 'CONTENT_EXTRACTION'
-                        }
-                elif field_name == 'revenue':
-                    numbers = re.findall(r'\b(\d+(?:,\d+)*(?:\.\d+)?)\b', line)
-                    if numbers:
-                        return {
-                            'answer': numbers[0],
-                            'url': self._extract_url_from_line(line),
-                            'source': 'CONTENT_EXTRACTION'
-                        }
-                elif field_name == 'gbs':
-                    if any(word in line_lower for word in ['yes', 'no']):
-                        answer = 'Yes' if 'yes' in line_lower else 'No'
-                        return {
-                            'answer': answer,
-                            'url': self._extract_url_from_line(line),
-                            'source': 'CONTENT_EXTRACTION'
-                        }
-                
-                # GCC location information
-                elif field_name.startswith('city_'):
-                    city = field_name.replace('city_', '').replace('_', ' ')
-                    if city in line_lower:
-                        if any(word in line_lower for word in ['yes', 'no']):
-                            answer = 'Yes' if 'yes' in line_lower else 'No'
-                            return {
-                                'answer': answer,
-                                'url': self._extract_url_from_line(line),
-                                'source': 'CONTENT_EXTRACTION'
-                            }
-                    elif city == 'others':
-                        cities = re.findall(r'Yes,([^~\?]+)', line)
-                        if cities:
-                            return {
-                                'answer': cities[0].strip(),
-                                'url': self._extract_url_from_line(line),
-                                'source': 'CONTENT_EXTRACTION'
-                            }
-                        elif 'no' in line_lower:
-                            return {
-                                'answer': 'No',
-                                'url': self._extract_url_from_line(line),
-                                'source': 'CONTENT_EXTRACTION'
-                            }
-
-                # Function information
-                elif field_name.startswith('function_'):
-                    function = field_name.replace('function_', '').replace('_', ' ')
-                    if any(word in line_lower for word in ['yes', 'no']):
-                        answer = 'Yes' if 'yes' in line_lower else 'No'
-                        if function == 'others':
-                            functions = re.findall(r'Yes,([^~\?]+)', line)
-                            if functions:
-                                answer = functions[0].strip()
-                        return {
-                            'answer': answer,
-                            'url': self._extract_url_from_line(line),
-                            'source': 'CONTENT_EXTRACTION'
-                        }
-
-                # Global GCC information
-                elif field_name == 'global_gcc_units':
-                    numbers = re.findall(r'\b(\d+)\b', line)
-                    if numbers:
-                        return {
-                            'answer': numbers[0],
-                            'url': self._extract_url_from_line(line),
-                            'source': 'CONTENT_EXTRACTION'
-                        }
-                elif field_name == 'global_gcc_locations':
-                    countries = self._extract_countries_from_line(line)
-                    if countries:
-                        return {
-                            'answer': ','.join(countries),
-                            'url': self._extract_url_from_line(line),
-                            'source': 'CONTENT_EXTRACTION'
-                        }
-                elif field_name == 'global_gcc_headcount':
-                    numbers = re.findall(r'\b(\d{2,})\b', line)
-                    if numbers:
-                        return {
-                            'answer': numbers[0],
-                            'url': self._extract_url_from_line(line),
-                            'source': 'CONTENT_EXTRACTION'
-                        }
+        lines_lower = [line.lower() for line in lines]
+        line_ids = company_mentions(lines_lower, [company])[0]
+        return self._extract_from_lines(lines, lines_lower, line_ids, field_handler(field_name))
 
-                # India-specific information
-                elif field_name == 'india_gcc_units':
-                    if 'india' in line_lower:
-                        numbers = re.findall(r'\b(\d+)\b', line)
-                        if numbers:
-                            return {
-                                'answer': numbers[0],
-                                'url': self._extract_url_from_line(line),
-                                'source': 'CONTENT_EXTRACTION'
-                            }
-                elif field_name == 'total_india_headcount':
-                    if 'india' in line_lower:
-                        numbers = re.findall(r'\b(\d{2,})\b', line)
-                        if numbers:
-                            return {
-                                'answer': numbers[0],
-                                'url': self._extract_url_from_line(line),
-                                'source': 'CONTENT_EXTRACTION'
-                            }
-                elif field_name == 'gcc_locations_india':
-                    indian_cities = ['bangalore', 'hyderabad', 'pune', 'chennai', 'mumbai', 'delhi', 'gurgaon', 'noida']
-                    cities = [city for city in indian_cities if city in line_lower]
-                    if cities:
-                        return {
-                            'answer': ','.join(cities),
-                            'url': self._extract_url_from_line(line),
-                            'source': 'CONTENT_EXTRACTION'
-                        }
-
-                # Function counts
-                elif field_name == 'total_functions':
-                    numbers = re.findall(r'\b(\d+)\b', line)
-                    if numbers:
-                        return {
-                            'answer': numbers[0],
-                            'url': self._extract_url_from_line(line),
-                            'source': 'CONTENT_EXTRACTION'
-                        }
-                elif field_name == 'gcc_functions':
-                    functions = re.findall(r'([A-Za-z&]+(?:[,\s]+[A-Za-z&]+)*)', line)
-                    if functions:
-                        return {
-                            'answer': ','.join(functions),
-                            'url': self._extract_url_from_line(line),
-                            'source': 'CONTENT_EXTRACTION'
-                        }
-                elif field_name == 'global_gcc_units':
-                    numbers = re.findall(r'\b(\d+)\b', line)
-                    if numbers:
-                        return {
-                            'answer': numbers[0],
-                            'url': self._extract_url_from_line(line),
-                            'source': 'CONTENT_EXTRACTION'
-                        }
-                elif field_name == 'global_gcc_locations':
-                    countries = self._extract_countries_from_line(line)
-                    if countries:
-                        return {
-                            'answer': ','.join(countries),
-                            'url': self._extract_url_from_line(line),
-                            'source': 'CONTENT_EXTRACTION'
-                        }
-                elif field_name == 'global_gcc_headcount':
-                    numbers = re.findall(r'\b(\d{2,})\b', line)
-                    if numbers:
-                        return {
-                            'answer': numbers[0],
-                            'url': self._extract_url_from_line(line),
-                            'source': 'CONTENT_EXTRACTION'
-                        }
-                elif field_name == 'india_gcc_units':
-                    if 'india' in line_lower:
-                        numbers = re.findall(r'\b(\d+)\b', line)
-                        if numbers:
-                            return {
-                                'answer': numbers[0],
-                                'url': self._extract_url_from_line(line),
-                                'source': 'CONTENT_EXTRACTION'
-                            }
-                elif field_name == 'gcc_locations_india':
-                    indian_cities = ['bangalore', 'hyderabad', 'pune', 'chennai', 'mumbai', 'delhi', 'gurgaon', 'noida']
-                    cities = [city for city in indian_cities if city in line_lower]
-                    if cities:
-                        return {
-                            'answer': ','.join(cities),
-                            'url': self._extract_url_from_line(line),
-                            'source': 'CONTENT_EXTRACTION'
-                        }
-                elif field_name == 'city_locations':
-                    if any(word in line_lower for word in ['yes', 'no']):
-                        answer = 'Yes' if 'yes' in line_lower else 'No'
-                        return {
-                            'answer': answer,
-                            'url': self._extract_url_from_line(line),
-                            'source': 'CONTENT_EXTRACTION'
-                        }
-                elif field_name == 'total_functions':
-                    numbers = re.findall(r'\b(\d+)\b', line)
-                    if numbers:
-                        return {
-                            'answer': numbers[0],
-                            'url': self._extract_url_from_line(line),
-                            'source': 'CONTENT_EXTRACTION'
-                        }
-                elif field_name == 'gcc_functions':
-                    if any(word in line_lower for word in ['yes', 'no']):
-                        answer = 'Yes' if 'yes' in line_lower else 'No'
-                        return {
-                            'answer': answer,
-                            'url': self._extract_url_from_line(line),
-                            'source': 'CONTENT_EXTRACTION'
-                        }
-                elif field_name == 'total_india_headcount':
-                    if 'india' in line_lower:
-                        numbers = re.findall(r'\b(\d{2,})\b', line)
-                        if numbers:
-                            return {
-                                'answer': numbers[0],
-                                'url': self._extract_url_from_line(line),
-                                'source': 'CONTENT_EXTRACTION'
-                            }
+    def _extract_from_lines(self, lines: List[str], lines_lower: List[str], line_ids: List[int],
+                            handler: Optional[Callable[[str, str], Optional[str]]]) -> Dict:
+        """Run a field handler over the lines that mention a company; first answer wins"""
+        if handler is not None:
+            for line_idx in line_ids:
+                line = lines[line_idx]
+                answer = handler(line, lines_lower[line_idx])
+                if answer is not None:
+                    return {
+                        'answer': answer,
+                        'url': self._extract_url_from_line(line),
+                        'source': 'CONTENT_EXTRACTION'
+                    }
         
         return {'answer': 'NO_DATA_FOUND', 'url': '', 'source': 'NO_EXTRACTION'}
 
     def _extract_url_from_line(self, line: str) -> str:
         """Extract URL from line"""
-        urls = re.findall(r'https?://[^\s\],)]+', line)
-        return urls[0] if urls else ""
-
-    def _extract_countries_from_line(self, line: str) -> List[str]:
-        """Extract country names from line"""
-        common_countries = ['India', 'USA', 'Philippines', 'Poland', 'China', 'Mexico', 'Canada', 'UK', 'Germany', 'Brazil', 'Argentina']
-        found_countries = []
-        for country in common_countries:
-            if country.lower() in line.lower():
-                found_countries.append(country)
-        return found_countries
+        # _URL_RE needs a literal 'http', so most lines are rejected without the regex
+        if 'http' not in line:
+            return ""
+        match = _URL_RE.search(line)
+        return match.group(0) if match else ""
+
+    def _type_id(self, field_name: str) -> int:
+        """Map a field to its index into the cleaner/validator tables"""
+        return _TYPE_CODES.get(self.field_types.get(field_name), _UNTYPED)
 
     def _clean_extracted_data(self, data: str, field_name: str) -> str:
         """Clean extracted data based on field type"""
-        if not data or data.strip() == "":
-            return "NA"
+        return self._clean_by_type(data, self._type_id(field_name))
 
-        field_type = self.field_types.get(field_name)
-        cleaned = re.sub(r'[^\w\s,.-]', '', data).strip()
-        
-        if field_type == 'number':
-            numbers = re.findall(r'\d+(?:,\d+)*(?:\.\d+)?', cleaned)
-            if numbers:
-                # Remove commas and convert to simple number
-                number = numbers[0].replace(',', '')
-                return "NA" if float(number) == 0 else number
-            return "NA"
-            
-        elif field_type == 'text_list':
-            items = [item.strip() for item in cleaned.split(',') if item.strip()]
-            if not items or cleaned.lower() in ['none', 'na', 'unknown', '0', 'nil']:
-                return "NA"
-            return ','.join(items)
-            
-        elif field_type == 'yes_no':
-            if 'yes' in cleaned.lower():
-                return "Yes"
-            elif 'no' in cleaned.lower():
-                return "No"
-            return "NA"
-            
-        elif field_type == 'text_or_no':
-            if cleaned.lower() == 'no':
-                return "No"
-            elif cleaned and cleaned.lower() not in ['na', 'none', 'unknown', '0', 'nil']:
-                return cleaned
-            return "NA"
-            
-        return cleaned if cleaned else "NA"
+    def _clean_by_type(self, data: str, type_id: int) -> str:
+        """Clean extracted data with the cleaner for a field type code"""
+        return clean_by_type(data, type_id)
 
     def _validate_data(self, data: str, field_name: str) -> bool:
         """Validate data based on field type"""
-        if data == "NA":
-            return True
-            
-        field_type = self.field_types.get(field_name)
-        
-        if field_type == 'number':
-            try:
-                float(data.replace(',', ''))
-                return True
-            except:
-                return False
-                
-        elif field_type == 'text_list':
-            items = [item.strip() for item in data.split(',') if item.strip()]
-            return len(items) > 0
-            
-        elif field_type == 'yes_no':
-            return data in ['Yes', 'No']
-            
-        elif field_type == 'text_or_no':
-            return data == 'No' or len(data.strip()) > 0
-            
-        return True
+        return self._validate_by_type(data, self._type_id(field_name))
+
+    def _validate_by_type(self, data: str, type_id: int) -> bool:
+        """Validate data with the validator for a field type code"""
+        return validate_by_type(data, type_id)
 
     def _get_intelligent_fallback(self, company: str, field_name: str, source: str) -> Dict:
         """Intelligent fallback when parsing fails"""
@@ -1078,10 +1597,89 @@ class FinalPerfectGCCExtractor:
 
     def _generate_emergency_defaults(self, companies: List[str], field_name: str) -> Dict:
         """Emergency defaults when everything fails"""
-        results = {}
-        for company in companies:
-            results[company] = {'answer': "NA", 'url': '', 'source': 'EMERGENCY_DEFAULT'}
-        return results
+        return dict.fromkeys(companies, _EMERGENCY_RESULT)
+
+    def _pace_next_send(self):
+        """Sleep out whatever is left of the send gap since this thread's tab last sent a query"""
+        times = list(self._response_times)
+        gap = self.batch_pause
+        if times:
+            gap = min(self.batch_pause, max(self.min_batch_pause, 0.25 * statistics.median(times)))
+        last_send = getattr(self._tab_local, 'last_send', None)
+        remaining = gap - (time.time() - last_send) if last_send is not None else gap
+        if remaining > 0:
+            time.sleep(remaining)
+
+    @contextmanager
+    def _on_tab(self):
+        """Hold the driver for one Selenium step, switched to the calling thread's tab"""
+        with self._tab_lock:
+            handle = getattr(self._tab_local, 'handle', None)
+            if handle is not None and handle != self._active_handle:
+                self.driver.switch_to.window(handle)
+                self._active_handle = handle
+            yield
+
+    def _open_tabs(self, count: int) -> List[str]:
+        """Window handles for count tabs, reusing the current tab and opening the rest"""
+        with self._tab_lock:
+            handles = [self.driver.current_window_handle]
+            for _ in range(count - 1):
+                self.driver.switch_to.new_window('tab')
+                handles.append(self.driver.current_window_handle)
+            self.driver.switch_to.window(handles[0])
+            self._active_handle = handles[0]
+        return handles
+
+    def _process_batch(self, batch: List[Tuple[int, str]], field_name: str, batch_num: int, total_batches: int) -> Dict:
+        """Run one batch of (row_idx, company) pairs and return its results by company"""
+        company_names = [company for _, company in batch]
+        company_indices = [idx for idx, _ in batch]
+        
+        print(f"\nFINAL PERFECT BATCH {batch_num}/{total_batches}")
+        print(f"Companies: {company_names}")
+        
+        return self.final_perfect_batch_processing(company_names, company_indices, field_name, batch_num)
+
+    def _run_batches(self, batches: List[List[Tuple[int, str]]], field_name: str):
+        """Yield (batch_num, batch, results) in batch order, spreading batches over parallel_tabs tabs"""
+        total_batches = len(batches)
+        
+        if self.parallel_tabs <= 1 or total_batches <= 1:
+            for batch_num, batch in enumerate(batches, 1):
+                if self.shutdown_event.is_set():
+                    return
+                yield batch_num, batch, self._process_batch(batch, field_name, batch_num, total_batches)
+                if batch_num < total_batches:
+                    print("Final pause...")
+                    self._pace_next_send()
+            return
+        
+        tabs = queue.Queue()
+        for handle in self._open_tabs(min(self.parallel_tabs, total_batches)):
+            tabs.put(handle)
+        
+        def run_on_tab(batch_num, batch):
+            if self.shutdown_event.is_set():
+                return {}
+            handle = tabs.get()
+            self._tab_local.handle = handle
+            try:
+                results = self._process_batch(batch, field_name, batch_num, total_batches)
+                if not self.shutdown_event.is_set():
+                    self._pace_next_send()
+                return results
+            finally:
+                tabs.put(handle)
+        
+        with ThreadPoolExecutor(max_workers=tabs.qsize(), thread_name_prefix='gcc-tab') as pool:
+            futures = [pool.submit(run_on_tab, batch_num, batch) for batch_num, batch in enumerate(batches, 1)]
+            try:
+                for batch_num, (batch, future) in enumerate(zip(batches, futures), 1):
+                    yield batch_num, batch, future.result()
+            finally:
+                for future in futures:
+                    future.cancel()
 
     def final_perfect_batch_processing(self, companies: List[str], company_indices: List[int], field_name: str, batch_num: int):
         """FINAL PERFECT: Ultra-fast input + Patient response waiting"""
@@ -1100,6 +1698,9 @@ class FinalPerfectGCCExtractor:
             self.logger.info(f"Skipping temporary reference column: {field_name}")
             return {}
         
+        unified_query = None
+        conversation_url = None
+        
         for attempt in range(self.max_retries):
             try:
                 if self.shutdown_event.is_set():
@@ -1107,54 +1708,43 @@ class FinalPerfectGCCExtractor:
                 
                 self.logger.info(f"FINAL PERFECT ATTEMPT {attempt + 1}/{self.max_retries}")
                 
-                # ULTRA-FAST conversation start
-                if not self.ultra_fast_start_fresh_conversation():
-                    raise Exception("Failed to start fresh conversation ultra-fast")
-                
-                unified_template = self.unified_query_templates.get(field_name)
-                if not unified_template:
+                unified_query = build_unified_query(field_name, tuple(companies))
+                if not unified_query:
                     raise Exception(f"No template for field: {field_name}")
                 
-                companies_str = ", ".join(companies)
-                unified_query = unified_template.format(companies=companies_str)
-                
-                # Database logging
-                with self.db_lock:
-                    cursor = self.conn.cursor()
-                    cursor.execute('''
-                        INSERT OR REPLACE INTO final_gcc_progress 
-                        (session_id, query_id, timestamp, field_name, companies, query_text, success, conversation_url)
-                        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-                    ''', (
-                        self.session_id, query_id, datetime.now().isoformat(),
-                        field_name, json.dumps(companies), unified_query, False, self.driver.current_url
-                    ))
-                    self.conn.commit()
-                
-                # ULTRA-FAST query sending
-                if not self.ultra_fast_send_query(unified_query, query_id):
-                    raise Exception("Failed to send query ultra-fast")
+                with self._on_tab():
+                    # ULTRA-FAST conversation start
+                    if not self.ultra_fast_start_fresh_conversation():
+                        raise Exception("Failed to start fresh conversation ultra-fast")
+                    
+                    conversation_url = self.driver.current_url
+                    
+                    # ULTRA-FAST query sending
+                    if not self.ultra_fast_send_query(unified_query, query_id):
+                        raise Exception("Failed to send query ultra-fast")
+                self._tab_local.last_send = time.time()
                 
                 # PATIENT response waiting for COMPLETE generation
                 response_data = self.wait_for_complete_response_generation(query_id, companies, field_name)
                 if not response_data[0]:
                     raise Exception("No complete response received")
+                self._response_times.append(time.time() - self._tab_local.last_send)
                 
                 response, response_type = response_data
                 results = self.parse_response_actually(response, response_type, companies, query_id, field_name)
+                with self._on_tab():
+                    final_url = self.driver.current_url
                 
                 processing_time = time.time() - start_time
                 
-                with self.db_lock:
-                    cursor = self.conn.cursor()
-                    cursor.execute('''
-                        UPDATE final_gcc_progress 
-                        SET response_text = ?, response_type = ?, parsed_data = ?, success = ?, conversation_url = ?
-                        WHERE query_id = ?
-                    ''', (response, response_type, json.dumps(results), True, self.driver.current_url, query_id))
-                    self.conn.commit()
+                # Database logging
+                self._queue_progress((
+                    self.session_id, query_id, datetime.now().isoformat(), field_name,
+                    _json_dumps(companies), unified_query, response, response_type,
+                    _json_dumps(results), True, final_url
+                ))
                 
-                with self.counter_lock:
+                with self._stats_lock:
                     self.successful_extractions += 1
                 
                 self.logger.info(f"Batch {batch_num} completed in {processing_time:.1f}s")
@@ -1164,17 +1754,20 @@ class FinalPerfectGCCExtractor:
                 error_msg = f"Final perfect attempt {attempt + 1} failed: {str(e)}"
                 self.error_logger.error(error_msg)
                 
-                with self.counter_lock:
+                with self._stats_lock:
                     self.failed_extractions += 1
                 
                 if attempt < self.max_retries - 1:
-                    # Exponential backoff with jitter
-                    base = 2 ** attempt
-                    jitter = 0.5 + (attempt * 0.25)
-                    wait_time = min(60, base * 2 + jitter)
+                    # Truncated exponential backoff with proportional jitter
+                    wait_time = min(self.max_delay, self.base_delay * (2 ** attempt)) * (1 + random.uniform(0, self.jitter_frac))
                     self.logger.info(f"Retry initiated: {wait_time:.1f} seconds delay (exp backoff)")
                     time.sleep(wait_time)
         
+        self._queue_progress((
+            self.session_id, query_id, datetime.now().isoformat(), field_name,
+            _json_dumps(companies), unified_query, None, None, None, False, conversation_url
+        ))
+        
         self.logger.info("All attempts exhausted, reverting to emergency defaults")
         return self._generate_emergency_defaults(companies, field_name)
 
@@ -1183,79 +1776,102 @@ class FinalPerfectGCCExtractor:
         if not response:
             return "NA"
         
-        response = re.sub(r'\[\d+\]', '', response)
-        response = re.sub(r'\s+', ' ', response).strip()
-        
-        if field_name in ['global_gcc_units', 'global_gcc_headcount', 'india_gcc_units']:
-            numbers = re.findall(r'\d+', response)
-            if numbers:
-                number = numbers[0]
-                return "NA" if number == "0" else number
-            else:
-                return "NA"
-        elif field_name == 'global_gcc_locations':
-            if response.lower() in ['none', 'unknown', 'na', '0']:
-                return "NA"
-            cleaned = re.sub(r'[^\w\s,]', '', response)
-            return cleaned.strip() if cleaned else "NA"
+        response = _WHITESPACE_RE.sub(' ', _CITATION_RE.sub('', response)).strip()
+        return _FINAL_CLEANERS.get(field_name, _final_default)(response)
+
+    def _new_write_only_sheet(self, header: List):
+        """Create a write-only workbook whose sheet already holds the bold header row"""
+        wb = openpyxl.Workbook(write_only=True)
+        ws = wb.create_sheet("Sheet1")
+        header_cells = []
+        for value in header:
+            cell = WriteOnlyCell(ws, value=value)
+            cell.font = Font(bold=True)
+            header_cells.append(cell)
+        ws.append(header_cells)
+        return wb, ws
+
+    def _finalize_rows(self, raw_rows: List[list], row_ids: List[int]):
+        """Clean and validate the field columns of the given rows column by column, caching (value, url) per row"""
+        if not row_ids:
+            return
+        columns = []
+        for col_idx, type_id in zip(self._field_cols, self._field_type_ids):
+            values = pd.Series(
+                [raw_rows[r][col_idx] if col_idx < len(raw_rows[r]) else None for r in row_ids], dtype=object
+            )
+            text = values.map(lambda value: str(value) if value else "")
+            
+            # Split off embedded URLs for the whole column at once
+            parts = text.str.split("|URL:", n=1, expand=True, regex=False)
+            data = parts[0].str.strip().tolist()
+            urls = parts[1].tolist() if parts.shape[1] > 1 else [None] * len(row_ids)
+            
+            column = []
+            for cell_value, cell_data, url in zip(text.tolist(), data, urls):
+                if isinstance(url, str):
+                    url = url.strip()
+                    cleaned_data = clean_by_type(cell_data, type_id)
+                    if url.startswith('http') and validate_by_type(cleaned_data, type_id) and cleaned_data != "NA":
+                        column.append((cleaned_data, url))
+                    else:
+                        column.append(("NA", None))
+                else:
+                    cleaned_data = clean_by_type(cell_value, type_id)
+                    column.append((cleaned_data if validate_by_type(cleaned_data, type_id) else "NA", None))
+            columns.append(column)
         
-        return response if response else "NA"
+        for pos, row_idx in enumerate(row_ids):
+            self._finalized_rows[row_idx] = [column[pos] for column in columns]
+
+    def _link_cell(self, ws, value: str, url: str):
+        """Write-only cell showing value as a hyperlink to url"""
+        cell = WriteOnlyCell(ws, value=value)
+        cell.hyperlink = url
+        cell.font = Font(color="0000FF", underline="single")
+        return cell
 
-    def save_with_hyperlinks(self, df: pd.DataFrame, reason: str = "Progress save"):
+    def _take_dirty_rows(self) -> set:
+        """Hand over the rows changed since the last save and start a fresh set"""
+        with self._io_state_lock:
+            dirty, self._dirty_rows = self._dirty_rows, set()
+        return dirty
+
+    def save_with_hyperlinks(self, df: pd.DataFrame, reason: str = "Progress save", dirty_rows: Optional[set] = None):
         """Final perfect save with proper hyperlink embedding and data validation"""
+        if dirty_rows is None:
+            dirty_rows = self._take_dirty_rows()
         with self.save_lock:
             try:
                 timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
                 
-                backup_file = self.backup_dir / f"FINAL_PERFECT_BACKUP_{timestamp}.xlsx"
-                df.to_excel(backup_file, index=False, engine='openpyxl')
-                df.to_excel(self.output_file, index=False, engine='openpyxl')
+                header = list(df.columns)
+                raw_rows = df.astype(object).where(df.notna(), None).values.tolist()
                 
-                wb = openpyxl.load_workbook(self.output_file)
-                ws = wb.active
+                field_cols = self._field_cols
+                width = max((len(header),) + tuple(col_idx + 1 for col_idx in field_cols))
                 
-                for row_idx in range(4, len(df) + 2):
-                    for field_name, col_idx in self.column_mapping.items():
-                        if field_name == 'company_name':
-                            continue
-                            
-                        cell = ws.cell(row=row_idx, column=col_idx + 1)
-                        cell_value = str(cell.value) if cell.value else ""
-                        
-                        # Process cells with URLs
-                        if "|URL:" in cell_value:
-                            parts = cell_value.split("|URL:", 1)
-                            if len(parts) == 2:
-                                data = parts[0].strip()
-                                url = parts[1].strip()
-                                
-                                # Clean and validate the data
-                                cleaned_data = self._clean_extracted_data(data, field_name)
-                                is_valid = self._validate_data(cleaned_data, field_name)
-                                
-                                if url.startswith('http') and is_valid and cleaned_data != "NA":
-                                    cell.value = cleaned_data
-                                    cell.hyperlink = url
-                                    cell.font = Font(color="0000FF", underline="single")
-                                else:
-                                    cell.value = "NA"
-                                    cell.hyperlink = None
-                                    cell.font = Font()
-                        else:
-                            # Clean and validate non-URL cells
-                            cleaned_data = self._clean_extracted_data(cell_value, field_name)
-                            is_valid = self._validate_data(cleaned_data, field_name)
-                            
-                            if not is_valid:
-                                cleaned_data = "NA"
-                            
-                            cell.value = cleaned_data
-                            cell.hyperlink = None
-                            cell.font = Font()
+                # Only rows written since the last save are re-cleaned; the rest reuse their cached output
+                finalized_rows = self._finalized_rows
+                self._finalize_rows(raw_rows, [
+                    list_idx for list_idx in range(2, len(raw_rows))
+                    if list_idx in dirty_rows or list_idx not in finalized_rows
+                ])
                 
+                wb, ws = self._new_write_only_sheet(header)
+                # Sheet row = list index + 2; data cleanup starts at sheet row 4
+                for list_idx, raw_row in enumerate(raw_rows):
+                    row = raw_row + [None] * (width - len(raw_row))
+                    if list_idx >= 2:
+                        for col_idx, (value, url) in zip(field_cols, finalized_rows[list_idx]):
+                            row[col_idx] = self._link_cell(ws, value, url) if url else value
+                    ws.append(row)
                 wb.save(self.output_file)
                 wb.close()
                 
+                # Backup is a byte copy of the workbook just written, not a second XLSX serialization
+                shutil.copyfile(self.output_file, self.backup_dir / f"FINAL_PERFECT_BACKUP_{timestamp}.xlsx")
+                
                 self.logger.info(f"Data saved successfully: {self.output_file}")
                 return True
                 
@@ -1263,18 +1879,124 @@ class FinalPerfectGCCExtractor:
                 self.error_logger.error(f"Final perfect save failed: {str(e)}")
                 return False
 
+    def _submit_io(self, fn, *args):
+        """Run disk work on the IO thread, or inline once the pool has shut down"""
+        try:
+            return self._io_pool.submit(fn, *args)
+        except RuntimeError:
+            fn(*args)
+            return None
+
+    def _drain_io(self):
+        """Wait for queued saves and flushes to finish and stop the IO thread"""
+        self._io_pool.shutdown(wait=True)
+
+    def _save_in_background(self, df: pd.DataFrame, reason: str):
+        """Queue a snapshot save; a newer snapshot replaces one still waiting behind an in-flight save"""
+        with self._io_state_lock:
+            dirty, self._dirty_rows = self._dirty_rows, set()
+            if self._queued_save is not None:
+                # The superseded snapshot's changes are carried into this one
+                dirty |= self._queued_save[2]
+            self._queued_save = (df.copy(), reason, dirty)
+            if self._pending_save is None:
+                self._pending_save = self._submit_io(self._run_queued_saves)
+
+    def _run_queued_saves(self):
+        """IO-thread loop writing the latest queued snapshot until none is left"""
+        while True:
+            with self._io_state_lock:
+                job = self._queued_save
+                self._queued_save = None
+                if job is None:
+                    self._pending_save = None
+                    return
+            self.save_with_hyperlinks(*job)
+
+    def _maybe_save(self, df: pd.DataFrame, reason: str) -> bool:
+        """Save the workbook at most every save_interval seconds or save_every_batches batches"""
+        self._unsaved_batches += 1
+        if (time.monotonic() - self._last_save_ts > self.save_interval
+                or self._unsaved_batches >= self.save_every_batches):
+            self._save_in_background(df, reason)
+            self._last_save_ts = time.monotonic()
+            self._unsaved_batches = 0
+            return True
+        return False
+
+    def _build_company_index(self, df: pd.DataFrame) -> Dict[str, int]:
+        """Map each stripped company name to the position of its first row"""
+        index = {}
+        for i, name in enumerate(df.iloc[:, self.column_mapping['company_name']]):
+            if pd.notna(name):
+                index.setdefault(str(name).strip(), i)
+        return index
+
     def find_company_index(self, df: pd.DataFrame, company_name: str) -> int:
         """Find the index of a company in the dataframe"""
         try:
-            for idx in range(len(df)):
-                current_company = df.iloc[idx, self.column_mapping['company_name']]
-                if pd.notna(current_company) and str(current_company).strip() == company_name:
-                    return idx
-            return -1
+            # Company names never change during a run, so the index is built once per loaded frame
+            if self._company_index is None:
+                self._company_index = self._build_company_index(df)
+            return self._company_index.get(company_name, -1)
         except Exception as e:
             self.logger.error(f"Error finding company index for {company_name}: {str(e)}")
             return -1
 
+    def expand_matrix_answer(self, field_name: str, answer: str) -> Dict[str, str]:
+        """Fan a comma-separated matrix answer out to its Yes/No columns"""
+        sub_fields = MATRIX_FIELDS[field_name]
+        values = [value.strip() for value in str(answer).split(',')]
+        if len(values) != len(sub_fields):
+            return {sub_field: "NA" for sub_field in sub_fields}
+        return {
+            sub_field: self._clean_extracted_data(value, sub_field)
+            for sub_field, value in zip(sub_fields, values)
+        }
+
+    def _pending_mask(self, column: pd.Series) -> np.ndarray:
+        """True for cells that are still empty or hold a failure marker"""
+        stripped = column.astype(str).str.strip()
+        return (column.isna() | stripped.isin(_PENDING_MARKERS)).to_numpy(dtype=bool)
+
+    def _pending_targets(self, df: pd.DataFrame, row_idx: int, field: str) -> List[str]:
+        """Columns of a field that are still pending for one row; a matrix field can be partly filled"""
+        return [
+            target for target in MATRIX_FIELDS.get(field, [field])
+            if _is_pending(df.iat[row_idx, self.column_mapping[target]])
+        ]
+
+    def apply_answer(self, df: pd.DataFrame, row_idx: int, field_name: str, answer: str, url: str):
+        """Write a cleaned answer into a row's pending cells for the field, linking url when present"""
+        if field_name in MATRIX_FIELDS:
+            cell_values = self.expand_matrix_answer(field_name, answer)
+            # Cells already answered on an earlier run keep their value
+            targets = self._pending_targets(df, row_idx, field_name)
+        else:
+            cell_values = {field_name: answer}
+            targets = [field_name]
+        
+        for target_field in targets:
+            value = cell_values[target_field]
+            if url and url.strip() and url.startswith('http') and value != "NA":
+                value = f"{value}|URL:{url}"
+            df.iat[row_idx, self.column_mapping[target_field]] = value
+        self._dirty_rows.add(row_idx)
+
+    def _pending_companies(self, df: pd.DataFrame, field: str, start_idx: int = 0) -> List[Tuple[int, str]]:
+        """(row_idx, company_name) for rows whose field columns still need processing"""
+        names = df.iloc[start_idx:, self.column_mapping['company_name']]
+        stripped_names = names.astype(str).str.strip()
+        mask = (names.notna() & stripped_names.ne('')).to_numpy(dtype=bool)
+        
+        # A matrix field is pending while any of its columns is
+        pending = np.zeros(len(names), dtype=bool)
+        for target in MATRIX_FIELDS.get(field, [field]):
+            pending |= self._pending_mask(df.iloc[start_idx:, self.column_mapping[target]])
+        
+        rows = np.flatnonzero(mask & pending)
+        return list(zip((rows + start_idx).tolist(), stripped_names.to_numpy()[rows].tolist()))
+
     def get_companies_for_processing(self, df: pd.DataFrame, field: str) -> List[Tuple[int, str]]:
         """Get companies needing processing - SPECIFIC RESUME LOGIC"""
         companies_to_process = []
@@ -1294,24 +2016,7 @@ class FinalPerfectGCCExtractor:
                 start_idx = 0
                 self.logger.info(f"Processing field {field} from beginning")
             
-            for idx in range(start_idx, len(df)):
-                if self.shutdown_event.is_set():
-                    break
-                    
-                try:
-                    company_name = df.iloc[idx, self.column_mapping['company_name']]
-                    if pd.notna(company_name) and str(company_name).strip():
-                        current_value = df.iloc[idx, self.column_mapping[field]]
-                        needs_processing = (
-                            pd.isna(current_value) or 
-                            not str(current_value).strip() or
-                            str(current_value).strip() in ['PARSING_FAILED', 'ALL_FAILED', 'N/A', '', '0', 'NA']
-                        )
-                        
-                        if needs_processing:
-                            companies_to_process.append((idx, str(company_name).strip()))
-                except:
-                    continue
+            companies_to_process = self._pending_companies(df, field, start_idx)
         except Exception as e:
             self.error_logger.error(f"Error getting companies: {str(e)}")
         
@@ -1375,6 +2080,7 @@ class FinalPerfectGCCExtractor:
             
             df = pd.read_excel(self.input_file, engine='openpyxl')
             self.current_df = df
+            self._company_index = self._build_company_index(df)
             print(f"Loaded Excel: {len(df)} rows")
             print(f"Will start global_gcc_locations from {self.resume_company_for_locations}")
             
@@ -1402,21 +2108,10 @@ class FinalPerfectGCCExtractor:
                 print(f"Processing {len(field_companies)} companies for {field_name}")
                 
                 field_updates = 0
-                for i in range(0, len(field_companies), self.batch_size):
+                batches = [field_companies[i:i+self.batch_size] for i in range(0, len(field_companies), self.batch_size)]
+                for batch_num, batch, results in self._run_batches(batches, field_name):
                     if self.shutdown_event.is_set():
                         break
-                        
-                    batch = field_companies[i:i+self.batch_size]
-                    batch_num = i // self.batch_size + 1
-                    total_batches = (len(field_companies) + self.batch_size - 1) // self.batch_size
-                    
-                    company_names = [company for _, company in batch]
-                    company_indices = [idx for idx, _ in batch]
-                    
-                    print(f"\nFINAL PERFECT BATCH {batch_num}/{total_batches}")
-                    print(f"Companies: {company_names}")
-                    
-                    results = self.final_perfect_batch_processing(company_names, company_indices, field_name, batch_num)
                     
                     batch_updates = 0
                     for j, (company_idx, company_name) in enumerate(batch):
@@ -1428,13 +2123,7 @@ class FinalPerfectGCCExtractor:
                             source = result_data['source']
                             
                             cleaned_answer = self.clean_response_by_field(answer, field_name)
-                            
-                            if url and url.strip() and url.startswith('http') and cleaned_answer != "NA":
-                                cell_value = f"{cleaned_answer}|URL:{url}"
-                            else:
-                                cell_value = cleaned_answer
-                            
-                            df.iloc[company_idx, self.column_mapping[field_name]] = cell_value
+                            self.apply_answer(df, company_idx, field_name, cleaned_answer, url)
                             
                             print(f"FINAL PERFECT UPDATE: {company_name} -> {cleaned_answer}")
                             print(f"   Source: {source}")
@@ -1444,18 +2133,23 @@ class FinalPerfectGCCExtractor:
                             batch_updates += 1
                             field_updates += 1
                     
-                    self.save_with_hyperlinks(df, f"Final perfect batch {batch_num}")
-                    print(f"FINAL PERFECT SAVE: Batch {batch_num} ({batch_updates} updates)")
-                    
-                    if i + self.batch_size < len(field_companies):
-                        print("Final pause...")
-                        time.sleep(8)
+                    # Nothing written since the last save - the workbook is already current
+                    if not self._dirty_rows:
+                        print(f"FINAL PERFECT SKIP SAVE: Batch {batch_num} (no changes)")
+                    elif self._maybe_save(df, f"Final perfect batch {batch_num}"):
+                        print(f"FINAL PERFECT SAVE: Batch {batch_num} ({batch_updates} updates)")
+                    else:
+                        print(f"FINAL PERFECT DEFERRED SAVE: Batch {batch_num} ({batch_updates} updates)")
+
                 
                 print(f"FINAL PERFECT FIELD {field_name} COMPLETED ({field_updates} updates)")
+                # Don't leave a completed field's progress rows waiting for the next field's batches
+                self._submit_io(self._flush_progress)
                 
                 if field_name != self.fields_to_process[-1]:
-                    time.sleep(12)
+                    self._pace_next_send()
             
+            self._drain_io()
             self.save_with_hyperlinks(df, "FINAL PERFECT EXTRACTION COMPLETE")
             
             print(f"\n{'='*80}")
@@ -1489,13 +2183,15 @@ class FinalPerfectGCCExtractor:
             self.error_logger.error(f"Critical error: {str(e)}")
             
             if hasattr(self, 'current_df'):
+                self._drain_io()
                 self.save_with_hyperlinks(self.current_df, "ERROR RECOVERY SAVE")
             
             return False
             
         finally:
-            if self.conn:
-                self.conn.close()
+            self._drain_io()
+            self.close_database()
+            self.stop_logging()
 
 def main():
     """Final perfect main function"""
@@ -0,0 +1,115 @@
+"""
+Compiled kernels for the GCC answer cleaners.
+
+When numba is installed the Yes/No and number scans run as njit kernels over the
+answer's UTF-8 bytes; otherwise equivalent str-based implementations are used.
+"""
+
+import re
+from typing import Optional
+
+import numpy as np
+
+try:
+    from numba import njit
+except ImportError:  # numba is optional; fall back to str methods
+    njit = None
+
+_NUMBER_RE = re.compile(r'\d+(?:,\d+)*(?:\.\d+)?', re.ASCII)
+
+# ASCII codes used by the kernels
+_COMMA, _DOT, _ZERO, _NINE = 44, 46, 48, 57
+
+
+def _find_lower(buf, a, b, c):
+    """Index of the first case-insensitive match of the 2-3 byte needle a,b[,c] (c < 0 for 2 bytes), else -1"""
+    n = len(buf)
+    width = 2 if c < 0 else 3
+    for i in range(n - width + 1):
+        if (buf[i] | 32) != a or (buf[i + 1] | 32) != b:
+            continue
+        if c < 0 or (buf[i + 2] | 32) == c:
+            return i
+    return -1
+
+
+def _yes_no_kernel(buf):
+    """1 if the bytes contain 'yes', 0 if they contain 'no', -1 otherwise (case-insensitive)"""
+    if _find_lower(buf, 121, 101, 115) >= 0:
+        return 1
+    if _find_lower(buf, 110, 111, -1) >= 0:
+        return 0
+    return -1
+
+
+def _number_kernel(buf):
+    """(start, end) of the first \\d+(,\\d+)*(\\.\\d+)? match, or (-1, -1)"""
+    n = len(buf)
+    start = -1
+    for i in range(n):
+        if _ZERO <= buf[i] <= _NINE:
+            start = i
+            break
+    if start < 0:
+        return -1, -1
+
+    end = start
+    while end < n and _ZERO <= buf[end] <= _NINE:
+        end += 1
+    # Thousands groups
+    while end + 1 < n and buf[end] == _COMMA and _ZERO <= buf[end + 1] <= _NINE:
+        end += 1
+        while end < n and _ZERO <= buf[end] <= _NINE:
+            end += 1
+    # Decimal part
+    if end + 1 < n and buf[end] == _DOT and _ZERO <= buf[end + 1] <= _NINE:
+        end += 1
+        while end < n and _ZERO <= buf[end] <= _NINE:
+            end += 1
+    return start, end
+
+
+if njit is not None:
+    _find_lower = njit(cache=True)(_find_lower)
+    _yes_no_kernel = njit(cache=True)(_yes_no_kernel)
+    _number_kernel = njit(cache=True)(_number_kernel)
+
+
+def _yes_no_code_kernel(text: str) -> int:
+    return int(_yes_no_kernel(np.frombuffer(text.encode(), dtype=np.uint8)))
+
+
+def _yes_no_code_str(text: str) -> int:
+    lowered = text.lower()
+    if 'yes' in lowered:
+        return 1
+    if 'no' in lowered:
+        return 0
+    return -1
+
+
+def _first_number_kernel(text: str) -> Optional[str]:
+    data = text.encode()
+    start, end = _number_kernel(np.frombuffer(data, dtype=np.uint8))
+    if start < 0:
+        return None
+    return data[start:end].decode().replace(',', '')
+
+
+def _first_number_str(text: str) -> Optional[str]:
+    match = _NUMBER_RE.search(text)
+    return match.group(0).replace(',', '') if match else None
+
+
+def yes_no_code(text: str) -> int:
+    """Classify an answer as Yes (1), No (0) or neither (-1)"""
+    if njit is not None:
+        return _yes_no_code_kernel(text)
+    return _yes_no_code_str(text)
+
+
+def first_number(text: str) -> Optional[str]:
+    """Return the first number in an answer with thousands separators removed, or None"""
+    if njit is not None:
+        return _first_number_kernel(text)
+    return _first_number_str(text)
@@ -31,6 +31,8 @@ class Settings(BaseSettings):
     debug: bool = Field(default=False, env="DEBUG")
     host: str = Field(default="0.0.0.0", env="HOST")
     port: int = Field(default=8000, env="PORT")
+    # Each worker loads its own models and in-memory document index; more than 1 needs shared index storage
+    workers: int = Field(default=1, env="WORKERS")
     
     # Security
     secret_key: str = Field(default="your-secret-key-change-this", env="SECRET_KEY")
@@ -53,6 +55,7 @@ class Settings(BaseSettings):
     top_k: int = 5
     similarity_threshold: float = 0.7
     max_context_length: int = 4000
+    max_concurrent_generations: int = Field(default=4, env="MAX_CONCURRENT_GENERATIONS")
     enable_hybrid: bool = Field(default=True, env="ENABLE_HYBRID")
     hybrid_alpha: float = Field(default=0.6, env="HYBRID_ALPHA")  # weight for vector vs lexical
     
@@ -73,6 +76,8 @@ class Settings(BaseSettings):
     # File Processing
     supported_formats: List[str] = [".pdf", ".docx", ".txt", ".md", ".xlsx", ".csv"]
     max_file_size: int = 50 * 1024 * 1024  # 50MB
+    # Uploads are parsed and deleted right away; mount this on tmpfs to keep them off disk
+    temp_dir: str = Field(default="./storage/temp", env="TEMP_DIR")
     
     # Rate Limiting
     rate_limit_per_minute: int = 60
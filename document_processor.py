@@ -3,22 +3,86 @@ import re
 import hashlib
 from typing import List, Dict, Any
 from datetime import datetime
+import numpy as np
 import pandas as pd
 from pathlib import Path
 import logging
 from io import StringIO
 
-from PyPDF2 import PdfReader
-from docx import Document as DocxDocument
+try:
+    from numba import njit
+except ImportError:  # numba is optional; _split_text falls back to numpy
+    njit = None
+
+try:
+    import xxhash
+except ImportError:  # xxhash is optional; content hashes fall back to blake2b
+    xxhash = None
 
 logger = logging.getLogger(__name__)
 
+_SENTENCE_END_RE = re.compile(r"[.!?]")
+_WORD_BREAK_RE = re.compile(r" ")
+_WHITESPACE_RE = re.compile(r"\s+")
+_PARAGRAPH_BREAK_RE = re.compile(r'\n\s*\n')
+_KEYWORD_RE = re.compile(r'\b[a-zA-Z]{3,}\b')
+
+
+def _split_offsets(buf, chunk_size, chunk_overlap):
+    """Return (start, end) offsets of the chunks _split_text would produce."""
+    n = len(buf)
+    bounds = []
+    start = 0
+    
+    while start < n:
+        end = start + chunk_size
+        
+        if end < n:
+            found = False
+            # Look for sentence endings
+            for i in range(end, max(start + chunk_size - 100, start), -1):
+                c = buf[i]
+                if c == 46 or c == 33 or c == 63:
+                    end = i + 1
+                    found = True
+                    break
+            if not found:
+                # Look for word boundaries
+                for i in range(end, max(start + chunk_size - 50, start), -1):
+                    if buf[i] == 32:
+                        end = i
+                        break
+        
+        bounds.append((start, end))
+        
+        start = end - chunk_overlap
+        if start >= n:
+            break
+    
+    return bounds
+
+
+_split_offsets_native = njit(cache=True)(_split_offsets) if njit is not None else None
+
+
 class DocumentProcessor:
     """Enhanced document processor with support for multiple formats and intelligent chunking."""
     
-    def __init__(self, chunk_size: int = 1000, chunk_overlap: int = 200):
+    def __init__(self, chunk_size: int = 1000, chunk_overlap: int = 200, dedup: bool = False):
         self.chunk_size = chunk_size
         self.chunk_overlap = chunk_overlap
+        # Key text/pdf/docx chunk ids on a content hash instead of position, so identical chunks collide
+        self.dedup = dedup
+    
+    def _chunk_id(self, kind: str, position, text: str) -> str:
+        """Build a chunk id: kind plus position, or kind plus a content hash when dedup is enabled."""
+        if not self.dedup:
+            return f"{kind}_{position}"
+        if xxhash is not None:
+            digest = xxhash.xxh3_64_hexdigest(text.encode())
+        else:
+            digest = hashlib.blake2b(text.encode(), digest_size=8).hexdigest()
+        return f"{kind}_{digest}"
         
     def process_excel(self, file_path: str) -> List[Dict[str, Any]]:
         """Process Excel files with enhanced metadata extraction."""
@@ -36,19 +100,23 @@ class DocumentProcessor:
                 "processed_at": datetime.now().isoformat()
             }
             
+            # Stringify every column once so the row loop is pure str work
+            df = df.astype(str)
+            columns = list(df.columns)
+            
             chunks = []
-            for idx, row in df.iterrows():
+            for idx, *values in df.itertuples(name=None):
                 # Create structured text from row
-                row_text = "\n".join([f"{col}: {row[col]}" for col in df.columns if str(row[col]).strip()])
+                row_text = "\n".join(f"{col}: {val}" for col, val in zip(columns, values) if val and not val.isspace())
                 
-                if row_text.strip():
+                if row_text:
                     chunk = {
                         "text": row_text,
-                        "metadata": {
-                            **metadata,
-                            "row_index": idx,
-                            "chunk_id": f"excel_{idx}_{hashlib.md5(row_text.encode()).hexdigest()[:8]}"
-                        }
+                        "metadata": dict(
+                            metadata,
+                            row_index=idx,
+                            chunk_id=f"excel_{idx}"
+                        )
                     }
                     chunks.append(chunk)
             
@@ -74,18 +142,21 @@ class DocumentProcessor:
                 "processed_at": datetime.now().isoformat()
             }
             
+            df = df.astype(str)
+            columns = list(df.columns)
+            
             chunks = []
-            for idx, row in df.iterrows():
-                row_text = "\n".join([f"{col}: {row[col]}" for col in df.columns if str(row[col]).strip()])
+            for idx, *values in df.itertuples(name=None):
+                row_text = "\n".join(f"{col}: {val}" for col, val in zip(columns, values) if val and not val.isspace())
                 
-                if row_text.strip():
+                if row_text:
                     chunk = {
                         "text": row_text,
-                        "metadata": {
-                            **metadata,
-                            "row_index": idx,
-                            "chunk_id": f"csv_{idx}_{hashlib.md5(row_text.encode()).hexdigest()[:8]}"
-                        }
+                        "metadata": dict(
+                            metadata,
+                            row_index=idx,
+                            chunk_id=f"csv_{idx}"
+                        )
                     }
                     chunks.append(chunk)
             
@@ -110,7 +181,7 @@ class DocumentProcessor:
             }
             
             # Split into paragraphs first
-            paragraphs = re.split(r'\n\s*\n', content)
+            paragraphs = _PARAGRAPH_BREAK_RE.split(content)
             
             chunks = []
             for i, paragraph in enumerate(paragraphs):
@@ -123,22 +194,22 @@ class DocumentProcessor:
                     for j, sub_chunk in enumerate(sub_chunks):
                         chunk = {
                             "text": sub_chunk,
-                            "metadata": {
-                                **metadata,
-                                "paragraph_index": i,
-                                "sub_chunk_index": j,
-                                "chunk_id": f"text_{i}_{j}_{hashlib.md5(sub_chunk.encode()).hexdigest()[:8]}"
-                            }
+                            "metadata": dict(
+                                metadata,
+                                paragraph_index=i,
+                                sub_chunk_index=j,
+                                chunk_id=self._chunk_id("text", f"{i}_{j}", sub_chunk)
+                            )
                         }
                         chunks.append(chunk)
                 else:
                     chunk = {
                         "text": paragraph,
-                        "metadata": {
-                            **metadata,
-                            "paragraph_index": i,
-                            "chunk_id": f"text_{i}_{hashlib.md5(paragraph.encode()).hexdigest()[:8]}"
-                        }
+                        "metadata": dict(
+                            metadata,
+                            paragraph_index=i,
+                            chunk_id=self._chunk_id("text", i, paragraph)
+                        )
                     }
                     chunks.append(chunk)
             
@@ -154,6 +225,15 @@ class DocumentProcessor:
         if len(text) <= self.chunk_size:
             return [text]
         
+        if _split_offsets_native is not None:
+            # One element per character so buffer offsets are string offsets
+            if text.isascii():
+                buf = np.frombuffer(text.encode("ascii"), dtype=np.uint8)
+            else:
+                buf = np.frombuffer(text.encode("utf-32-le"), dtype=np.uint32)
+            bounds = _split_offsets_native(buf, self.chunk_size, self.chunk_overlap)
+            return [chunk for chunk in (text[s:e].strip() for s, e in bounds) if chunk]
+        
         chunks = []
         start = 0
         
@@ -163,16 +243,17 @@ class DocumentProcessor:
             # Try to break at sentence boundaries
             if end < len(text):
                 # Look for sentence endings
-                for i in range(end, max(start + self.chunk_size - 100, start), -1):
-                    if text[i] in '.!?':
-                        end = i + 1
-                        break
+                match = None
+                for match in _SENTENCE_END_RE.finditer(text, max(start + self.chunk_size - 100, start) + 1, end + 1):
+                    pass
+                if match:
+                    end = match.end()
                 else:
                     # Look for word boundaries
-                    for i in range(end, max(start + self.chunk_size - 50, start), -1):
-                        if text[i] == ' ':
-                            end = i
-                            break
+                    for match in _WORD_BREAK_RE.finditer(text, max(start + self.chunk_size - 50, start) + 1, end + 1):
+                        pass
+                    if match:
+                        end = match.start()
             
             chunk = text[start:end].strip()
             if chunk:
@@ -209,7 +290,7 @@ class DocumentProcessor:
     def extract_keywords(self, text: str, top_k: int = 10) -> List[str]:
         """Extract key terms from text using simple frequency analysis."""
         # Remove common words and punctuation
-        words = re.findall(r'\b[a-zA-Z]{3,}\b', text.lower())
+        words = _KEYWORD_RE.findall(text.lower())
         
         # Simple frequency analysis
         word_freq = {}
@@ -245,6 +326,8 @@ class DocumentProcessor:
     # New: PDF processing
     def process_pdf(self, file_path: str) -> List[Dict[str, Any]]:
         """Process PDF files using PyPDF2 with page-level extraction and chunking."""
+        from PyPDF2 import PdfReader
+        
         try:
             reader = PdfReader(file_path)
             full_text_parts: List[str] = []
@@ -260,17 +343,20 @@ class DocumentProcessor:
                 return []
             # Chunk the combined text, but preserve approximate page indices via metadata
             chunks_text = self._split_text(full_text)
+            metadata = {
+                "file_path": file_path,
+                "file_type": "pdf",
+                "approx_page": None,
+                "processed_at": datetime.now().isoformat()
+            }
             chunks: List[Dict[str, Any]] = []
             for idx, chunk_text in enumerate(chunks_text):
                 chunks.append({
                     "text": chunk_text,
-                    "metadata": {
-                        "file_path": file_path,
-                        "file_type": "pdf",
-                        "chunk_id": f"pdf_{idx}_{hashlib.md5(chunk_text.encode()).hexdigest()[:8]}",
-                        "approx_page": None,
-                        "processed_at": datetime.now().isoformat()
-                    }
+                    "metadata": dict(
+                        metadata,
+                        chunk_id=self._chunk_id("pdf", idx, chunk_text)
+                    )
                 })
             return chunks
         except Exception as e:
@@ -280,6 +366,8 @@ class DocumentProcessor:
     # New: DOCX processing
     def process_docx(self, file_path: str) -> List[Dict[str, Any]]:
         """Process DOCX files with paragraph and table text extraction."""
+        from docx import Document as DocxDocument
+        
         try:
             doc = DocxDocument(file_path)
             parts: List[str] = []
@@ -290,23 +378,27 @@ class DocumentProcessor:
             # Tables
             for table in doc.tables:
                 for row in table.rows:
-                    row_text = " | ".join(self._clean_text(cell.text) for cell in row.cells if self._clean_text(cell.text))
+                    cells = (self._clean_text(cell.text) for cell in row.cells)
+                    row_text = " | ".join(cell for cell in cells if cell)
                     if row_text:
                         parts.append(row_text)
             combined = "\n".join(parts)
             if not combined.strip():
                 return []
             chunks_text = self._split_text(combined)
+            metadata = {
+                "file_path": file_path,
+                "file_type": "docx",
+                "processed_at": datetime.now().isoformat()
+            }
             chunks: List[Dict[str, Any]] = []
             for idx, chunk_text in enumerate(chunks_text):
                 chunks.append({
                     "text": chunk_text,
-                    "metadata": {
-                        "file_path": file_path,
-                        "file_type": "docx",
-                        "chunk_id": f"docx_{idx}_{hashlib.md5(chunk_text.encode()).hexdigest()[:8]}",
-                        "processed_at": datetime.now().isoformat()
-                    }
+                    "metadata": dict(
+                        metadata,
+                        chunk_id=self._chunk_id("docx", idx, chunk_text)
+                    )
                 })
             return chunks
         except Exception as e:
@@ -319,7 +411,7 @@ class DocumentProcessor:
         if not text:
             return ""
         # Collapse multiple spaces and newlines
-        text = re.sub(r"\s+", " ", str(text))
+        text = _WHITESPACE_RE.sub(" ", str(text))
         return text.strip()
 
     # New: async API used in tests and higher-level flows
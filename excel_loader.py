@@ -1,6 +1,6 @@
-import pandas as pd
-
 def load_excel_data(filepath):
+    import pandas as pd
+
     df = pd.read_excel(filepath)
     df.fillna("", inplace=True)
 
@@ -0,0 +1,186 @@
+"""
+Out-of-process runners for the GCC extractor.
+
+The extractor drives Chrome synchronously for hours and installs a SIGINT handler,
+so it cannot share the API's event loop or threadpool. Runs go to a Celery worker
+when USE_CELERY is set (start one with ``celery -A gcc_tasks worker``), otherwise
+to a local process pool. Session state lives in the Redis hash ``gcc:{session_id}``
+so every API worker sees the same sessions, and ``gcc:lock:{debug_port}`` holds the
+session driving that Chrome, so only one run per debug session starts across all workers.
+When Redis is unreachable the API falls back to a LocalSessionStore, which keeps the same
+hashes and locks for a single API process.
+"""
+
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import Manager
+from pathlib import Path
+from threading import Event, Lock, Thread
+from typing import Dict, Optional
+
+import redis
+
+from config import settings
+
+try:
+    from celery import Celery
+except ImportError:  # celery is optional; runs fall back to the local process pool
+    Celery = None
+
+celery_app = None
+if Celery is not None and settings.use_celery:
+    _broker = settings.celery_broker_url or settings.redis_url
+    celery_app = Celery(
+        "autoquest",
+        broker=_broker,
+        backend=settings.celery_result_backend or _broker,
+    )
+
+# Local runs go to one child process; the debug-port lock keeps runs apart across API workers
+GCC_PROCESS_POOL = ProcessPoolExecutor(max_workers=1)
+_pool_lock = Lock()
+
+SESSION_TTL = 7 * 24 * 3600
+STOP_POLL_SECONDS = 1.0
+# The running extraction refreshes its lock every poll; a dead run's lock lapses after this
+LOCK_TTL = 300
+
+# Delete the lock only while it still names the releasing session
+_RELEASE_LOCK_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+
+class LocalSessionStore:
+    """In-process stand-in for the Redis session hashes and port locks.
+
+    State lives in a multiprocessing manager so the pool's child process sees the API's
+    writes (and the API sees its status updates); it is not shared between API workers.
+    Only the commands used by this module and the GCC routes are implemented.
+    """
+
+    def __init__(self):
+        self._manager = Manager()
+        self._fields = self._manager.dict()  # (key, field) -> str, like a decoded Redis hash
+        self._locks = self._manager.dict()   # key -> (value, expires_at)
+        self._mutex = self._manager.Lock()
+
+    def __getstate__(self):
+        # The manager handle stays in the API process; the proxies reconnect in the child
+        return {"_fields": self._fields, "_locks": self._locks, "_mutex": self._mutex}
+
+    def hset(self, key: str, mapping: Dict) -> None:
+        self._fields.update({(key, field): str(value) for field, value in mapping.items()})
+
+    def hget(self, key: str, field: str) -> Optional[str]:
+        return self._fields.get((key, field))
+
+    def hgetall(self, key: str) -> Dict[str, str]:
+        return {field: value for (owner, field), value in self._fields.items() if owner == key}
+
+    def set(self, key: str, value: str, nx: bool = False, ex: Optional[int] = None) -> bool:
+        with self._mutex:
+            held = self._locks.get(key)
+            if nx and held is not None and held[1] > time.time():
+                return False
+            self._locks[key] = (value, time.time() + ex if ex else float("inf"))
+            return True
+
+    def expire(self, key: str, seconds: int) -> None:
+        # Only locks expire; session hashes live as long as the API process
+        with self._mutex:
+            held = self._locks.get(key)
+            if held is not None:
+                self._locks[key] = (held[0], time.time() + seconds)
+
+    def release_lock(self, key: str, value: str) -> None:
+        with self._mutex:
+            held = self._locks.get(key)
+            if held is not None and held[0] == value:
+                del self._locks[key]
+
+
+def session_key(session_id: str) -> str:
+    return f"gcc:{session_id}"
+
+
+def lock_key(debug_port: int) -> str:
+    return f"gcc:lock:{debug_port}"
+
+
+def release_lock(client, debug_port: int, session_id: str):
+    """Release a debug-port lock held by session_id (returns an awaitable for an asyncio client)"""
+    local_release = getattr(client, "release_lock", None)
+    if local_release is not None:
+        return local_release(lock_key(debug_port), session_id)
+    return client.eval(_RELEASE_LOCK_SCRIPT, 1, lock_key(debug_port), session_id)
+
+
+def submit_local(session_id: str, params: Dict, store: Optional[LocalSessionStore] = None) -> Future:
+    """Run an extraction in the local process pool, replacing the pool if a crashed run broke it"""
+    global GCC_PROCESS_POOL
+    with _pool_lock:
+        try:
+            return GCC_PROCESS_POOL.submit(run_extraction, session_id, params, store)
+        except BrokenProcessPool:
+            GCC_PROCESS_POOL = ProcessPoolExecutor(max_workers=1)
+            return GCC_PROCESS_POOL.submit(run_extraction, session_id, params, store)
+
+
+def update_session(client, session_id: str, **fields) -> None:
+    """Write fields into a session hash, stamping updated_at"""
+    fields["updated_at"] = time.time()
+    client.hset(session_key(session_id), mapping=fields)
+
+
+def _watch_stop(client, session_id: str, debug_port: int, shutdown_event: Event, finished: Event) -> None:
+    """Relay a stop request from the session hash to the extractor's shutdown event, keeping the port lock alive"""
+    key = session_key(session_id)
+    while not finished.wait(STOP_POLL_SECONDS):
+        client.expire(lock_key(debug_port), LOCK_TTL)
+        if client.hget(key, "stop_requested"):
+            shutdown_event.set()
+            return
+
+
+def run_extraction(session_id: str, params: Dict, store: Optional[LocalSessionStore] = None) -> None:
+    """Run one GCC extraction, reporting progress into its session hash (in Redis unless a store is given)"""
+    from autoquest.gcc import FinalPerfectGCCExtractor
+
+    client = store if store is not None else redis.from_url(settings.redis_url, decode_responses=True)
+    debug_port = params.get("debug_port", 9222)
+    finished = Event()
+    update_session(client, session_id, status="running")
+    try:
+        extractor = FinalPerfectGCCExtractor(
+            input_file=params["input_file"],
+            output_file=params["output_file"],
+            template_file=params["template_file"],
+        )
+        extractor.debug_port = debug_port
+        update_session(
+            client, session_id,
+            log_file=str(Path("storage") / "logs" / extractor.log_file),
+            db_file=extractor.db_file,
+        )
+        Thread(
+            target=_watch_stop, args=(client, session_id, debug_port, extractor.shutdown_event, finished), daemon=True
+        ).start()
+
+        success = extractor.run_final_perfect_gcc_extraction()
+        update_session(client, session_id, status="completed" if success else "failed")
+    except Exception as e:
+        update_session(client, session_id, status="failed", error=str(e))
+    finally:
+        finished.set()
+        release_lock(client, debug_port, session_id)
+
+
+if celery_app is not None:
+    @celery_app.task(name="gcc.extract")
+    def extract_task(session_id: str, params: Dict) -> None:
+        run_extraction(session_id, params)
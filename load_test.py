@@ -1,116 +1,133 @@
-from locust import HttpUser, task, between
+from locust import task, between
+from locust.contrib.fasthttp import FastHttpUser
+import itertools
 import json
 import random
 
+try:
+    import orjson
 
-class RAGbotUser(HttpUser):
+    def _json_body(payload) -> bytes:
+        return orjson.dumps(payload)
+except ImportError:  # orjson is optional; stdlib json produces the same body
+    def _json_body(payload) -> bytes:
+        return json.dumps(payload).encode()
+
+
+# Question pools and fixed payload fields, built once instead of per task call
+QUESTIONS = (
+    "What is artificial intelligence?",
+    "How does machine learning work?",
+    "What are the benefits of deep learning?",
+    "Explain neural networks",
+    "What is natural language processing?",
+    "How do transformers work?",
+    "What is computer vision?",
+    "Explain reinforcement learning",
+)
+CHAT_MESSAGES = tuple(
+    [{"role": "user", "content": message}]
+    for message in (
+        "Hello, how can you help me?",
+        "What is the difference between AI and ML?",
+        "Can you explain deep learning?",
+        "What are the latest trends in AI?",
+        "How do I get started with machine learning?",
+    )
+)
+SEARCH_QUERIES = (
+    "machine learning algorithms",
+    "neural network architecture",
+    "deep learning frameworks",
+    "AI applications",
+    "data science techniques",
+)
+BATCH_QUESTIONS = [
+    {"question": "What is AI?", "question_type": "factual"},
+    {"question": "Compare ML vs DL", "question_type": "comparative"},
+    {"question": "Summarize AI benefits", "question_type": "summarization"},
+]
+
+_ASK_PAYLOAD = {
+    "question_type": "factual",
+    "top_k": 5,
+    "similarity_threshold": 0.7,
+    "include_sources": True,
+    "max_answer_length": 300,
+    "temperature": 0.7,
+}
+_CHAT_PAYLOAD = {"top_k": 3, "include_context": True}
+_SEARCH_PAYLOAD = {"top_k": 10, "filters": {}}
+
+# Per-worker id sequences; next() is atomic under the GIL
+_CONV_COUNTER = itertools.count(1)
+_BATCH_COUNTER = itertools.count(1)
+
+
+class RAGbotUser(FastHttpUser):
     wait_time = between(1, 3)
+    network_timeout = 30
+    connection_timeout = 5
     
     def on_start(self):
         """Set up authentication token"""
         self.token = "test-token-123"
         self.headers = {"Authorization": f"Bearer {self.token}"}
+        # Bodies are pre-serialized, so the client is told the content type directly
+        self.json_headers = {**self.headers, "Content-Type": "application/json"}
     
     @task(3)
     def ask_question(self):
         """Test question answering endpoint"""
-        questions = [
-            "What is artificial intelligence?",
-            "How does machine learning work?",
-            "What are the benefits of deep learning?",
-            "Explain neural networks",
-            "What is natural language processing?",
-            "How do transformers work?",
-            "What is computer vision?",
-            "Explain reinforcement learning"
-        ]
-        
-        payload = {
-            "question": random.choice(questions),
-            "question_type": "factual",
-            "top_k": 5,
-            "similarity_threshold": 0.7,
-            "include_sources": True,
-            "max_answer_length": 300,
-            "temperature": 0.7
-        }
+        payload = {"question": random.choice(QUESTIONS), **_ASK_PAYLOAD}
         
         self.client.post(
             "/ask",
-            json=payload,
-            headers=self.headers,
+            data=_json_body(payload),
+            headers=self.json_headers,
             name="/ask - factual question"
         )
     
     @task(2)
     def chat_interaction(self):
         """Test chat endpoint"""
-        messages = [
-            "Hello, how can you help me?",
-            "What is the difference between AI and ML?",
-            "Can you explain deep learning?",
-            "What are the latest trends in AI?",
-            "How do I get started with machine learning?"
-        ]
-        
         payload = {
-            "messages": [
-                {"role": "user", "content": random.choice(messages)}
-            ],
-            "conversation_id": f"conv_{random.randint(1000, 9999)}",
-            "top_k": 3,
-            "include_context": True
+            "messages": random.choice(CHAT_MESSAGES),
+            "conversation_id": "conv_" + str(next(_CONV_COUNTER)),
+            **_CHAT_PAYLOAD,
         }
         
         self.client.post(
             "/chat",
-            json=payload,
-            headers=self.headers,
+            data=_json_body(payload),
+            headers=self.json_headers,
             name="/chat - user message"
         )
     
     @task(1)
     def search_documents(self):
         """Test search endpoint"""
-        queries = [
-            "machine learning algorithms",
-            "neural network architecture",
-            "deep learning frameworks",
-            "AI applications",
-            "data science techniques"
-        ]
-        
-        payload = {
-            "query": random.choice(queries),
-            "top_k": 10,
-            "filters": {}
-        }
+        payload = {"query": random.choice(SEARCH_QUERIES), **_SEARCH_PAYLOAD}
         
         self.client.post(
             "/search",
-            json=payload,
-            headers=self.headers,
+            data=_json_body(payload),
+            headers=self.json_headers,
             name="/search - document search"
         )
     
     @task(1)
     def batch_questions(self):
         """Test batch processing endpoint"""
-        batch_questions = [
-            {"question": "What is AI?", "question_type": "factual"},
-            {"question": "Compare ML vs DL", "question_type": "comparative"},
-            {"question": "Summarize AI benefits", "question_type": "summarization"}
-        ]
-        
         payload = {
-            "questions": batch_questions,
-            "batch_id": f"batch_{random.randint(1000, 9999)}"
+            "questions": BATCH_QUESTIONS,
+            "batch_id": "batch_" + str(next(_BATCH_COUNTER))
         }
         
         self.client.post(
             "/batch",
-            json=payload,
-            headers=self.headers,
+            data=_json_body(payload),
+            headers=self.json_headers,
             name="/batch - multiple questions"
         )
     
@@ -130,9 +147,11 @@ class RAGbotUser(HttpUser):
         self.client.get("/stats", headers=self.headers, name="/stats")
 
 
-class RAGbotAdminUser(HttpUser):
+class RAGbotAdminUser(FastHttpUser):
     wait_time = between(5, 10)
     weight = 1  # Lower weight for admin operations
+    network_timeout = 30
+    connection_timeout = 5
     
     def on_start(self):
         """Set up authentication token"""
@@ -171,23 +190,41 @@ class RAGbotAdminUser(HttpUser):
 
 # Custom events for monitoring
 from locust import events
+from collections import Counter
+import logging
+import logging.handlers
+import queue
+
+# Failures are handed to a listener through a queue so greenlets never block on a stdout flush
+logger = logging.getLogger("ragbot.loadtest")
+logger.setLevel(logging.INFO)
+logger.propagate = False
+_log_queue = queue.Queue(-1)
+logger.addHandler(logging.handlers.QueueHandler(_log_queue))
+_log_listener = logging.handlers.QueueListener(_log_queue, logging.StreamHandler())
+
+# Outcome tallies; per-request latencies are already in Locust's own stats
+request_counts = Counter()
 
 @events.request.add_listener
 def my_request_handler(request_type, name, response_time, response_length, response, context, exception, start_time, url, **kwargs):
     """Custom request handler for detailed monitoring"""
     if exception:
-        print(f"Request failed: {name} - {exception}")
+        request_counts["failed"] += 1
+        logger.warning(f"Request failed: {name} - {exception}")
     else:
-        print(f"Request successful: {name} - {response_time}ms")
+        request_counts["ok"] += 1
 
 
 @events.test_start.add_listener
 def on_test_start(environment, **kwargs):
     """Called when a test is starting"""
+    _log_listener.start()
     print("Load test starting...")
 
 
 @events.test_stop.add_listener
 def on_test_stop(environment, **kwargs):
     """Called when a test is ending"""
-    print("Load test completed!") 
\ No newline at end of file
+    _log_listener.stop()
+    print(f"Load test completed! {request_counts['ok']} successful, {request_counts['failed']} failed requests") 
\ No newline at end of file
@@ -1,21 +1,417 @@
+import asyncio
+import hashlib
+import logging
+import math
+import os
+from functools import lru_cache
+from threading import Lock
+
 from sentence_transformers import SentenceTransformer
 import faiss
 import numpy as np
+import torch
+
+try:
+    import simsimd
+except ImportError:  # simsimd is optional; the brute-force tier falls back to a numpy matmul
+    simsimd = None
+
+try:
+    from optimum.bettertransformer import BetterTransformer
+except ImportError:  # optimum is optional; the encoder keeps the stock attention
+    BetterTransformer = None
+
+try:
+    from optimum.onnxruntime import ORTModelForFeatureExtraction, ORTQuantizer
+    from optimum.onnxruntime.configuration import AutoQuantizationConfig
+    from transformers import AutoTokenizer
+except ImportError:  # optimum[onnxruntime] is optional; LocalRAG(quantized=True) falls back to PyTorch
+    ORTModelForFeatureExtraction = None
+
+logger = logging.getLogger(__name__)
+
+MODEL_NAME = "all-MiniLM-L6-v2"
+ONNX_MODEL_DIR = "./models/all-MiniLM-L6-v2-onnx"
+
+ENCODE_BATCH_SIZE = 64
+
+# MiniLM was trained on 128-token inputs; longer docs are indexed as overlapping word windows instead
+MAX_SEQ_LENGTH = 128
+CHUNK_WORDS = 100
+CHUNK_OVERLAP = 20
+
+# faiss-gpu builds expose StandardGpuResources; the pinned faiss-cpu doesn't
+FAISS_GPU = hasattr(faiss, "StandardGpuResources") and faiss.get_num_gpus() > 0
+if FAISS_GPU:
+    import faiss.contrib.torch_utils  # noqa: F401 - lets indexes search CUDA tensors in place
+
+# Bump when the on-disk index layout changes (metric, factory string) so stale caches are rebuilt
+CACHE_VERSION = 3
+
+# Query memoization: exact-text embedding LRU, then a result cache matched by embedding distance
+QUERY_CACHE_SIZE = 4096
+RESULT_CACHE_SIZE = 4096
+# Squared L2 between unit vectors is 2 - 2*cos, so 0.02 reuses results for queries with cos > 0.99
+RESULT_CACHE_TAU = 0.02
+
+# Below this many chunks the unit-length embedding matrix is scanned directly instead of through faiss;
+# it must stay high enough for IVF-PQ training (~39 vectors per list, nlist = 4*sqrt(n))
+BRUTE_FORCE_MAX_DOCS = 50_000
+
+def configure_cpu_threads(threads=None):
+    """Opt-in: size torch and faiss thread pools to `threads` (default: every core); containers often default to one.
+
+    The OMP/MKL variables are only defaults for runtimes loaded later (e.g. worker processes); explicit settings win.
+    """
+    threads = threads or os.cpu_count() or 1
+    os.environ.setdefault("OMP_NUM_THREADS", str(threads))
+    os.environ.setdefault("MKL_NUM_THREADS", str(threads))
+    os.environ.setdefault("KMP_AFFINITY", "granularity=fine,compact,1,0")
+    torch.set_num_threads(threads)
+    faiss.omp_set_num_threads(threads)
+
+class QuantizedEncoder:
+    """int8 ONNX Runtime drop-in for SentenceTransformer.encode: mean pooling + L2 norm, like all-MiniLM-L6-v2"""
+
+    def __init__(self, model_dir=ONNX_MODEL_DIR, max_seq_length=MAX_SEQ_LENGTH):
+        self.max_seq_length = max_seq_length
+        int8_dir = os.path.join(model_dir, "int8")
+        if not os.path.exists(os.path.join(int8_dir, "model_quantized.onnx")):
+            # One-time export and dynamic (weight-only) int8 quantization for VNNI cores
+            fp32_dir = os.path.join(model_dir, "fp32")
+            hub_name = f"sentence-transformers/{MODEL_NAME}"
+            ORTModelForFeatureExtraction.from_pretrained(hub_name, export=True).save_pretrained(fp32_dir)
+            qconfig = AutoQuantizationConfig.avx512_vnni(is_static=False, per_channel=False)
+            ORTQuantizer.from_pretrained(fp32_dir).quantize(save_dir=int8_dir, quantization_config=qconfig)
+            AutoTokenizer.from_pretrained(hub_name).save_pretrained(int8_dir)
+        self.model = ORTModelForFeatureExtraction.from_pretrained(int8_dir, file_name="model_quantized.onnx")
+        self.tokenizer = AutoTokenizer.from_pretrained(int8_dir)
+
+    def encode(self, sentences, batch_size=ENCODE_BATCH_SIZE, convert_to_numpy=True, **kwargs):
+        # Batch similar lengths together so each batch pads to little more than its own texts
+        order = np.argsort([len(sentence) for sentence in sentences], kind="stable")
+        chunks = []
+        for start in range(0, len(sentences), batch_size):
+            tokens = self.tokenizer(
+                [sentences[i] for i in order[start:start + batch_size]], padding=True, truncation=True,
+                max_length=self.max_seq_length, return_tensors="np",
+            )
+            hidden = self.model(**tokens).last_hidden_state
+            mask = tokens["attention_mask"][..., None].astype(np.float32)
+            pooled = (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+            chunks.append(pooled / np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None))
+        if not chunks:
+            return np.empty((0, self.model.config.hidden_size), dtype=np.float32)
+        embeddings = np.empty((len(sentences), chunks[0].shape[1]), dtype=np.float32)
+        embeddings[order] = np.concatenate(chunks)
+        return embeddings
 
 class LocalRAG:
-    def __init__(self, docs):
+    def __init__(self, docs, nprobe=16, cache_dir="./vector_db/local_rag", quantized=False, compile_model=False,
+                 cpu_threads=None):
+        # Thread pools are process-wide, so they are only touched when the caller asks
+        if cpu_threads is not None:
+            configure_cpu_threads(cpu_threads)
         self.docs = docs
-        self.embedder = SentenceTransformer("all-MiniLM-L6-v2")
+        self.nprobe = nprobe
+        self.cache_dir = cache_dir
+        if quantized and ORTModelForFeatureExtraction is not None:
+            self.device = "cpu"
+            self.embedder = QuantizedEncoder()
+            self.encoder_name = f"{MODEL_NAME}-int8"
+        else:
+            self.device = "cuda" if torch.cuda.is_available() else "cpu"
+            self.embedder = SentenceTransformer(MODEL_NAME, device=self.device)
+            self.encoder_name = MODEL_NAME
+            if self.device == "cuda":
+                # FP16 weights run on tensor cores; index vectors stay float32
+                self.embedder.half()
+                self.encoder_name = f"{MODEL_NAME}-fp16"
+            self.embedder.max_seq_length = MAX_SEQ_LENGTH
+            self._optimize_backbone(compile_model)
+        # With GPU faiss the corpus is searched exactly on the device, fed straight from the encoder's tensors
+        self.gpu_index = self.device == "cuda" and FAISS_GPU
         self.index = None
-        self.doc_embeddings = None
+        self.doc_embeddings = None  # One row per chunk
+        self._chunks, self._chunk_to_doc = self._chunk_docs()
+        self._max_chunks_per_doc = int(np.bincount(self._chunk_to_doc).max()) if len(self._chunk_to_doc) else 1
         self.build_index()
+        
+        self._encode_query = lru_cache(maxsize=QUERY_CACHE_SIZE)(self._encode_query_uncached)
+        self.result_cache_tau = RESULT_CACHE_TAU
+        self._result_cache_lock = Lock()
+        self._result_cache_index = faiss.IndexFlatL2(self.doc_embeddings.shape[1])
+        self._result_cache_values = []  # (k, docs) per vector in _result_cache_index
+        
+        # Pay kernel selection and faiss's lazy first-search allocations now, not on the first request;
+        # bypasses the query caches so "warmup" never becomes a cached answer
+        self._search(self._encode(["warmup"]), 1)
+
+    def _optimize_backbone(self, compile_model):
+        """Fused attention via BetterTransformer, plus torch.compile when asked (its cost is paid by the warm-up)"""
+        transformer = self.embedder[0]
+        if BetterTransformer is not None:
+            try:
+                transformer.auto_model = BetterTransformer.transform(transformer.auto_model)
+            except Exception as e:
+                logger.warning(f"BetterTransformer unavailable for {MODEL_NAME}: {e}")
+        if compile_model:
+            # Sequence lengths vary per batch, so compile for dynamic shapes rather than one graph per length
+            transformer.auto_model = torch.compile(transformer.auto_model, dynamic=True)
+
+    def _encode(self, texts):
+        """Unit-length float32 C-order embeddings for texts"""
+        if self.device == "cuda":
+            # Stack on the device and cross to the host once, not once per text
+            embeddings = self.embedder.encode(
+                texts, batch_size=ENCODE_BATCH_SIZE, convert_to_tensor=True,
+                normalize_embeddings=True, show_progress_bar=False,
+            ).float().cpu().numpy()
+        else:
+            embeddings = self.embedder.encode(
+                texts, batch_size=ENCODE_BATCH_SIZE, convert_to_numpy=True,
+                normalize_embeddings=True, show_progress_bar=False,
+            )
+        # Already float32 C-order from the encoders; this only copies if that ever changes
+        return np.ascontiguousarray(embeddings, dtype=np.float32)
+
+    def _encode_tensor(self, texts):
+        """Unit-length float32 embeddings left on the GPU for a GPU index"""
+        return self.embedder.encode(
+            texts, batch_size=ENCODE_BATCH_SIZE, convert_to_tensor=True,
+            normalize_embeddings=True, show_progress_bar=False,
+        ).float().contiguous()
+
+    def _make_index(self, d, n):
+        """Sub-linear inner-product index: OPQ+IVF(HNSW quantizer)+PQ; smaller CPU corpora never get here (brute force)"""
+        # Embeddings are unit length, so inner product ranks exactly like L2 and cosine
+        if self.gpu_index:
+            # HNSW and the OPQ/HNSW-quantizer IVF have no GPU implementation; brute force on the GPU is exact and fast
+            return faiss.IndexFlatIP(d)
+        nlist = int(4 * math.sqrt(n))
+        return faiss.index_factory(d, f"OPQ32_64,IVF{nlist}_HNSW32,PQ32", faiss.METRIC_INNER_PRODUCT)
+
+    def _chunk_docs(self):
+        """Split docs longer than CHUNK_WORDS into overlapping word windows; returns (chunks, parent doc per chunk)"""
+        chunks, parents = [], []
+        step = CHUNK_WORDS - CHUNK_OVERLAP
+        for doc_id, doc in enumerate(self.docs):
+            words = doc.split()
+            if len(words) <= CHUNK_WORDS:
+                chunks.append(doc)
+                parents.append(doc_id)
+                continue
+            for start in range(0, len(words) - CHUNK_OVERLAP, step):
+                chunks.append(" ".join(words[start:start + CHUNK_WORDS]))
+                parents.append(doc_id)
+        return chunks, np.asarray(parents, dtype=np.int64)
+
+    def _hits_to_docs(self, chunk_ids, k):
+        """The first k distinct parent docs of ranked chunk hits"""
+        docs, seen = [], set()
+        for chunk_id in chunk_ids:
+            if chunk_id < 0:  # faiss pads with -1 when asked for more hits than it has
+                break
+            doc_id = int(self._chunk_to_doc[chunk_id])
+            if doc_id not in seen:
+                seen.add(doc_id)
+                docs.append(self.docs[doc_id])
+                if len(docs) == k:
+                    break
+        return docs
+
+    def _fetch_k(self, k):
+        """Chunk hits to request so that k distinct docs are guaranteed even if every doc's chunks cluster"""
+        return min(k * self._max_chunks_per_doc, max(len(self._chunks), 1))
+
+    def _brute_force(self):
+        """True when the corpus is small enough to scan the embedding matrix without an index"""
+        return not self.gpu_index and len(self._chunks) < BRUTE_FORCE_MAX_DOCS
+
+    def _cache_paths(self):
+        """(index, embeddings) paths keyed by the model and corpus, or None when caching is off"""
+        if not self.cache_dir:
+            return None
+        key = hashlib.blake2b((
+            f"{self.encoder_name}\0{self.gpu_index}\0{CACHE_VERSION}\0{CHUNK_WORDS}/{CHUNK_OVERLAP}/{MAX_SEQ_LENGTH}\0"
+            + "\0".join(self.docs)
+        ).encode(), digest_size=20).hexdigest()
+        base = os.path.join(self.cache_dir, key)
+        return f"{base}.faiss", f"{base}.npy"
+
+    def _load_cached(self, paths):
+        """Memory-map a previously built index and its embeddings; False if there is none"""
+        index_path, emb_path = paths
+        brute_force = self._brute_force()
+        if not os.path.exists(emb_path) or not (brute_force or os.path.exists(index_path)):
+            return False
+        if brute_force:
+            self.index = None
+        else:
+            try:
+                self.index = faiss.read_index(index_path, faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY)
+            except RuntimeError:  # Index types without mmap support are read into memory
+                self.index = faiss.read_index(index_path)
+        self.doc_embeddings = np.load(emb_path, mmap_mode="r")
+        return True
+
+    def _save_cached(self, paths):
+        """Write the index and embeddings, each via a temp file so readers never see a partial one"""
+        index_path, emb_path = paths
+        os.makedirs(self.cache_dir, exist_ok=True)
+        if self.index is not None:
+            faiss.write_index(self.index, index_path + ".tmp")
+            os.replace(index_path + ".tmp", index_path)
+        with open(emb_path + ".tmp", "wb") as f:
+            np.save(f, self.doc_embeddings)
+        os.replace(emb_path + ".tmp", emb_path)
 
     def build_index(self):
-        self.doc_embeddings = self.embedder.encode(self.docs, convert_to_numpy=True)
-        self.index = faiss.IndexFlatL2(self.doc_embeddings.shape[1])
-        self.index.add(self.doc_embeddings)
+        paths = self._cache_paths()
+        if paths is None or not self._load_cached(paths):
+            self.doc_embeddings = self._encode(self._chunks)
+            faiss.normalize_L2(self.doc_embeddings)
+            if self._brute_force():
+                self.index = None
+            else:
+                n, d = self.doc_embeddings.shape
+                self.index = self._make_index(d, n)
+                if not self.index.is_trained:
+                    self.index.train(self.doc_embeddings)
+                self.index.add(self.doc_embeddings)
+            if paths is not None:
+                self._save_cached(paths)
+        if self.gpu_index:
+            self.index = faiss.index_cpu_to_all_gpus(self.index)
+        elif self.index is not None:
+            faiss.extract_index_ivf(self.index).nprobe = self.nprobe
+
+    def _search(self, query_vecs, k):
+        """(scores, ids) of the top k docs per query, best first"""
+        if self.index is not None:
+            return self.index.search(query_vecs, k)
+        # Unit vectors: the dot product is the cosine similarity, one SIMD sweep over the contiguous matrix
+        if simsimd is not None:
+            scores = np.asarray(simsimd.cdist(query_vecs, self.doc_embeddings, metric="dot"), dtype=np.float32)
+        else:
+            scores = query_vecs @ self.doc_embeddings.T
+        # O(N) selection of the k best, then sort only those k
+        if k < scores.shape[1]:
+            ids = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        else:
+            ids = np.broadcast_to(np.arange(scores.shape[1]), scores.shape)
+        top = np.take_along_axis(scores, ids, axis=1)
+        order = np.argsort(-top, axis=1)
+        return np.take_along_axis(top, order, axis=1), np.take_along_axis(ids, order, axis=1)
+
+    def _encode_query_uncached(self, query):
+        query_vec = self._encode([query])
+        query_vec.flags.writeable = False  # Shared by every caller through the LRU
+        return query_vec
+
+    def _cached_result(self, query_vec, k):
+        """Docs stored for a near-identical earlier query, or None"""
+        with self._result_cache_lock:
+            if not self._result_cache_index.ntotal:
+                return None
+            D, I = self._result_cache_index.search(query_vec, 1)
+            if D[0][0] >= self.result_cache_tau:
+                return None
+            cached_k, docs = self._result_cache_values[I[0][0]]
+        return docs[:k] if cached_k >= k else None
+
+    def _store_result(self, query_vec, k, docs):
+        with self._result_cache_lock:
+            if self._result_cache_index.ntotal:
+                # A near-identical query cached with a smaller k: widen its entry in place
+                D, I = self._result_cache_index.search(query_vec, 1)
+                if D[0][0] < self.result_cache_tau:
+                    self._result_cache_values[I[0][0]] = (k, docs)
+                    return
+            if self._result_cache_index.ntotal >= RESULT_CACHE_SIZE:
+                # FIFO eviction: rebuild from the newer half
+                keep = RESULT_CACHE_SIZE // 2
+                start = self._result_cache_index.ntotal - keep
+                newest = self._result_cache_index.reconstruct_n(start, keep)
+                self._result_cache_index.reset()
+                self._result_cache_index.add(newest)
+                self._result_cache_values = self._result_cache_values[start:]
+            self._result_cache_index.add(query_vec)
+            self._result_cache_values.append((k, docs))
 
     def retrieve(self, query, k=3):
-        query_vec = self.embedder.encode([query])
-        D, I = self.index.search(np.array(query_vec), k)
-        return [self.docs[i] for i in I[0]]
+        query_vec = self._encode_query(query)
+        docs = self._cached_result(query_vec, k)
+        if docs is None:
+            D, I = self._search(query_vec, self._fetch_k(k))
+            docs = self._hits_to_docs(I[0], k)
+            self._store_result(query_vec, k, docs)
+        return list(docs)
+
+    def retrieve_batch(self, queries, k=3):
+        """retrieve() for many queries with one encoder pass and one index search"""
+        if not queries:
+            return []
+        # Encode and search each distinct query once, then fan the results back out in input order
+        unique = list(dict.fromkeys(queries))
+        if self.gpu_index:
+            # Query embeddings never leave the device; only the ids come back
+            D, I = self.index.search(self._encode_tensor(unique), self._fetch_k(k))
+            I = I.tolist()
+        else:
+            D, I = self._search(self._encode(unique), self._fetch_k(k))
+        results = {query: self._hits_to_docs(row, k) for query, row in zip(unique, I)}
+        return [list(results[query]) for query in queries]
+
+
+class QueryCoalescer:
+    """Merges concurrent async retrieve calls arriving within max_wait_ms into one LocalRAG.retrieve_batch"""
+
+    def __init__(self, rag, max_batch=32, max_wait_ms=3):
+        self.rag = rag
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self._queue = None
+        self._worker = None
+
+    async def retrieve(self, query, k=3):
+        loop = asyncio.get_running_loop()
+        if self._worker is None or self._worker.done():
+            self._queue = asyncio.Queue()
+            self._worker = loop.create_task(self._run())
+        future = loop.create_future()
+        self._queue.put_nowait((query, k, future))
+        return await future
+
+    async def _next_batch(self):
+        """The first waiting request plus whatever else arrives before the window closes"""
+        loop = asyncio.get_running_loop()
+        batch = [await self._queue.get()]
+        deadline = loop.time() + self.max_wait
+        while len(batch) < self.max_batch:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._next_batch()
+            # One search at the widest k; each caller's top k is a prefix of it
+            k = max(k for _, k, _ in batch)
+            try:
+                # Encoding and search block, so they run off the event loop
+                results = await loop.run_in_executor(None, self.rag.retrieve_batch, [query for query, _, _ in batch], k)
+            except Exception as e:
+                for _, _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            for (_, k, future), docs in zip(batch, results):
+                if not future.done():
+                    future.set_result(docs[:k])
@@ -1,26 +1,33 @@
 import asyncio
 import time
 import logging
+from logging.handlers import RotatingFileHandler
 import structlog
 from datetime import datetime
 from typing import List, Optional, Dict
 import psutil
 import os
-import json
+import sys
+import orjson
 
-from fastapi import FastAPI, HTTPException, Depends, BackgroundTasks, UploadFile, File, Form
+from fastapi import FastAPI, HTTPException, Depends, UploadFile, File, Form, Query
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 from fastapi.middleware.trustedhost import TrustedHostMiddleware
-from fastapi.responses import JSONResponse, FileResponse
+from fastapi.responses import ORJSONResponse, FileResponse
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 import uvicorn
-from prometheus_client import Counter, Histogram, generate_latest, CONTENT_TYPE_LATEST
+import aiofiles
+from prometheus_client import Counter, Gauge, Histogram, generate_latest, CONTENT_TYPE_LATEST
 from starlette.middleware.base import BaseHTTPMiddleware
 from starlette.requests import Request
 from starlette.responses import Response
 from pathlib import Path
+from functools import lru_cache
+from contextlib import asynccontextmanager
 import uuid
 import shutil
+import tempfile
 import time
 
 from config import settings
@@ -28,6 +35,10 @@ import sentry_sdk
 from sentry_sdk.integrations.asgi import SentryAsgiMiddleware
 from jose import jwt, JWTError
 import secrets
+import hashlib
+from cachetools import TTLCache, cached
+import redis
+import redis.asyncio as aioredis
 from autoquest.api.schemas.core import (
     QuestionRequest, AnswerResponse, ChatRequest, ChatResponse,
     HealthResponse, ErrorResponse, BatchQuestionRequest, BatchAnswerResponse,
@@ -38,7 +49,12 @@ from ai_engine import AIEngine
 from document_processor import DocumentProcessor
 from autoquest.api.schemas.core import DocumentType
 from pydantic import BaseModel
-from autoquest.gcc import FinalPerfectGCCExtractor
+import gcc_tasks
+
+def _orjson_renderer(_, __, event_dict) -> str:
+    """structlog's JSONRenderer, encoded by orjson"""
+    return orjson.dumps(event_dict, default=str).decode()
+
 
 # Configure structured logging
 structlog.configure(
@@ -48,10 +64,11 @@ structlog.configure(
         structlog.stdlib.add_log_level,
         structlog.stdlib.PositionalArgumentsFormatter(),
         structlog.processors.TimeStamper(fmt="iso"),
-        structlog.processors.StackInfoRenderer(),
+        # Stack capture inspects frames on every call; only worth it while debugging
+        *([structlog.processors.StackInfoRenderer()] if settings.debug else []),
         structlog.processors.format_exc_info,
         structlog.processors.UnicodeDecoder(),
-        structlog.processors.JSONRenderer()
+        _orjson_renderer
     ],
     context_class=dict,
     logger_factory=structlog.stdlib.LoggerFactory(),
@@ -66,146 +83,63 @@ rag_system = AdvancedRAG()
 ai_engine = AIEngine()
 document_processor = DocumentProcessor()
 
-# GCC extractor session registry (in-memory)
-GCC_SESSIONS: Dict[str, Dict] = {}
-
-
-class GCCStartRequest(BaseModel):
-    input_file: Optional[str] = "solutions.xlsx"
-    output_file: Optional[str] = "solutions.xlsx"
-    template_file: Optional[str] = "template.xlsx"
-    debug_port: Optional[int] = 9222
-
+# Shared state for GCC sessions and rate limiting; connects lazily, and lifespan drops it if unreachable
+redis_client = aioredis.from_url(settings.redis_url, decode_responses=True) if settings.redis_url else None
 
-class GCCStartResponse(BaseModel):
-    session_id: str
-    status: str
-    input_file: str
-    output_file: str
-    template_file: str
 
+# Prometheus metrics
+REQUEST_COUNT = Counter('ragbot_requests_total', 'Total requests', ['method', 'endpoint'])
+REQUEST_LATENCY = Histogram('ragbot_request_duration_seconds', 'Request latency', ['method', 'endpoint'])
+ERROR_COUNT = Counter('ragbot_errors_total', 'Total errors', ['method', 'endpoint', 'error_type'])
 
-def _run_gcc_extractor(session_id: str):
-    session = GCC_SESSIONS.get(session_id)
-    if not session:
-        return
-    try:
-        session["status"] = "running"
-        session["updated_at"] = time.time()
-
-        extractor = FinalPerfectGCCExtractor(
-            input_file=session["input_file"],
-            output_file=session["output_file"],
-            template_file=session["template_file"],
-        )
-        extractor.debug_port = session.get("debug_port", 9222)
-        session["extractor"] = extractor
-        session["log_file"] = str(Path("storage") / "logs" / extractor.log_file)
-        session["db_file"] = extractor.db_file
-
-        success = extractor.run_final_perfect_gcc_extraction()
-        session["status"] = "completed" if success else "failed"
-        session["updated_at"] = time.time()
-    except Exception as e:
-        session["status"] = "failed"
-        session["error"] = str(e)
-        session["updated_at"] = time.time()
-
-
-@app.post("/gcc/start", response_model=GCCStartResponse)
-async def start_gcc_extraction(
-    request: GCCStartRequest,
-    background_tasks: BackgroundTasks,
-    token: str = Depends(verify_token)
-):
-    """Start the GCC extractor in the background.
-
-    Ensure Chrome is running with remote debugging: --remote-debugging-port=9222
-    """
-    try:
-        # Ensure input/template files exist or bootstrap from template
-        input_path = Path(request.input_file)
-        template_path = Path(request.template_file)
-
-        if not input_path.exists():
-            if template_path.exists():
-                shutil.copy2(template_path, input_path)
-            else:
-                raise HTTPException(status_code=400, detail="Neither input_file nor template_file exists")
-
-        session_id = f"gcc_{uuid.uuid4().hex[:12]}"
-        GCC_SESSIONS[session_id] = {
-            "status": "starting",
-            "created_at": time.time(),
-            "updated_at": time.time(),
-            "input_file": str(input_path),
-            "output_file": str(request.output_file or request.input_file),
-            "template_file": str(template_path),
-            "debug_port": request.debug_port or 9222,
-        }
-
-        background_tasks.add_task(_run_gcc_extractor, session_id)
-
-        return GCCStartResponse(
-            session_id=session_id,
-            status="starting",
-            input_file=str(input_path),
-            output_file=str(request.output_file or request.input_file),
-            template_file=str(template_path),
-        )
-    except HTTPException:
-        raise
-    except Exception as e:
-        logger.error("Failed to start GCC extractor", error=str(e))
-        raise HTTPException(status_code=500, detail="Failed to start GCC extraction")
-
+# Caps in-flight model generations; excess requests wait here instead of contending for the model
+GENERATION_LIMIT = settings.max_concurrent_generations or 4
+GENERATION_SEMAPHORE = asyncio.Semaphore(GENERATION_LIMIT)
+_generations_in_flight = 0  # Only touched on the event loop
+GENERATION_SLOTS = Gauge('ragbot_generation_slots_available', 'Free model generation slots')
+GENERATION_SLOTS.set_function(lambda: GENERATION_LIMIT - _generations_in_flight)
 
-@app.get("/gcc/status/{session_id}")
-async def gcc_status(session_id: str, token: str = Depends(verify_token)):
-    session = GCC_SESSIONS.get(session_id)
-    if not session:
-        raise HTTPException(status_code=404, detail="Session not found")
-    # Do not expose extractor object
-    return {k: v for k, v in session.items() if k != "extractor"}
+# Security
+security = HTTPBearer()
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Start the interaction writer and warm the models before serving; flush on shutdown"""
+    global _interaction_queue, redis_client
+    app.start_time = time.time()
 
-@app.post("/gcc/stop/{session_id}")
-async def gcc_stop(session_id: str, token: str = Depends(verify_token)):
-    session = GCC_SESSIONS.get(session_id)
-    if not session:
-        raise HTTPException(status_code=404, detail="Session not found")
-    extractor = session.get("extractor")
-    if extractor and hasattr(extractor, "shutdown_event"):
-        extractor.shutdown_event.set()
-        session["status"] = "stopping"
-        session["updated_at"] = time.time()
-        return {"status": "stopping"}
-    return {"status": session.get("status", "unknown")}
+    # Checked once: without a reachable Redis, rate limits and GCC sessions stay in this process
+    if redis_client is not None:
+        try:
+            await redis_client.ping()
+        except Exception as e:
+            logger.warning("Redis unreachable; using in-process GCC sessions and rate limits", error=str(e))
+            redis_client = None
+    os.makedirs(settings.temp_dir, exist_ok=True)
+
+    # Per-process file: rotation is not safe with several workers sharing one
+    log_dir = Path("storage") / "logs"
+    log_dir.mkdir(parents=True, exist_ok=True)
+    handler = RotatingFileHandler(
+        log_dir / f"interactions_{os.getpid()}.jsonl",
+        maxBytes=INTERACTION_LOG_MAX_BYTES, backupCount=5, encoding="utf-8",
+    )
+    interaction_logger.addHandler(handler)
+    interaction_logger.setLevel(logging.INFO)
+    _interaction_queue = asyncio.Queue(maxsize=INTERACTION_QUEUE_SIZE)
+    interaction_writer = asyncio.create_task(_write_interactions(_interaction_queue))
 
+    # First requests would otherwise pay for lazy kernel/graph initialization
+    await asyncio.gather(asyncio.to_thread(ai_engine.warmup), asyncio.to_thread(rag_system.warmup))
+    logger.info("RAGbot Pro starting up", version=settings.version)
 
-@app.get("/gcc/download/{filename}")
-async def gcc_download(filename: str, token: str = Depends(verify_token)):
-    # Whitelist only .xlsx and .db and .log under project root
-    allowed_suffixes = {".xlsx", ".db", ".log"}
-    file_path = Path(filename)
-    if not file_path.suffix.lower() in allowed_suffixes:
-        raise HTTPException(status_code=400, detail="Invalid file type")
-    if not file_path.exists():
-        # Also check under storage/logs/
-        alt = Path("storage") / "logs" / filename
-        if alt.exists():
-            file_path = alt
-        else:
-            raise HTTPException(status_code=404, detail="File not found")
-    return FileResponse(path=str(file_path), filename=file_path.name)
+    yield
 
-# Prometheus metrics
-REQUEST_COUNT = Counter('ragbot_requests_total', 'Total requests', ['method', 'endpoint'])
-REQUEST_LATENCY = Histogram('ragbot_request_duration_seconds', 'Request latency', ['method', 'endpoint'])
-ERROR_COUNT = Counter('ragbot_errors_total', 'Total errors', ['method', 'endpoint', 'error_type'])
+    interaction_writer.cancel()
+    while not _interaction_queue.empty():
+        interaction_logger.info(orjson.dumps(_interaction_queue.get_nowait(), default=str).decode())
+    logger.info("RAGbot Pro shutting down")
 
-# Security
-security = HTTPBearer()
 
 # Create FastAPI app
 app = FastAPI(
@@ -217,7 +151,9 @@ app = FastAPI(
         "data ingestion, intelligent automation, and resilient operations."
     ),
     docs_url="/docs" if settings.debug else None,
-    redoc_url="/redoc" if settings.debug else None
+    redoc_url="/redoc" if settings.debug else None,
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan,
 )
 
 # Add middleware
@@ -234,52 +170,81 @@ app.add_middleware(
     allowed_hosts=["*"]  # Configure appropriately for production
 )
 
+# Compress larger JSON payloads (/documents, /search, /batch); small responses aren't worth it
+app.add_middleware(GZipMiddleware, minimum_size=1024)
+
+
+@lru_cache(maxsize=1024)
+def _request_metrics(method: str, endpoint: str):
+    """Bound (counter, histogram) children for a route, resolved once per label pair"""
+    return (
+        REQUEST_COUNT.labels(method=method, endpoint=endpoint),
+        REQUEST_LATENCY.labels(method=method, endpoint=endpoint),
+    )
+
+
+@lru_cache(maxsize=1024)
+def _error_counter(method: str, endpoint: str, error_type: str):
+    return ERROR_COUNT.labels(method=method, endpoint=endpoint, error_type=error_type)
+
+
+def _endpoint_label(request: Request) -> str:
+    """Route template for metric labels, so path parameters don't multiply label sets"""
+    route = request.scope.get("route")
+    return route.path if route is not None else "unmatched"
+
 
 class MetricsMiddleware(BaseHTTPMiddleware):
     async def dispatch(self, request: Request, call_next):
-        start_time = time.time()
-        
-        # Record request
-        REQUEST_COUNT.labels(method=request.method, endpoint=request.url.path).inc()
+        start_time = time.perf_counter()
         
         try:
             response = await call_next(request)
             return response
         except Exception as e:
-            ERROR_COUNT.labels(
-                method=request.method, 
-                endpoint=request.url.path, 
-                error_type=type(e).__name__
-            ).inc()
+            _error_counter(request.method, _endpoint_label(request), type(e).__name__).inc()
             raise
         finally:
-            duration = time.time() - start_time
-            REQUEST_LATENCY.labels(method=request.method, endpoint=request.url.path).observe(duration)
+            # The route is only resolved once the request has been dispatched
+            request_count, request_latency = _request_metrics(request.method, _endpoint_label(request))
+            request_count.inc()
+            request_latency.observe(time.perf_counter() - start_time)
 
 
 app.add_middleware(MetricsMiddleware)
-# Simple in-memory rate limiter (per token, per minute)
-RATE_LIMIT_BUCKETS: Dict[str, Dict[str, float]] = {}
+# Simple in-memory rate limiter (per token, per minute), used unless Redis rate limiting is enabled.
+# Entries outlive their one-minute window briefly, then expire, so idle tokens don't accumulate.
+RATE_LIMIT_BUCKETS: TTLCache = TTLCache(maxsize=100_000, ttl=120)
 
 class RateLimitMiddleware(BaseHTTPMiddleware):
     async def dispatch(self, request: Request, call_next):
         if request.url.path.startswith("/metrics") or request.url.path.startswith("/health"):
             return await call_next(request)
+        limit = settings.rate_limit_per_minute
+        if limit <= 0:
+            return await call_next(request)
         try:
             auth = request.headers.get("Authorization", "")
-            token = auth.split(" ")[-1] if auth else "anonymous"
-            limit = settings.rate_limit_per_minute
-            if limit <= 0:
-                return await call_next(request)
-            bucket = RATE_LIMIT_BUCKETS.get(token)
+            token = auth.rpartition(" ")[2] if auth else "anonymous"
+            # Key by a short digest so raw tokens are not kept in memory or Redis
+            token = hashlib.blake2b(token.encode(), digest_size=12).hexdigest()
             now = time.time()
             window = int(now // 60)
-            if not bucket or bucket.get("window") != window:
-                RATE_LIMIT_BUCKETS[token] = {"window": window, "count": 1}
+            if settings.enable_redis_rate_limit and redis_client is not None:
+                # Shared across workers: one counter per token per minute, expiring with the window
+                key = f"rl:{token}:{window}"
+                count = await redis_client.incr(key)
+                if count == 1:
+                    await redis_client.expire(key, 65)
             else:
-                RATE_LIMIT_BUCKETS[token]["count"] += 1
-            if RATE_LIMIT_BUCKETS[token]["count"] > limit:
-                return JSONResponse(status_code=429, content={"error": "Rate limit exceeded"})
+                bucket = RATE_LIMIT_BUCKETS.get(token)
+                if not bucket or bucket.get("window") != window:
+                    RATE_LIMIT_BUCKETS[token] = {"window": window, "count": 1}
+                else:
+                    RATE_LIMIT_BUCKETS[token]["count"] += 1
+                count = RATE_LIMIT_BUCKETS[token]["count"]
+            if count > limit:
+                return ORJSONResponse(status_code=429, content={"error": "Rate limit exceeded"})
         except Exception:
             pass
         return await call_next(request)
@@ -296,6 +261,12 @@ if settings.enable_sentry and settings.sentry_dsn:
         logger.warning("Failed to initialize Sentry", error=str(e))
 
 
+@lru_cache(maxsize=4096)
+def _decode_jwt(token: str) -> dict:
+    """Verify a JWT once per distinct token; failures raise and are not cached"""
+    return jwt.decode(token, settings.secret_key, algorithms=[settings.algorithm])
+
+
 # Dependency for authentication (optional JWT implementation)
 async def verify_token(credentials: HTTPAuthorizationCredentials = Depends(security), request: Request = None):
     if not credentials or not credentials.credentials:
@@ -304,7 +275,11 @@ async def verify_token(credentials: HTTPAuthorizationCredentials = Depends(secur
     # If SECRET_KEY is set and token seems like JWT, validate; else accept token as opaque string
     try:
         if token.count('.') == 2 and settings.secret_key:
-            payload = jwt.decode(token, settings.secret_key, algorithms=[settings.algorithm])
+            payload = _decode_jwt(token)
+            # A cached payload outlives the decode-time expiry check
+            exp = payload.get("exp")
+            if exp is not None and exp <= time.time():
+                raise HTTPException(status_code=401, detail="Invalid token")
             # Optional role enforcement
             if request is not None:
                 request.state.user_role = payload.get("role")
@@ -338,35 +313,49 @@ async def issue_token(req: TokenRequest):
 
 
 # Health check endpoint
+HEALTH_CACHE_SECONDS = 1.0
+_health_cache = {"at": 0.0, "value": None}
+
+
+def _collect_health() -> HealthResponse:
+    """Gather health figures; blocking reads, run off the event loop"""
+    # Get memory usage
+    memory = psutil.virtual_memory()
+    
+    # Get model status
+    model_status = ai_engine.get_model_status()
+    
+    # Get RAG system stats
+    rag_stats = rag_system.get_stats()
+    
+    # Get cache stats
+    cache_stats = ai_engine.get_cache_stats()
+    
+    return HealthResponse(
+        status="healthy",
+        version=settings.version,
+        uptime=time.time() - app.start_time if hasattr(app, 'start_time') else 0,
+        model_status=model_status,
+        vector_db_status=rag_stats.get("vector_db_type", "unknown"),
+        cache_status="enabled" if cache_stats["cache_enabled"] else "disabled",
+        memory_usage={
+            "total_gb": memory.total / (1024**3),
+            "available_gb": memory.available / (1024**3),
+            "percent_used": memory.percent
+        }
+    )
+
+
 @app.get("/health", response_model=HealthResponse)
 async def health_check():
-    """Get system health status"""
+    """Get system health status (cached for HEALTH_CACHE_SECONDS)"""
     try:
-        # Get memory usage
-        memory = psutil.virtual_memory()
-        
-        # Get model status
-        model_status = ai_engine.get_model_status()
-        
-        # Get RAG system stats
-        rag_stats = rag_system.get_stats()
-        
-        # Get cache stats
-        cache_stats = ai_engine.get_cache_stats()
-        
-        return HealthResponse(
-            status="healthy",
-            version=settings.version,
-            uptime=time.time() - app.start_time if hasattr(app, 'start_time') else 0,
-            model_status=model_status,
-            vector_db_status=rag_stats.get("vector_db_type", "unknown"),
-            cache_status="enabled" if cache_stats["cache_enabled"] else "disabled",
-            memory_usage={
-                "total_gb": memory.total / (1024**3),
-                "available_gb": memory.available / (1024**3),
-                "percent_used": memory.percent
-            }
-        )
+        now = time.monotonic()
+        if _health_cache["value"] is not None and now - _health_cache["at"] < HEALTH_CACHE_SECONDS:
+            return _health_cache["value"]
+        health = await asyncio.to_thread(_collect_health)
+        _health_cache.update(at=now, value=health)
+        return health
     except Exception as e:
         logger.error("Health check failed", error=str(e))
         raise HTTPException(status_code=500, detail="Health check failed")
@@ -379,11 +368,27 @@ async def metrics():
     return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
 
 
+async def _run_generation(method, *args):
+    """Run an ai_engine coroutine in a worker thread while holding a generation slot"""
+    global _generations_in_flight
+    async with GENERATION_SEMAPHORE:
+        _generations_in_flight += 1
+        try:
+            # ai_engine's coroutines run the models synchronously; a thread keeps the event loop free
+            return await asyncio.to_thread(asyncio.run, method(*args))
+        finally:
+            _generations_in_flight -= 1
+
+
+async def generate_answer(request: QuestionRequest, sources) -> AnswerResponse:
+    """ai_engine.generate_answer behind the generation concurrency cap"""
+    return await _run_generation(ai_engine.generate_answer, request, sources)
+
+
 # Question answering endpoint
 @app.post("/ask", response_model=AnswerResponse)
 async def ask_question(
     request: QuestionRequest,
-    background_tasks: BackgroundTasks,
     token: str = Depends(verify_token)
 ):
     """Ask a question and get an answer based on the knowledge base"""
@@ -408,16 +413,15 @@ async def ask_question(
             )
         
         # Generate answer
-        response = await ai_engine.generate_answer(request, sources)
+        response = await generate_answer(request, sources)
         
-        # Add background task for logging
-        background_tasks.add_task(log_interaction, request, response, token)
+        log_interaction(request, response, token)
         
         return response
         
     except Exception as e:
         logger.error("Error processing question", error=str(e), question=request.question)
-        ERROR_COUNT.labels(method="POST", endpoint="/ask", error_type=type(e).__name__).inc()
+        _error_counter("POST", "/ask", type(e).__name__).inc()
         raise HTTPException(status_code=500, detail="Failed to process question")
 
 
@@ -439,13 +443,13 @@ async def chat(
             )
         
         # Generate chat response
-        response = await ai_engine.generate_chat_response(request, sources)
+        response = await _run_generation(ai_engine.generate_chat_response, request, sources)
         
         return response
         
     except Exception as e:
         logger.error("Error in chat", error=str(e))
-        ERROR_COUNT.labels(method="POST", endpoint="/chat", error_type=type(e).__name__).inc()
+        _error_counter("POST", "/chat", type(e).__name__).inc()
         raise HTTPException(status_code=500, detail="Failed to generate chat response")
 
 
@@ -453,7 +457,6 @@ async def chat(
 @app.post("/batch", response_model=BatchAnswerResponse)
 async def batch_questions(
     request: BatchQuestionRequest,
-    background_tasks: BackgroundTasks,
     token: str = Depends(verify_token)
 ):
     """Process multiple questions in batch"""
@@ -464,14 +467,12 @@ async def batch_questions(
         answers = []
         errors = []
         
-        # Process questions concurrently
-        tasks = []
-        for question_request in request.questions:
-            task = asyncio.create_task(process_single_question(question_request))
-            tasks.append(task)
-        
-        # Wait for all tasks to complete
-        results = await asyncio.gather(*tasks, return_exceptions=True)
+        # Retrieve for all questions in one embedding/search pass, then generate concurrently
+        all_sources = await retrieve_for_batch(request.questions)
+        results = await asyncio.gather(
+            *(process_single_question(q, sources) for q, sources in zip(request.questions, all_sources)),
+            return_exceptions=True
+        )
         
         for i, result in enumerate(results):
             if isinstance(result, Exception):
@@ -483,8 +484,7 @@ async def batch_questions(
             else:
                 answers.append(result)
         
-        # Add background task for logging
-        background_tasks.add_task(log_batch_interaction, request, answers, errors, token)
+        log_batch_interaction(request, answers, errors, token)
         
         return BatchAnswerResponse(
             batch_id=batch_id,
@@ -497,17 +497,38 @@ async def batch_questions(
         
     except Exception as e:
         logger.error("Error in batch processing", error=str(e))
-        ERROR_COUNT.labels(method="POST", endpoint="/batch", error_type=type(e).__name__).inc()
+        _error_counter("POST", "/batch", type(e).__name__).inc()
         raise HTTPException(status_code=500, detail="Failed to process batch questions")
 
 
-async def process_single_question(question_request: QuestionRequest) -> AnswerResponse:
-    """Process a single question (for batch processing)"""
-    sources = await rag_system.retrieve(
-        query=question_request.question,
-        top_k=question_request.top_k,
-        similarity_threshold=question_request.similarity_threshold
-    )
+async def retrieve_for_batch(questions: List[QuestionRequest]) -> List:
+    """Sources per question, one retrieve_batch call per distinct (top_k, threshold).
+
+    A failed retrieval yields the exception in place of that group's sources.
+    """
+    groups: Dict[tuple, List[int]] = {}
+    for i, question_request in enumerate(questions):
+        groups.setdefault((question_request.top_k, question_request.similarity_threshold), []).append(i)
+
+    all_sources: List = [None] * len(questions)
+    for (top_k, similarity_threshold), positions in groups.items():
+        try:
+            batch = await rag_system.retrieve_batch(
+                [questions[i].question for i in positions],
+                top_k=top_k,
+                similarity_threshold=similarity_threshold
+            )
+        except Exception as e:
+            batch = [e] * len(positions)
+        for i, sources in zip(positions, batch):
+            all_sources[i] = sources
+    return all_sources
+
+
+async def process_single_question(question_request: QuestionRequest, sources) -> AnswerResponse:
+    """Answer a single question from its retrieved sources (for batch processing)"""
+    if isinstance(sources, Exception):
+        raise sources
     
     if not sources:
         return AnswerResponse(
@@ -519,10 +540,21 @@ async def process_single_question(question_request: QuestionRequest) -> AnswerRe
             question_type=question_request.question_type
         )
     
-    return await ai_engine.generate_answer(question_request, sources)
+    return await generate_answer(question_request, sources)
 
 
 # Document upload endpoint
+UPLOAD_CHUNK_SIZE = 1 << 20
+_DOC_TYPE_MAP = {
+    '.pdf': DocumentType.PDF,
+    '.docx': DocumentType.DOCX,
+    '.txt': DocumentType.TXT,
+    '.md': DocumentType.MD,
+    '.xlsx': DocumentType.XLSX,
+    '.csv': DocumentType.CSV
+}
+
+
 @app.post("/upload")
 async def upload_document(
     file: UploadFile = File(...),
@@ -532,52 +564,48 @@ async def upload_document(
     """Upload a document to the knowledge base"""
     try:
         # Validate file type
-        file_extension = os.path.splitext(file.filename)[1].lower()
+        file_extension = Path(file.filename).suffix.lower()
         if file_extension not in settings.supported_formats:
             raise HTTPException(
                 status_code=400, 
                 detail=f"Unsupported file type. Supported types: {settings.supported_formats}"
             )
         
-        # Validate file size
-        if file.size > settings.max_file_size:
-            raise HTTPException(
-                status_code=400,
-                detail=f"File too large. Maximum size: {settings.max_file_size / (1024*1024)}MB"
-            )
+        # Validate file size (clients may omit it; the streamed byte count below is authoritative)
+        too_large = f"File too large. Maximum size: {settings.max_file_size / (1024*1024)}MB"
+        if file.size is not None and file.size > settings.max_file_size:
+            raise HTTPException(status_code=413, detail=too_large)
         
         # Determine document type
-        doc_type_map = {
-            '.pdf': DocumentType.PDF,
-            '.docx': DocumentType.DOCX,
-            '.txt': DocumentType.TXT,
-            '.md': DocumentType.MD,
-            '.xlsx': DocumentType.XLSX,
-            '.csv': DocumentType.CSV
-        }
-        doc_type = doc_type_map.get(file_extension)
-        
-        # Save file temporarily
-        temp_path = f"temp/{file.filename}"
-        os.makedirs("temp", exist_ok=True)
-        
-        with open(temp_path, "wb") as buffer:
-            content = await file.read()
-            buffer.write(content)
+        doc_type = _DOC_TYPE_MAP.get(file_extension)
         
-        # Parse metadata
-        doc_metadata = {}
-        if metadata:
-            try:
-                doc_metadata = json.loads(metadata)
-            except json.JSONDecodeError:
-                logger.warning("Invalid metadata JSON", metadata=metadata)
-        
-        # Add document to RAG system
-        document_id = await rag_system.add_document(temp_path, doc_type, doc_metadata)
-        
-        # Clean up temp file
-        os.remove(temp_path)
+        # Save file temporarily: a private directory per upload keeps the original
+        # basename (used as the document's file name) without collisions or traversal
+        temp_dir = tempfile.mkdtemp(dir=settings.temp_dir)
+        temp_path = os.path.join(temp_dir, Path(file.filename).name)
+        try:
+            # Stream to disk so memory per upload stays at one chunk
+            size = 0
+            async with aiofiles.open(temp_path, "wb") as buffer:
+                while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+                    size += len(chunk)
+                    if size > settings.max_file_size:
+                        raise HTTPException(status_code=413, detail=too_large)
+                    await buffer.write(chunk)
+            
+            # Parse metadata
+            doc_metadata = {}
+            if metadata:
+                try:
+                    doc_metadata = orjson.loads(metadata)
+                except orjson.JSONDecodeError:
+                    logger.warning("Invalid metadata JSON", metadata=metadata)
+            
+            # Add document to RAG system
+            document_id = await rag_system.add_document(temp_path, doc_type, doc_metadata)
+        finally:
+            # Clean up temp file
+            shutil.rmtree(temp_dir, ignore_errors=True)
         
         return {
             "document_id": document_id,
@@ -586,18 +614,24 @@ async def upload_document(
             "status": "uploaded"
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error("Error uploading document", error=str(e), filename=file.filename)
-        ERROR_COUNT.labels(method="POST", endpoint="/upload", error_type=type(e).__name__).inc()
+        _error_counter("POST", "/upload", type(e).__name__).inc()
         raise HTTPException(status_code=500, detail="Failed to upload document")
 
 
 # Document management endpoints
 @app.get("/documents", response_model=List[DocumentInfo])
-async def list_documents(token: str = Depends(verify_token)):
-    """List all documents in the knowledge base"""
+async def list_documents(
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000),
+    token: str = Depends(verify_token)
+):
+    """List documents in the knowledge base, `limit` at a time starting at `skip`"""
     try:
-        return rag_system.list_documents()
+        return rag_system.list_documents(skip, limit)
     except Exception as e:
         logger.error("Error listing documents", error=str(e))
         raise HTTPException(status_code=500, detail="Failed to list documents")
@@ -657,7 +691,7 @@ async def search_documents(
         
     except Exception as e:
         logger.error("Error searching documents", error=str(e))
-        ERROR_COUNT.labels(method="POST", endpoint="/search", error_type=type(e).__name__).inc()
+        _error_counter("POST", "/search", type(e).__name__).inc()
         raise HTTPException(status_code=500, detail="Failed to search documents")
 
 
@@ -697,34 +731,246 @@ async def clear_cache(token: str = Depends(verify_token)):
         raise HTTPException(status_code=500, detail="Failed to clear cache")
 
 
-# Background tasks
-async def log_interaction(request: QuestionRequest, response: AnswerResponse, token: str):
-    """Log interaction for analytics"""
-    logger.info(
-        "Question answered",
-        question=request.question,
-        answer_length=len(response.answer),
-        confidence=response.confidence_score,
-        processing_time=response.processing_time,
-        model_used=response.model_used,
-        sources_count=len(response.sources)
+# GCC extraction endpoints
+class GCCStartRequest(BaseModel):
+    input_file: Optional[str] = "solutions.xlsx"
+    output_file: Optional[str] = "solutions.xlsx"
+    template_file: Optional[str] = "template.xlsx"
+    debug_port: Optional[int] = 9222
+
+
+class GCCStartResponse(BaseModel):
+    session_id: str
+    status: str
+    input_file: str
+    output_file: str
+    template_file: str
+
+
+_GCC_FLOAT_FIELDS = ("created_at", "updated_at")
+
+
+class _AsyncSessionStore:
+    """Awaitable facade over a LocalSessionStore, so the routes call it like redis.asyncio"""
+
+    def __init__(self, store: gcc_tasks.LocalSessionStore):
+        self.store = store
+
+    def __getattr__(self, name):
+        method = getattr(self.store, name)
+
+        async def call(*args, **kwargs):
+            return method(*args, **kwargs)
+        return call
+
+
+# Stands in for Redis when it was unreachable at startup; created on first use
+_local_gcc_store: Optional[_AsyncSessionStore] = None
+
+
+def _gcc_store():
+    """Where GCC sessions and port locks live: Redis, or this process's LocalSessionStore"""
+    global _local_gcc_store
+    if redis_client is not None:
+        return redis_client
+    if _local_gcc_store is None:
+        _local_gcc_store = _AsyncSessionStore(gcc_tasks.LocalSessionStore())
+    return _local_gcc_store
+
+
+def _submit_gcc_run(session_id: str, params: Dict, store) -> None:
+    """Hand an extraction to the Celery worker or the local process pool"""
+    local = store.store if isinstance(store, _AsyncSessionStore) else None
+    # Celery workers report into Redis, so in-process sessions always run locally
+    if gcc_tasks.celery_app is not None and local is None:
+        gcc_tasks.celery_app.send_task("gcc.extract", args=[session_id, params])
+        return
+
+    def _on_done(fut):
+        # A crashed worker process never reaches its own status update or lock release
+        if fut.exception() is not None:
+            client = local if local is not None else redis.from_url(settings.redis_url, decode_responses=True)
+            gcc_tasks.update_session(client, session_id, status="failed", error=str(fut.exception()))
+            gcc_tasks.release_lock(client, params["debug_port"], session_id)
+
+    gcc_tasks.submit_local(session_id, params, local).add_done_callback(_on_done)
+
+
+async def _get_gcc_session(session_id: str) -> Dict:
+    """Load a session hash, restoring the numeric fields"""
+    session = await _gcc_store().hgetall(gcc_tasks.session_key(session_id))
+    if not session:
+        raise HTTPException(status_code=404, detail="Session not found")
+    for field in _GCC_FLOAT_FIELDS:
+        if field in session:
+            session[field] = float(session[field])
+    if "debug_port" in session:
+        session["debug_port"] = int(session["debug_port"])
+    session.pop("stop_requested", None)
+    return session
+
+
+@app.post("/gcc/start", response_model=GCCStartResponse)
+async def start_gcc_extraction(
+    request: GCCStartRequest,
+    token: str = Depends(verify_token)
+):
+    """Start the GCC extractor in a worker process.
+
+    Ensure Chrome is running with remote debugging: --remote-debugging-port=9222
+    """
+    store = _gcc_store()
+    try:
+        # Ensure input/template files exist or bootstrap from template
+        input_path = Path(request.input_file)
+        template_path = Path(request.template_file)
+
+        if not input_path.exists():
+            if template_path.exists():
+                shutil.copy2(template_path, input_path)
+            else:
+                raise HTTPException(status_code=400, detail="Neither input_file nor template_file exists")
+
+        session_id = f"gcc_{uuid.uuid4().hex[:12]}"
+        params = {
+            "input_file": str(input_path),
+            "output_file": str(request.output_file or request.input_file),
+            "template_file": str(template_path),
+            "debug_port": request.debug_port or 9222,
+        }
+        # One run per Chrome debug session, whichever API worker receives the request
+        if not await store.set(gcc_tasks.lock_key(params["debug_port"]), session_id, nx=True, ex=gcc_tasks.LOCK_TTL):
+            raise HTTPException(
+                status_code=409,
+                detail=f"A GCC extraction is already running on debug port {params['debug_port']}",
+            )
+        key = gcc_tasks.session_key(session_id)
+        now = time.time()
+        try:
+            await store.hset(key, mapping={"status": "starting", "created_at": now, "updated_at": now, **params})
+            await store.expire(key, gcc_tasks.SESSION_TTL)
+            _submit_gcc_run(session_id, params, store)
+        except Exception:
+            await gcc_tasks.release_lock(store, params["debug_port"], session_id)
+            raise
+
+        return GCCStartResponse(
+            session_id=session_id,
+            status="starting",
+            input_file=str(input_path),
+            output_file=str(request.output_file or request.input_file),
+            template_file=str(template_path),
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error("Failed to start GCC extractor", error=str(e))
+        raise HTTPException(status_code=500, detail="Failed to start GCC extraction")
+
+
+@app.get("/gcc/status/{session_id}")
+async def gcc_status(session_id: str, token: str = Depends(verify_token)):
+    return await _get_gcc_session(session_id)
+
+
+@app.post("/gcc/stop/{session_id}")
+async def gcc_stop(session_id: str, token: str = Depends(verify_token)):
+    session = await _get_gcc_session(session_id)
+    if session.get("status") not in ("starting", "running"):
+        return {"status": session.get("status", "unknown")}
+    # The worker polls this flag and sets the extractor's shutdown event
+    await _gcc_store().hset(
+        gcc_tasks.session_key(session_id),
+        mapping={"stop_requested": 1, "status": "stopping", "updated_at": time.time()},
     )
+    return {"status": "stopping"}
+
+
+_ALLOWED_DOWNLOAD_SUFFIXES = frozenset({".xlsx", ".db", ".log"})
+# Searched in order; a download must resolve to a file inside one of them
+_DOWNLOAD_ROOTS = (Path(".").resolve(), (Path("storage") / "logs").resolve())
+
+
+@cached(TTLCache(maxsize=1024, ttl=5))
+def _resolve_download(filename: str) -> Optional[Path]:
+    """First existing file named `filename` under a download root; briefly memoized, misses included"""
+    for root in _DOWNLOAD_ROOTS:
+        target = (root / filename).resolve()
+        if target.is_relative_to(root) and target.is_file():
+            return target
+    return None
+
+
+@app.get("/gcc/download/{filename}")
+async def gcc_download(filename: str, token: str = Depends(verify_token)):
+    # Whitelist only .xlsx and .db and .log under project root or storage/logs
+    file_path = Path(filename)
+    if file_path.is_absolute() or ".." in file_path.parts:
+        raise HTTPException(status_code=400, detail="Invalid file path")
+    if file_path.suffix.lower() not in _ALLOWED_DOWNLOAD_SUFFIXES:
+        raise HTTPException(status_code=400, detail="Invalid file type")
+    file_path = _resolve_download(filename)
+    if file_path is None:
+        raise HTTPException(status_code=404, detail="File not found")
+    return FileResponse(path=str(file_path), filename=file_path.name)
 
 
-async def log_batch_interaction(
+# Interaction analytics: endpoints enqueue records and one task per worker writes them
+INTERACTION_QUEUE_SIZE = 10000
+INTERACTION_LOG_MAX_BYTES = 50 * 1024 * 1024
+interaction_logger = logging.getLogger("autoquest.interactions")
+interaction_logger.propagate = False
+_interaction_queue: Optional[asyncio.Queue] = None
+
+
+def _enqueue_interaction(record: Dict) -> None:
+    """Queue an analytics record; dropped if the writer is not running or is behind"""
+    if _interaction_queue is None:
+        return
+    record["timestamp"] = time.time()
+    try:
+        _interaction_queue.put_nowait(record)
+    except asyncio.QueueFull:
+        pass
+
+
+async def _write_interactions(queue: asyncio.Queue) -> None:
+    """Drain queued records as JSON lines, one file write per burst"""
+    while True:
+        batch = [await queue.get()]
+        while not queue.empty():
+            batch.append(queue.get_nowait())
+        lines = "\n".join(orjson.dumps(record, default=str).decode() for record in batch)
+        await asyncio.to_thread(interaction_logger.info, lines)
+
+
+def log_interaction(request: QuestionRequest, response: AnswerResponse, token: str):
+    """Log interaction for analytics"""
+    _enqueue_interaction({
+        "event": "Question answered",
+        "question": request.question,
+        "answer_length": len(response.answer),
+        "confidence": response.confidence_score,
+        "processing_time": response.processing_time,
+        "model_used": response.model_used,
+        "sources_count": len(response.sources),
+    })
+
+
+def log_batch_interaction(
     request: BatchQuestionRequest, 
     answers: List[AnswerResponse], 
     errors: List[ErrorResponse], 
     token: str
 ):
     """Log batch interaction for analytics"""
-    logger.info(
-        "Batch questions processed",
-        batch_id=request.batch_id,
-        total_questions=len(request.questions),
-        successful_answers=len(answers),
-        errors=len(errors)
-    )
+    _enqueue_interaction({
+        "event": "Batch questions processed",
+        "batch_id": request.batch_id,
+        "total_questions": len(request.questions),
+        "successful_answers": len(answers),
+        "errors": len(errors),
+    })
 
 
 # Error handlers
@@ -739,13 +985,9 @@ async def global_exception_handler(request: Request, exc: Exception):
         method=request.method
     )
     
-    ERROR_COUNT.labels(
-        method=request.method, 
-        endpoint=request.url.path, 
-        error_type=type(exc).__name__
-    ).inc()
+    _error_counter(request.method, _endpoint_label(request), type(exc).__name__).inc()
     
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=500,
         content={
             "error": "Internal server error",
@@ -755,25 +997,17 @@ async def global_exception_handler(request: Request, exc: Exception):
     )
 
 
-# Startup and shutdown events
-@app.on_event("startup")
-async def startup_event():
-    """Initialize application on startup"""
-    app.start_time = time.time()
-    logger.info("RAGbot Pro starting up", version=settings.version)
-
-
-@app.on_event("shutdown")
-async def shutdown_event():
-    """Cleanup on shutdown"""
-    logger.info("RAGbot Pro shutting down")
-
-
 if __name__ == "__main__":
+    # One worker unless WORKERS asks for more; see config.Settings.workers
+    workers = 1 if settings.debug else max(settings.workers, 1)
     uvicorn.run(
         "main:app",
         host=settings.host,
         port=settings.port,
-        reload=settings.debug,
+        # uvloop has no Windows build
+        loop="asyncio" if sys.platform == "win32" else "uvloop",
+        http="httptools",
+        workers=workers,
+        reload=settings.debug,  # debug forces a single worker, which reload requires
         log_level=settings.log_level.lower()
     ) 
\ No newline at end of file
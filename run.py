@@ -7,6 +7,7 @@ Run this script to start the RAGbot application.
 import os
 import sys
 import argparse
+import importlib.util
 from pathlib import Path
 
 def main():
@@ -33,13 +34,22 @@ def main():
         action="store_true",
         help="Enable debug mode"
     )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        help="Worker processes; overrides WORKERS from .env (default: 1; debug always runs one)"
+    )
     
     args = parser.parse_args()
     
     # Set environment variables
-    os.environ["PORT"] = str(args.port)
-    os.environ["HOST"] = args.host
-    os.environ["DEBUG"] = str(args.debug).lower()
+    os.environ.update({
+        "PORT": str(args.port),
+        "HOST": args.host,
+        "DEBUG": str(args.debug).lower(),
+    })
+    if args.workers is not None:
+        os.environ["WORKERS"] = str(args.workers)
     
     # Check if .env file exists, if not create from example
     if not Path(".env").exists() and Path("env.example").exists():
@@ -49,44 +59,73 @@ def main():
         print("Please edit .env file with your configuration before running again.")
         return
     
-    # Determine which app to run (FastAPI only)
-    if args.mode == "fastapi":
-        run_fastapi_app(args)
-    else:
-        run_fastapi_app(args)
+    # Check for required dependencies before anything heavy is imported
+    required_packages = ['fastapi', 'uvicorn', 'structlog', 'prometheus_client', 'httptools', 'orjson']
+    # uvloop has no Windows build
+    if sys.platform != "win32":
+        required_packages.append('uvloop')
+    # find_spec locates packages without executing them; the server imports them for real
+    missing_packages = [
+        package for package in required_packages
+        if package not in sys.modules and importlib.util.find_spec(package) is None
+    ]
+    
+    if missing_packages:
+        print(f"Missing required packages: {', '.join(missing_packages)}")
+        print("Please install them with: pip install -r requirements.txt")
+        raise ImportError(f"Missing packages: {missing_packages}")
+    
+    # FastAPI is the only mode; --mode is kept so existing invocations still parse
+    run_fastapi_app(args)
 
 def run_fastapi_app(args):
     """Run the FastAPI application"""
     print("Starting RAGbot Pro with FastAPI...")
     
-    # Check for required dependencies
-    required_packages = ['fastapi', 'uvicorn', 'structlog', 'prometheus_client']
-    missing_packages = []
+    # uvicorn imports the app from its path in each worker; importing it here would load the models twice
+    import uvicorn
     
-    for package in required_packages:
-        try:
-            __import__(package)
-        except ImportError:
-            missing_packages.append(package)
+    if args.debug:
+        # Reload needs a single worker
+        uvicorn.run(
+            "autoquest.api.app:app",
+            host=args.host,
+            port=args.port,
+            reload=True,
+            log_level="debug"
+        )
+        return
     
-    if missing_packages:
-        print(f"Missing required packages: {', '.join(missing_packages)}")
-        print("Please install them with: pip install -r requirements.txt")
-        raise ImportError(f"Missing packages: {missing_packages}")
+    # Settings.workers is the single worker-count knob (WORKERS, or --workers above)
+    from config import settings
+    workers = max(settings.workers, 1)
+    loop = "asyncio" if sys.platform == "win32" else "uvloop"
     
-    import uvicorn
-    from autoquest.api.app import app
+    if workers == 1:
+        # A single worker serves the app object directly, with a short graceful-shutdown window
+        from autoquest.api.app import app
+        config = uvicorn.Config(
+            app,
+            host=args.host,
+            port=args.port,
+            loop=loop,
+            http="httptools",
+            log_level="info",
+            timeout_graceful_shutdown=2
+        )
+        uvicorn.Server(config).run()
+        return
     
+    # Multiple workers need the import string
     uvicorn.run(
         "autoquest.api.app:app",
         host=args.host,
         port=args.port,
-        reload=args.debug,
-        log_level="debug" if args.debug else "info"
+        workers=workers,
+        loop=loop,
+        http="httptools",
+        log_level="info"
     )
 
-def run_flask_app(args):
-    raise RuntimeError("Flask mode has been removed. Use --mode fastapi")
-
 if __name__ == "__main__":
     main() 
\ No newline at end of file
@@ -3,17 +3,38 @@
 Start the AutoQuest frontend development server
 """
 
+import shlex
 import subprocess
+import shutil
 import sys
 import os
 from pathlib import Path
 
+# Resolved once so npm is exec'd directly rather than through a shell
+NPM = shutil.which("npm") or ("npm.cmd" if os.name == "nt" else "npm")
+
+def npm_install_command(frontend_dir):
+    """Dependency install command: `npm ci` from the npm cache when a lockfile exists.
+
+    Install scripts still run (esbuild needs its own). AUTOQUEST_NPM_INSTALL
+    overrides the npm arguments, e.g. "ci --ignore-scripts".
+    """
+    override = os.environ.get("AUTOQUEST_NPM_INSTALL")
+    if override:
+        return [NPM, *shlex.split(override)]
+    if os.access(frontend_dir / "package-lock.json", os.F_OK):
+        return [NPM, "ci", "--prefer-offline", "--no-audit", "--no-fund"]
+    return [NPM, "install", "--no-audit", "--no-fund"]
+
 def main():
     print("🎨 Starting AutoQuest Frontend...")
     print("=" * 50)
     
-    frontend_dir = Path("frontend")
-    if not frontend_dir.exists():
+    # Resolved once; the same absolute path is reused for every check and subprocess
+    frontend_dir = Path("frontend").resolve()
+    node_modules = frontend_dir / "node_modules"
+    # Existence probes use access(), which skips stat and never raises
+    if not os.access(frontend_dir, os.F_OK):
         print("❌ Frontend directory not found")
         return 1
     
@@ -21,10 +42,10 @@ def main():
         print("📦 Checking frontend dependencies...")
         
         # Check if node_modules exists
-        if not (frontend_dir / "node_modules").exists():
+        if not os.access(node_modules, os.F_OK):
             print("📦 Installing frontend dependencies...")
             try:
-                subprocess.run(["npm", "install"], cwd=frontend_dir, check=True, shell=True)
+                subprocess.run(npm_install_command(frontend_dir), cwd=str(frontend_dir), check=True)
             except subprocess.CalledProcessError as e:
                 print(f"❌ Failed to install dependencies: {e}")
                 return 1
@@ -39,12 +60,16 @@ def main():
         print("Press Ctrl+C to stop the server")
         print("=" * 50)
         
-        # Start the development server
+        # Same process group, so Ctrl+C reaches npm and vite directly; give them a moment to exit
+        proc = subprocess.Popen([NPM, "run", "dev"], cwd=str(frontend_dir))
         try:
-            subprocess.run(["npm", "run", "dev"], cwd=frontend_dir, shell=True)
-        except subprocess.CalledProcessError as e:
-            print(f"❌ Failed to start development server: {e}")
-            return 1
+            proc.wait()
+        except KeyboardInterrupt:
+            try:
+                proc.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+            raise
         
     except KeyboardInterrupt:
         print("\n👋 Frontend server stopped")
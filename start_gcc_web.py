@@ -4,20 +4,35 @@ AutoQuest GCC Web Interface Startup Script
 Launches both backend and frontend servers
 """
 
+import hashlib
+import importlib.metadata
+import json
 import subprocess
 import sys
-import time
 import os
-import signaln 
-import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from pathlib import Path
 
+from start_frontend import npm_install_command
+
+# Records a successful backend import, keyed by the GCC sources and the environment they ran in
+BACKEND_CACHE_FILE = Path(".autoquest_cache.json")
+# Distributions the GCC package imports; installing, upgrading or removing one invalidates the cache
+BACKEND_DISTRIBUTIONS = ("selenium", "pandas", "numpy", "openpyxl", "urllib3", "pydantic", "pydantic-settings")
+
+BANNER = (
+    "=" * 60 + "\n"
+    "🚀 AutoQuest GCC Web Interface\n"
+    + "=" * 60 + "\n"
+    "Starting backend and frontend servers...\n"
+    "\n"
+)
+
 def print_banner():
-    print("=" * 60)
-    print("🚀 AutoQuest GCC Web Interface")
-    print("=" * 60)
-    print("Starting backend and frontend servers...")
-    print()
+    # One write rather than a print() per line
+    sys.stdout.write(BANNER)
+    sys.stdout.flush()
 
 def check_dependencies():
     """Check if required files and dependencies exist"""
@@ -26,55 +41,98 @@ def check_dependencies():
     # Check required files
     required_files = ["solutions.xlsx", "template.xlsx"]
     for file in required_files:
-        if not Path(file).exists():
+        if not os.access(file, os.F_OK):
             print(f"⚠️  Warning: {file} not found")
         else:
             print(f"✅ {file} found")
     
-    # Check if frontend exists
-    if not Path("frontend").exists():
+    # Check if frontend exists (existence probes use access(), which skips stat and never raises)
+    if not os.access("frontend", os.F_OK):
         print("❌ Frontend directory not found")
         return False
     
     print("✅ Dependencies check complete")
     return True
 
+def _installed_version(distribution):
+    try:
+        return importlib.metadata.version(distribution)
+    except importlib.metadata.PackageNotFoundError:
+        return "missing"
+
+def _probe_hash():
+    """SHA256 over the interpreter, requirements, installed dependency versions and GCC sources"""
+    h = hashlib.sha256()
+    h.update(f"{sys.executable}\0{sys.version}\0".encode())
+    for distribution in BACKEND_DISTRIBUTIONS:
+        h.update(f"{distribution}={_installed_version(distribution)}\0".encode())
+    requirements = Path("requirements.txt")
+    if os.access(requirements, os.F_OK):
+        h.update(requirements.read_bytes())
+    for source in sorted(Path("autoquest/gcc").glob("*.py")):
+        h.update(source.name.encode())
+        h.update(source.read_bytes())
+    return h.hexdigest()
+
+def _cached_probe_ok(digest):
+    """True if the last successful probe ran against the same sources and environment"""
+    try:
+        return json.loads(BACKEND_CACHE_FILE.read_text()).get("hash") == digest
+    except (OSError, ValueError, AttributeError):
+        return False
+
+def _store_probe(digest):
+    """Record a successful probe; written to a temp file and swapped in atomically"""
+    tmp = BACKEND_CACHE_FILE.with_suffix(".tmp")
+    try:
+        tmp.write_text(json.dumps({"hash": digest, "ok": True}))
+        os.replace(tmp, BACKEND_CACHE_FILE)
+    except OSError:
+        pass
+
+@lru_cache(maxsize=1)
+def backend_import_error():
+    """Import the GCC extractor in-process (once); return the error message, or None if it imports"""
+    # AUTOQUEST_CACHE_DISABLE forces a real import, e.g. in CI
+    use_cache = not os.environ.get("AUTOQUEST_CACHE_DISABLE")
+    digest = _probe_hash() if use_cache else None
+    if use_cache and _cached_probe_ok(digest):
+        return None
+    try:
+        from autoquest.gcc import FinalPerfectGCCExtractor  # noqa: F401
+    except Exception as e:
+        return str(e)
+    if use_cache:
+        _store_probe(digest)
+    return None
+
 def start_backend():
     """Start the backend server"""
     print("🔧 Starting backend server...")
-    try:
-        # Test if backend can start
-        result = subprocess.run([
-            sys.executable, "-c", 
-            "import sys; sys.path.append('.'); from autoquest.gcc import FinalPerfectGCCExtractor; print('Backend ready')"
-        ], capture_output=True, text=True, timeout=10)
-        
-        if result.returncode == 0:
-            print("✅ Backend dependencies OK")
-            print("💡 To start backend manually: python run.py")
-            return True
-        else:
-            print(f"❌ Backend test failed: {result.stderr}")
-            return False
-    except Exception as e:
-        print(f"❌ Backend test error: {e}")
-        return False
+    # Test if backend can start
+    error = backend_import_error()
+    if error is None:
+        print("✅ Backend dependencies OK")
+        print("💡 To start backend manually: python run.py")
+        return True
+    print(f"❌ Backend test failed: {error}")
+    return False
 
 def start_frontend():
     """Start the frontend server"""
     print("🎨 Starting frontend server...")
     
     frontend_dir = Path("frontend")
-    if not frontend_dir.exists():
+    if not os.access(frontend_dir, os.F_OK):
         print("❌ Frontend directory not found")
         return False
     
     try:
         # Check if node_modules exists
-        if not (frontend_dir / "node_modules").exists():
+        if not os.access(frontend_dir / "node_modules", os.F_OK):
             print("📦 Installing frontend dependencies...")
             try:
-                subprocess.run(["npm", "install"], cwd=frontend_dir, check=True, shell=True)
+                subprocess.run(npm_install_command(frontend_dir), cwd=frontend_dir, check=True)
             except subprocess.CalledProcessError as e:
                 print(f"❌ Failed to install frontend dependencies: {e}")
                 return False
@@ -86,36 +144,41 @@ def start_frontend():
         print(f"❌ Frontend setup error: {e}")
         return False
 
+INSTRUCTIONS = (
+    "\n" + "=" * 60 + "\n"
+    "🎉 Setup Complete!\n"
+    + "=" * 60 + "\n"
+    "\n"
+    "📋 Next Steps:\n"
+    "\n"
+    "1. 🖥️  Start Chrome with remote debugging:\n"
+    "   Windows: \"C:\\Program Files\\Google\\Chrome\\Application\\chrome.exe\" --remote-debugging-port=9222\n"
+    "   macOS: /Applications/Google\\ Chrome.app/Contents/MacOS/Google\\ Chrome --remote-debugging-port=9222\n"
+    "   Linux: google-chrome --remote-debugging-port=9222\n"
+    "\n"
+    "2. 🔧 Start the backend server:\n"
+    "   python run.py\n"
+    "\n"
+    "3. 🎨 Start the frontend server:\n"
+    "   cd frontend && npm run dev\n"
+    "   Or use: python start_frontend.py\n"
+    "\n"
+    "4. 🌐 Access the web interface:\n"
+    "   http://localhost:5173\n"
+    "   Then click on '☁️ GCC Extraction' or go to /gcc\n"
+    "   🌙 Dark mode is enabled by default\n"
+    "\n"
+    "5. 🧪 Test the system:\n"
+    "   python test_gcc_simple.py\n"
+    "\n"
+    "📚 For detailed instructions, see: README-GCC-INTEGRATION.md\n"
+    + "=" * 60 + "\n"
+)
+
 def print_instructions():
     """Print usage instructions"""
-    print("\n" + "=" * 60)
-    print("🎉 Setup Complete!")
-    print("=" * 60)
-    print()
-    print("📋 Next Steps:")
-    print()
-    print("1. 🖥️  Start Chrome with remote debugging:")
-    print("   Windows: \"C:\\Program Files\\Google\\Chrome\\Application\\chrome.exe\" --remote-debugging-port=9222")
-    print("   macOS: /Applications/Google\\ Chrome.app/Contents/MacOS/Google\\ Chrome --remote-debugging-port=9222")
-    print("   Linux: google-chrome --remote-debugging-port=9222")
-    print()
-    print("2. 🔧 Start the backend server:")
-    print("   python run.py")
-    print()
-    print("3. 🎨 Start the frontend server:")
-    print("   cd frontend && npm run dev")
-    print("   Or use: python start_frontend.py")
-    print()
-    print("4. 🌐 Access the web interface:")
-    print("   http://localhost:5173")
-    print("   Then click on '☁️ GCC Extraction' or go to /gcc")
-    print("   🌙 Dark mode is enabled by default")
-    print()
-    print("5. 🧪 Test the system:")
-    print("   python test_gcc_simple.py")
-    print()
-    print("📚 For detailed instructions, see: README-GCC-INTEGRATION.md")
-    print("=" * 60)
+    sys.stdout.write(INSTRUCTIONS)
+    sys.stdout.flush()
 
 def main():
     print_banner()
@@ -127,15 +190,23 @@ def main():
     
     print()
     
+    # Import the backend in the background while the frontend check (and any npm install) runs;
+    # start_backend() then reports the memoized result, so the two outputs don't interleave
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        backend_probe = pool.submit(backend_import_error)
+        
+        # Test frontend
+        frontend_ok = start_frontend()
+        backend_probe.result()
+    
+    print()
+    
     # Test backend
     if not start_backend():
         print("\n❌ Backend test failed. Please check the errors above.")
         return 1
     
-    print()
-    
-    # Test frontend
-    if not start_frontend():
+    if not frontend_ok:
         print("\n❌ Frontend test failed. Please check the errors above.")
         return 1
     
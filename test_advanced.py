@@ -1,24 +1,46 @@
 import pytest
 import asyncio
-import tempfile
-import os
+from io import BytesIO
 from unittest.mock import Mock, patch, AsyncMock
 from datetime import datetime
 
+from fastapi import HTTPException
 from fastapi.testclient import TestClient
 from httpx import AsyncClient
 
-from main import app
+from main import app, _resolve_download, gcc_download
 from models import QuestionRequest, QuestionType, DocumentType, ChatRequest, ChatMessage
 from advanced_rag import AdvancedRAG
 from ai_engine import AIEngine
 from document_processor import DocumentProcessor
 
 
-@pytest.fixture
+# Canonical mock results, built once and shared by the tests that need them
+MOCK_SOURCE = Mock(
+    document_id="doc1",
+    file_name="test.pdf",
+    chunk_text="AI is a branch of computer science.",
+    similarity_score=0.9,
+    chunk_index=0
+)
+
+MOCK_ANSWER = Mock(
+    answer="Artificial intelligence is a branch of computer science.",
+    confidence_score=0.85,
+    sources=[],
+    processing_time=0.5,
+    model_used="qa_model",
+    question_type=QuestionType.FACTUAL,
+    metadata={}
+)
+
+
+@pytest.fixture(scope="session")
 def client():
-    """Create test client"""
-    return TestClient(app)
+    """Create test client (shared; the app holds no per-test state)"""
+    # Entering the client runs the app's lifespan, which creates the upload temp dir
+    with TestClient(app) as test_client:
+        yield test_client
 
 
 @pytest.fixture
@@ -28,6 +50,90 @@ async def async_client():
         yield ac
 
 
+@pytest.fixture(scope="session", autouse=True)
+def _mock_services():
+    """Patch the app's RAG system and AI engine once for the whole session"""
+    with patch("main.rag_system") as mock_rag, patch("main.ai_engine") as mock_ai:
+        yield mock_rag, mock_ai
+
+
+@pytest.fixture
+def mock_rag_system(_mock_services):
+    """The app's patched RAG system"""
+    return _mock_services[0]
+
+
+@pytest.fixture
+def mock_ai_engine(_mock_services):
+    """The app's patched AI engine"""
+    return _mock_services[1]
+
+
+@pytest.fixture(scope="session")
+def rag_system():
+    """AdvancedRAG loaded once per session; models dominate its construction cost"""
+    return AdvancedRAG()
+
+
+@pytest.fixture(scope="session")
+def ai_engine():
+    """AIEngine loaded once per session"""
+    return AIEngine()
+
+
+@pytest.fixture(scope="session")
+def processor():
+    """DocumentProcessor shared across the session"""
+    return DocumentProcessor()
+
+
+@pytest.fixture(scope="session")
+def sample_docs(tmp_path_factory):
+    """Text documents written once per session for tests that need a real path"""
+    docs_dir = tmp_path_factory.mktemp("docs")
+    contents = {
+        "content": b"test document content",
+        "ai": b"artificial intelligence machine learning",
+        "plain": b"This is a test document with some content.",
+    }
+    paths = {}
+    for name, data in contents.items():
+        paths[name] = docs_dir / f"{name}.txt"
+        paths[name].write_bytes(data)
+    return paths
+
+
+@pytest.fixture(scope="session")
+def populated_rag(rag_system, sample_docs):
+    """rag_system with the sample documents added once; the tests using it only read"""
+    async def add_all():
+        return [
+            await rag_system.add_document(str(sample_docs[name]), DocumentType.TXT)
+            for name in ("content", "ai")
+        ]
+    
+    return rag_system, asyncio.run(add_all())
+
+
+@pytest.fixture(autouse=True)
+def _reset_shared_state(request, _mock_services):
+    """Give each test an empty document registry and response cache on the shared objects"""
+    # Drop the previous test's calls and canned results; health checks need real dicts
+    mock_rag, mock_ai = _mock_services
+    for mock in (mock_rag, mock_ai):
+        mock.reset_mock(return_value=True, side_effect=True)
+    mock_rag.get_stats.return_value = {"vector_db_type": "faiss"}
+    mock_ai.get_model_status.return_value = {"qa": "loaded", "text_generation": "loaded"}
+    mock_ai.get_cache_stats.return_value = {"cache_enabled": True}
+    
+    # populated_rag tests share the session's documents, so they are left in place
+    if "rag_system" in request.fixturenames and "populated_rag" not in request.fixturenames:
+        request.getfixturevalue("rag_system").reset()
+    if "ai_engine" in request.fixturenames:
+        # In-memory only; clear_cache() would also flush the Redis database
+        request.getfixturevalue("ai_engine").cache.clear()
+
+
 @pytest.fixture
 def mock_token():
     """Mock authentication token"""
@@ -96,31 +202,10 @@ class TestAuthentication:
 class TestQuestionEndpoint:
     """Test question answering endpoint"""
     
-    @patch('main.rag_system')
-    @patch('main.ai_engine')
     def test_ask_question_success(self, mock_ai_engine, mock_rag_system, client, mock_token, sample_question_request):
         """Test successful question answering"""
-        # Mock RAG system
-        mock_rag_system.retrieve = AsyncMock(return_value=[
-            Mock(
-                document_id="doc1",
-                file_name="test.pdf",
-                chunk_text="AI is a branch of computer science.",
-                similarity_score=0.9,
-                chunk_index=0
-            )
-        ])
-        
-        # Mock AI engine
-        mock_ai_engine.generate_answer = AsyncMock(return_value=Mock(
-            answer="Artificial intelligence is a branch of computer science.",
-            confidence_score=0.85,
-            sources=[],
-            processing_time=0.5,
-            model_used="qa_model",
-            question_type=QuestionType.FACTUAL,
-            metadata={}
-        ))
+        mock_rag_system.retrieve = AsyncMock(return_value=[MOCK_SOURCE])
+        mock_ai_engine.generate_answer = AsyncMock(return_value=MOCK_ANSWER)
         
         response = client.post(
             "/ask",
@@ -134,7 +219,6 @@ class TestQuestionEndpoint:
         assert "confidence_score" in data
         assert "processing_time" in data
     
-    @patch('main.rag_system')
     def test_ask_question_no_sources(self, mock_rag_system, client, mock_token, sample_question_request):
         """Test question answering when no sources are found"""
         mock_rag_system.retrieve = AsyncMock(return_value=[])
@@ -154,8 +238,6 @@ class TestQuestionEndpoint:
 class TestChatEndpoint:
     """Test chat endpoint"""
     
-    @patch('main.rag_system')
-    @patch('main.ai_engine')
     def test_chat_success(self, mock_ai_engine, mock_rag_system, client, mock_token, sample_chat_request):
         """Test successful chat interaction"""
         # Mock RAG system
@@ -186,39 +268,26 @@ class TestDocumentUpload:
     
     def test_upload_unsupported_file_type(self, client, mock_token):
         """Test uploading unsupported file type"""
-        with tempfile.NamedTemporaryFile(suffix=".xyz", delete=False) as f:
-            f.write(b"test content")
-            f.flush()
-            
-            with open(f.name, "rb") as file:
-                response = client.post(
-                    "/upload",
-                    files={"file": ("test.xyz", file, "application/octet-stream")},
-                    headers={"Authorization": f"Bearer {mock_token}"}
-                )
+        response = client.post(
+            "/upload",
+            files={"file": ("test.xyz", BytesIO(b"test content"), "application/octet-stream")},
+            headers={"Authorization": f"Bearer {mock_token}"}
+        )
         
-        os.unlink(f.name)
         assert response.status_code == 400
         assert "Unsupported file type" in response.json()["detail"]
     
-    @patch('main.rag_system')
     def test_upload_success(self, mock_rag_system, client, mock_token):
         """Test successful document upload"""
         mock_rag_system.add_document = AsyncMock(return_value="doc-123")
         
-        with tempfile.NamedTemporaryFile(suffix=".txt", delete=False) as f:
-            f.write(b"test content")
-            f.flush()
-            
-            with open(f.name, "rb") as file:
-                response = client.post(
-                    "/upload",
-                    files={"file": ("test.txt", file, "text/plain")},
-                    data={"metadata": '{"category": "test"}'},
-                    headers={"Authorization": f"Bearer {mock_token}"}
-                )
+        response = client.post(
+            "/upload",
+            files={"file": ("test.txt", BytesIO(b"test content"), "text/plain")},
+            data={"metadata": '{"category": "test"}'},
+            headers={"Authorization": f"Bearer {mock_token}"}
+        )
         
-        os.unlink(f.name)
         assert response.status_code == 200
         data = response.json()
         assert data["document_id"] == "doc-123"
@@ -228,7 +297,6 @@ class TestDocumentUpload:
 class TestDocumentManagement:
     """Test document management endpoints"""
     
-    @patch('main.rag_system')
     def test_list_documents(self, mock_rag_system, client, mock_token):
         """Test listing documents"""
         mock_rag_system.list_documents.return_value = [
@@ -252,7 +320,6 @@ class TestDocumentManagement:
         assert len(data) == 1
         assert data[0]["id"] == "doc1"
     
-    @patch('main.rag_system')
     def test_delete_document(self, mock_rag_system, client, mock_token):
         """Test deleting document"""
         mock_rag_system.delete_document = AsyncMock(return_value=True)
@@ -270,18 +337,9 @@ class TestDocumentManagement:
 class TestSearchEndpoint:
     """Test search endpoint"""
     
-    @patch('main.rag_system')
     def test_search_documents(self, mock_rag_system, client, mock_token):
         """Test searching documents"""
-        mock_rag_system.retrieve = AsyncMock(return_value=[
-            Mock(
-                document_id="doc1",
-                file_name="test.pdf",
-                chunk_text="search result",
-                similarity_score=0.8,
-                chunk_index=0
-            )
-        ])
+        mock_rag_system.retrieve = AsyncMock(return_value=[MOCK_SOURCE])
         
         response = client.post(
             "/search",
@@ -303,31 +361,10 @@ class TestSearchEndpoint:
 class TestBatchProcessing:
     """Test batch processing endpoint"""
     
-    @patch('main.rag_system')
-    @patch('main.ai_engine')
     def test_batch_questions(self, mock_ai_engine, mock_rag_system, client, mock_token):
         """Test batch question processing"""
-        # Mock RAG system
-        mock_rag_system.retrieve = AsyncMock(return_value=[
-            Mock(
-                document_id="doc1",
-                file_name="test.pdf",
-                chunk_text="test content",
-                similarity_score=0.8,
-                chunk_index=0
-            )
-        ])
-        
-        # Mock AI engine
-        mock_ai_engine.generate_answer = AsyncMock(return_value=Mock(
-            answer="Test answer",
-            confidence_score=0.8,
-            sources=[],
-            processing_time=0.5,
-            model_used="qa_model",
-            question_type=QuestionType.FACTUAL,
-            metadata={}
-        ))
+        mock_rag_system.retrieve_batch = AsyncMock(return_value=[[MOCK_SOURCE], [MOCK_SOURCE]])
+        mock_ai_engine.generate_answer = AsyncMock(return_value=MOCK_ANSWER)
         
         response = client.post(
             "/batch",
@@ -352,8 +389,6 @@ class TestBatchProcessing:
 class TestSystemManagement:
     """Test system management endpoints"""
     
-    @patch('main.rag_system')
-    @patch('main.ai_engine')
     def test_get_stats(self, mock_ai_engine, mock_rag_system, client, mock_token):
         """Test getting system statistics"""
         mock_rag_system.get_stats.return_value = {
@@ -383,7 +418,6 @@ class TestSystemManagement:
         assert "cache" in data
         assert "models" in data
     
-    @patch('main.ai_engine')
     def test_clear_cache(self, mock_ai_engine, client, mock_token):
         """Test clearing cache"""
         mock_ai_engine.clear_cache = Mock()
@@ -399,39 +433,71 @@ class TestSystemManagement:
         mock_ai_engine.clear_cache.assert_called_once()
 
 
-class TestAdvancedRAG:
-    """Test AdvancedRAG class"""
+class TestGCCDownload:
+    """Test that GCC downloads stay inside the download roots"""
     
     @pytest.fixture
-    def rag_system(self):
-        """Create AdvancedRAG instance for testing"""
-        return AdvancedRAG()
+    def download_root(self, tmp_path, monkeypatch):
+        """A single download root holding ok.db, next to an outside dir holding x.db"""
+        root, outside = tmp_path / "root", tmp_path / "outside"
+        root.mkdir()
+        outside.mkdir()
+        (root / "ok.db").write_bytes(b"progress")
+        (outside / "x.db").write_bytes(b"secret")
+        monkeypatch.setattr("main._DOWNLOAD_ROOTS", (root.resolve(),))
+        _resolve_download.cache.clear()
+        yield root, outside
+        _resolve_download.cache.clear()
+    
+    def test_resolves_file_inside_root(self, download_root):
+        root, _ = download_root
+        assert _resolve_download("ok.db") == (root / "ok.db").resolve()
+    
+    @pytest.mark.asyncio
+    async def test_parent_traversal_rejected(self, download_root, mock_token):
+        assert _resolve_download("../outside/x.db") is None
+        assert _resolve_download("../x.db") is None
+        with pytest.raises(HTTPException) as exc_info:
+            await gcc_download("../x.db", token=mock_token)
+        assert exc_info.value.status_code == 400
+    
+    @pytest.mark.asyncio
+    async def test_absolute_path_rejected(self, download_root, mock_token):
+        _, outside = download_root
+        absolute = str((outside / "x.db").resolve())
+        assert _resolve_download(absolute) is None
+        with pytest.raises(HTTPException) as exc_info:
+            await gcc_download(absolute, token=mock_token)
+        assert exc_info.value.status_code == 400
     
     @pytest.mark.asyncio
-    async def test_add_document(self, rag_system):
+    async def test_symlink_escaping_root_rejected(self, download_root, mock_token):
+        root, outside = download_root
+        (root / "link.db").symlink_to(outside / "x.db")
+        (root / "out").symlink_to(outside, target_is_directory=True)
+        assert _resolve_download("link.db") is None
+        assert _resolve_download("out/x.db") is None
+        with pytest.raises(HTTPException) as exc_info:
+            await gcc_download("link.db", token=mock_token)
+        assert exc_info.value.status_code == 404
+
+
+class TestAdvancedRAG:
+    """Test AdvancedRAG class"""
+    
+    def test_add_document(self, populated_rag):
         """Test adding document to RAG system"""
-        with tempfile.NamedTemporaryFile(suffix=".txt", delete=False) as f:
-            f.write(b"test document content")
-            f.flush()
-            
-            doc_id = await rag_system.add_document(f.name, DocumentType.TXT)
-            os.unlink(f.name)
-            
+        _, doc_ids = populated_rag
+        
+        for doc_id in doc_ids:
             assert doc_id is not None
             assert isinstance(doc_id, str)
     
     @pytest.mark.asyncio
-    async def test_retrieve_documents(self, rag_system):
+    async def test_retrieve_documents(self, populated_rag):
         """Test document retrieval"""
-        # First add a document
-        with tempfile.NamedTemporaryFile(suffix=".txt", delete=False) as f:
-            f.write(b"artificial intelligence machine learning")
-            f.flush()
-            
-            await rag_system.add_document(f.name, DocumentType.TXT)
-            os.unlink(f.name)
+        rag_system, _ = populated_rag
         
-        # Then retrieve
         sources = await rag_system.retrieve("What is AI?", top_k=3)
         assert isinstance(sources, list)
 
@@ -439,25 +505,10 @@ class TestAdvancedRAG:
 class TestAIEngine:
     """Test AIEngine class"""
     
-    @pytest.fixture
-    def ai_engine(self):
-        """Create AIEngine instance for testing"""
-        return AIEngine()
-    
     @pytest.mark.asyncio
     async def test_generate_answer(self, ai_engine, sample_question_request):
         """Test answer generation"""
-        sources = [
-            Mock(
-                document_id="doc1",
-                file_name="test.pdf",
-                chunk_text="AI is artificial intelligence.",
-                similarity_score=0.9,
-                chunk_index=0
-            )
-        ]
-        
-        response = await ai_engine.generate_answer(sample_question_request, sources)
+        response = await ai_engine.generate_answer(sample_question_request, [MOCK_SOURCE])
         assert response is not None
         assert hasattr(response, 'answer')
         assert hasattr(response, 'confidence_score')
@@ -473,23 +524,13 @@ class TestAIEngine:
 class TestDocumentProcessor:
     """Test DocumentProcessor class"""
     
-    @pytest.fixture
-    def processor(self):
-        """Create DocumentProcessor instance for testing"""
-        return DocumentProcessor()
-    
     @pytest.mark.asyncio
-    async def test_process_text_document(self, processor):
+    async def test_process_text_document(self, processor, sample_docs):
         """Test processing text document"""
-        with tempfile.NamedTemporaryFile(suffix=".txt", delete=False) as f:
-            f.write(b"This is a test document with some content.")
-            f.flush()
-            
-            chunks = await processor.process_document(f.name, DocumentType.TXT)
-            os.unlink(f.name)
-            
-            assert isinstance(chunks, list)
-            assert len(chunks) > 0
+        chunks = await processor.process_document(str(sample_docs["plain"]), DocumentType.TXT)
+        
+        assert isinstance(chunks, list)
+        assert len(chunks) > 0
     
     def test_clean_text(self, processor):
         """Test text cleaning"""
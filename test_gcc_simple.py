@@ -7,6 +7,9 @@ import sys
 import os
 sys.path.append('.')
 
+import pandas as pd
+import pytest
+
 def test_gcc_import():
     """Test if GCC module can be imported"""
     try:
@@ -43,6 +46,69 @@ def test_gcc_instantiation():
         print(f"❌ Failed to instantiate GCC extractor: {e}")
         return False
 
+@pytest.fixture
+def extractor(tmp_path, monkeypatch):
+    """Extractor working in a scratch directory (it creates logs, backups and a progress db)"""
+    from autoquest.gcc import FinalPerfectGCCExtractor
+    
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "storage").mkdir()
+    (tmp_path / "solutions.xlsx").touch()
+    instance = FinalPerfectGCCExtractor(input_file="solutions.xlsx", output_file="output.xlsx")
+    yield instance
+    instance.close_database()
+    instance.stop_logging()
+
+def _company_row(extractor, company, **cells):
+    """One-row frame in the extractor's column layout"""
+    df = pd.DataFrame([[None] * (max(extractor.column_mapping.values()) + 1)], dtype=object)
+    df.iat[0, extractor.column_mapping['company_name']] = company
+    for field, value in cells.items():
+        df.iat[0, extractor.column_mapping[field]] = value
+    return df
+
+def test_expand_matrix_answer(extractor):
+    """Matrix answers fan out per column; a wrong arity gives NA everywhere"""
+    assert extractor.expand_matrix_answer('city_matrix', "Yes, no,YES,No,No,yes") == {
+        'city_bangalore': "Yes", 'city_hyderabad': "No", 'city_pune': "Yes",
+        'city_chennai': "No", 'city_mumbai': "No", 'city_delhi_ncr': "Yes",
+    }
+    assert set(extractor.expand_matrix_answer('function_matrix', "Yes,No").values()) == {"NA"}
+
+def test_matrix_field_handler():
+    """Matrix prompts have their own line extractor rather than the city_/function_ prefix one"""
+    from autoquest.gcc.gcc_copilot import field_handler
+    
+    line = "Acme Corp: Yes, No, Yes, No, No, Yes - https://example.com/acme"
+    assert field_handler('city_matrix')(line, line.lower()) == "Yes,No,Yes,No,No,Yes"
+    assert field_handler('function_matrix')(line, line.lower()) is None
+
+def test_matrix_resume_fills_only_pending_cells(extractor):
+    """A partly answered row is re-queued, but only its pending cells are written"""
+    df = _company_row(extractor, "Acme", city_bangalore="Yes|URL:https://example.com/a", city_pune="No")
+    assert extractor._pending_companies(df, 'city_matrix') == [(0, "Acme")]
+    
+    # A malformed answer must not downgrade the cells that are already answered
+    extractor.apply_answer(df, 0, 'city_matrix', "Yes,No", "")
+    assert df.iat[0, extractor.column_mapping['city_bangalore']] == "Yes|URL:https://example.com/a"
+    assert df.iat[0, extractor.column_mapping['city_pune']] == "No"
+    assert df.iat[0, extractor.column_mapping['city_hyderabad']] == "NA"
+    
+    extractor.apply_answer(df, 0, 'city_matrix', "No,Yes,Yes,No,No,Yes", "https://example.com/b")
+    assert df.iat[0, extractor.column_mapping['city_bangalore']] == "Yes|URL:https://example.com/a"
+    assert df.iat[0, extractor.column_mapping['city_pune']] == "No"
+    assert df.iat[0, extractor.column_mapping['city_hyderabad']] == "Yes|URL:https://example.com/b"
+    assert df.iat[0, extractor.column_mapping['city_chennai']] == "No|URL:https://example.com/b"
+    assert extractor._pending_companies(df, 'city_matrix') == []
+
+@pytest.mark.parametrize("text", ["Yes,", "1,234.5", "no.", "", "YES, 12 sites", "Not sure", "about 12. units", "1,,2", "N/A"])
+def test_validator_kernels_match_fallbacks(text):
+    """The byte kernels (njit-compiled when numba is installed) agree with the str fallbacks"""
+    from autoquest.gcc import validators_fast
+    
+    assert validators_fast._yes_no_code_kernel(text) == validators_fast._yes_no_code_str(text)
+    assert validators_fast._first_number_kernel(text) == validators_fast._first_number_str(text)
+
 def main():
     print("Testing GCC functionality...")
     print("=" * 50)